@@ -0,0 +1,267 @@
+"""
+Tushare API 异步客户端
+功能：
+1. 与 TushareClient 相同的方法接口 (均为 awaitable)
+2. Semaphore 限制并发请求数
+3. asyncio.sleep 非阻塞退避重试
+4. 支持任务取消 (取消后不再发起重试)
+
+Tushare SDK 本身是阻塞的，单次请求在线程池中执行；
+缓存读取、结果解析和限流配额与同步客户端共享。
+"""
+
+import asyncio
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+# 导入配置
+from config import config
+
+# 导入复权计算
+from data.adjust import adjust_prices
+
+# 导入同步客户端 (共享缓存/解析/限流)
+from api.tushare_client import TushareClient, DAILY_FIELDS
+from api.concurrency import AsyncSingleFlight
+
+# 导入Mock数据
+from data.mock_data import (
+    generate_mock_northbound_funds,
+    generate_mock_main_funds,
+)
+
+
+class AsyncTushareClient:
+    """Tushare API 异步客户端"""
+
+    def __init__(self, client: Optional[TushareClient] = None,
+                 use_mock: bool = False, max_concurrency: int = None):
+        """
+        Args:
+            client: 共享缓存的同步客户端，默认新建
+            use_mock: 是否使用Mock数据
+            max_concurrency: 最大并发请求数，默认 API_MAX_WORKERS
+        """
+        self._client = client if client is not None else TushareClient(use_mock=use_mock)
+        self.max_concurrency = max_concurrency or config.API_MAX_WORKERS
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._single_flight = AsyncSingleFlight()
+
+    @property
+    def use_mock(self) -> bool:
+        return self._client.use_mock
+
+    @property
+    def sync_client(self) -> TushareClient:
+        """底层同步客户端"""
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """惰性创建Semaphore，绑定到当前事件循环"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _query(self, api_name: str, **params) -> Any:
+        """
+        异步调用Tushare接口 - 单飞合并 + 限流 + 非阻塞退避重试
+
+        相同 (接口, 参数) 的并发调用共享同一次请求；
+        所有等待方都被取消时 CancelledError 向上抛出，不再重试。
+        """
+        if self.use_mock:
+            return getattr(self._client._mock_client, api_name)(**params)
+
+        return await self._single_flight.do(
+            TushareClient._request_key(api_name, params),
+            lambda: self._call_with_retry(api_name, **params)
+        )
+
+    async def _call_with_retry(self, api_name: str, **params) -> Any:
+        """带重试的异步API调用 - 熔断/限流/退避逻辑与同步客户端共享"""
+        client = self._client
+        func = getattr(client._pro, api_name)
+        limiter = client._get_rate_limiter(api_name)
+        cost = client._point_cost(api_name)
+
+        async with self._get_semaphore():
+            for attempt in range(config.API_RETRY_TIMES):
+                if not client._admit(api_name):
+                    return None
+                await limiter.acquire_async()
+                if client._points_limiter is not None:
+                    await client._points_limiter.acquire_async(cost)
+                client.health.record_call(api_name, cost)
+                try:
+                    result = await asyncio.to_thread(func, **params)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    wait_time = client._on_failure(api_name, e, attempt)
+                    if wait_time is None:
+                        return None
+                    await asyncio.sleep(wait_time)
+                else:
+                    client._get_breaker(api_name).record_success()
+                    return result
+        return None
+
+    def get_api_status(self) -> Dict[str, Any]:
+        """接口健康状态 (与同步客户端共享)"""
+        return self._client.get_api_status()
+
+    async def _run_sync(self, method, *args, **kwargs) -> Any:
+        """在线程中执行同步客户端的批量方法"""
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    # ==========================================
+    # 批量接口 (委托同步客户端，在线程中执行)
+    # ==========================================
+
+    async def get_stock_list(self) -> pd.DataFrame:
+        """获取股票列表 - 带缓存"""
+        return await self._run_sync(self._client.get_stock_list)
+
+    async def get_all_market_caps(self) -> pd.DataFrame:
+        """批量获取所有股票市值"""
+        return await self._run_sync(self._client.get_all_market_caps)
+
+    async def get_all_financial_ttm(self, max_workers: int = None) -> pd.DataFrame:
+        """批量获取所有股票财务数据"""
+        return await self._run_sync(self._client.get_all_financial_ttm, max_workers)
+
+    async def get_industry_rps(self) -> pd.DataFrame:
+        """获取行业RPS数据"""
+        return await self._run_sync(self._client.get_industry_rps)
+
+    async def get_trade_dates(self, start_date: str, end_date: str) -> List[str]:
+        """获取区间内的交易日列表"""
+        return await self._run_sync(self._client.get_trade_dates, start_date, end_date)
+
+    async def sync_daily_panel(self, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """同步全市场日线面板"""
+        return await self._run_sync(self._client.sync_daily_panel, start_date, end_date)
+
+    async def sync_fund_flows(self, days: int = None) -> bool:
+        """同步资金流向面板并计算全市场资金因子"""
+        return await self._run_sync(self._client.sync_fund_flows, days)
+
+    async def sync_adj_factor_panel(self, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """同步全市场复权因子面板"""
+        return await self._run_sync(self._client.sync_adj_factor_panel, start_date, end_date)
+
+    # ==========================================
+    # 单只股票接口 (原生异步)
+    # ==========================================
+
+    async def get_market_cap(self, ts_code: str) -> float:
+        """获取单只股票市值 (亿元)"""
+        mv = self._client._cached_market_cap(ts_code)
+        if mv is not None:
+            return mv
+
+        df = await self._query('daily_basic', ts_code=ts_code, fields='total_mv')
+        return self._client._parse_market_cap(ts_code, df)
+
+    async def get_financial_ttm(self, ts_code: str) -> Dict[str, Any]:
+        """获取TTM财务数据"""
+        result = self._client._cached_financial_ttm(ts_code)
+        if result is not None:
+            return result
+
+        df = await self._query(
+            'fina_indicator',
+            ts_code=ts_code,
+            fields='ts_code,report_date,roe,net_profit,revenue'
+        )
+        return self._client._parse_financial_ttm(ts_code, df)
+
+    async def get_adj_factor(self, ts_code: str) -> float:
+        """获取复权因子"""
+        factor = self._client._cached_adj_factor(ts_code)
+        if factor is not None:
+            return factor
+
+        df = await self._query('adj_factor', ts_code=ts_code)
+        return self._client._parse_adj_factor(ts_code, df)
+
+    async def get_adj_factor_series(self, ts_code: str) -> pd.DataFrame:
+        """获取复权因子序列"""
+        client = self._client
+        if client._adj_panel is not None and client._adj_panel_range is not None:
+            return client.get_adj_factor_series(ts_code)
+
+        df = client._runtime_cache.get(f"adjs_{ts_code}")
+        if df is not None:
+            return df
+
+        if client.is_known_empty('adj_factor', ts_code):
+            return client._parse_adj_factor_series(ts_code, None)
+
+        df = await self._query('adj_factor', ts_code=ts_code)
+        return client._parse_adj_factor_series(ts_code, df)
+
+    async def get_daily_data(self, ts_code: str, start_date: str, end_date: str,
+                             adj: str = None) -> pd.DataFrame:
+        """获取日线数据 - 带缓存，增量同步；adj 为复权方式"""
+        if adj:
+            df = self._client._get_daily_from_panel(ts_code, start_date, end_date, adj=adj)
+            if df is not None:
+                return df
+            df, df_adj = await asyncio.gather(
+                self.get_daily_data(ts_code, start_date, end_date),
+                self.get_adj_factor_series(ts_code),
+            )
+            return adjust_prices(df, df_adj, how=adj)
+
+        # 缓存读写 (文件/数据库) 在线程中执行，不阻塞事件循环
+        client = self._client
+        df = await self._run_sync(client._cached_daily_data, ts_code, start_date, end_date)
+        if df is not None:
+            return df
+
+        history, fetch_start = await self._run_sync(client._daily_sync_plan, ts_code, start_date, end_date)
+        if fetch_start is None:
+            return await self._run_sync(client._store_daily_data, ts_code, start_date, end_date, history, None)
+
+        if self.use_mock:
+            return await self._run_sync(client._mock_daily_data, ts_code, start_date, end_date)
+
+        df_new = await self._query('daily', ts_code=ts_code, start_date=fetch_start, end_date=end_date,
+                                   fields=DAILY_FIELDS)
+        if fetch_start == start_date:
+            await self._run_sync(client._record_daily_head, ts_code, start_date, end_date, df_new)
+        return await self._run_sync(client._store_daily_data, ts_code, start_date, end_date, history, df_new)
+
+    async def get_northbound_funds(self, ts_code: str) -> Dict[str, Any]:
+        """获取北向资金数据"""
+        client = self._client
+        if client._northbound_flow is not None:
+            return dict(client._northbound_flow)
+
+        if self.use_mock:
+            return generate_mock_northbound_funds(ts_code)
+
+        cache_key = f"hsgt_{ts_code}"
+        result = client._runtime_cache.get(cache_key)
+        if result is None:
+            df = await self._query('moneyflow_hsgt', ts_code=ts_code, **client._recent_date_range(10))
+            result = client._runtime_cache[cache_key] = client._parse_northbound_funds(df)
+        return result
+
+    async def get_main_funds(self, ts_code: str) -> Dict[str, Any]:
+        """获取主力资金数据"""
+        client = self._client
+        if client._main_fund_factors is not None:
+            return client.get_main_funds(ts_code)
+
+        if self.use_mock:
+            return generate_mock_main_funds(ts_code)
+
+        cache_key = f"mf_{ts_code}"
+        result = client._runtime_cache.get(cache_key)
+        if result is None:
+            df = await self._query('moneyflow', ts_code=ts_code, **client._recent_date_range(5))
+            result = client._runtime_cache[cache_key] = client._parse_main_funds(df)
+        return result
@@ -0,0 +1,202 @@
+"""
+并发控制工具
+功能：
+1. 令牌桶限流 (按接口每分钟配额)，支持线程与 asyncio
+2. 单飞合并 (相同的并发请求只发起一次)
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+
+
+class TokenBucket:
+    """
+    令牌桶限流器 - 线程安全
+
+    令牌按 rate_per_minute / 60 的速度匀速补充，桶容量决定允许的瞬时突发量。
+    多个线程共享同一个实例时，总调用速率不会超过接口配额。
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute 必须大于0")
+
+        self.rate_per_minute = rate_per_minute
+        self._rate = rate_per_minute / 60.0  # 每秒补充的令牌数
+        # 默认容量为1秒的配额，避免分钟初的突发超过配额
+        self.capacity = capacity if capacity is not None else max(1.0, self._rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """按流逝时间补充令牌 (调用方需持有锁)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def _take(self, tokens: float) -> float:
+        """尝试扣减令牌，成功返回0，否则返回需要等待的秒数"""
+        if tokens > self.capacity:
+            # 桶永远攒不到这么多令牌，等待不会成功
+            raise ValueError(f"请求的令牌数 {tokens} 超过桶容量 {self.capacity}")
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self._rate
+
+    def pause(self, seconds: float):
+        """
+        暂停发放令牌 (如服务端限流)
+
+        令牌清零并预扣 seconds 秒的配额，共享该桶的所有线程一起等待，
+        而不是各自继续请求再次触发限流。
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self._rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """尝试获取令牌，不等待"""
+        return self._take(tokens) == 0.0
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        获取令牌，不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数 (不能超过 capacity，否则抛出 ValueError)
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            是否获取成功
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait_time = self._take(tokens)
+            if wait_time == 0.0:
+                return True
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+
+            time.sleep(wait_time)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        """获取令牌 - asyncio版本，等待期间不阻塞事件循环"""
+        while True:
+            wait_time = self._take(tokens)
+            if wait_time == 0.0:
+                return
+            await asyncio.sleep(wait_time)
+
+
+def _share_result(result: Any) -> Any:
+    """共享结果给等待方 - DataFrame返回副本，避免调用方互相修改"""
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    return result
+
+
+class _Call:
+    """进行中的单飞调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.shared = 0  # 共享结果的等待方数量
+
+
+class SingleFlight:
+    """
+    单飞合并 - 线程安全
+
+    同一 key 的调用进行中时，后到的调用不再执行，而是等待并共享首个调用的结果
+    (或异常)。调用结束后 key 立即释放，不做结果缓存。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0  # 被合并的调用次数
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """执行 func，若同 key 调用正在进行则等待其结果"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.shared += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return _share_result(call.result)
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """
+    单飞合并 - asyncio版本
+
+    共享调用在独立任务中执行；某个等待方被取消不影响其他等待方，
+    所有等待方都取消后才取消共享任务。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, List] = {}  # key -> [task, 等待方数量]
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """执行 factory() 返回的协程，若同 key 调用正在进行则等待其结果"""
+        entry = self._calls.get(key)
+        leader = entry is None
+        if leader:
+            entry = [asyncio.ensure_future(factory()), 0]
+            self._calls[key] = entry
+
+            def _release(_, key=key, entry=entry):
+                if self._calls.get(key) is entry:
+                    del self._calls[key]
+
+            entry[0].add_done_callback(_release)
+        else:
+            self.coalesced += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+
+        return result if leader else _share_result(result)
@@ -0,0 +1,177 @@
+"""
+对冲请求 (hedged requests)
+功能：
+1. 按接口统计请求延迟直方图 (对数分桶，定期衰减以适应网络变化)
+2. 请求超过该接口的 p95 延迟仍未返回时，再发一个相同请求，取先返回的结果
+3. 额外请求受预算限制 (不超过请求总数的一定比例)，避免放大服务端压力
+4. 额外请求发出前经 admit 回调放行 (扣减接口令牌与积分配额、记入调用统计)，配额不足时不对冲
+
+HedgingTransport 包装 HttpTransport，对调用方透明:
+    transport = HedgingTransport(HttpTransport(url))
+"""
+
+import bisect
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+# 延迟分桶: 1ms ~ 约120s，相邻桶上界相差20%
+_BUCKET_BOUNDS: List[float] = [0.001 * 1.2 ** i for i in range(int(math.log(120 / 0.001, 1.2)) + 2)]
+
+
+class LatencyHistogram:
+    """
+    单个接口的延迟直方图 - 线程安全
+
+    样本数超过 decay_after 时所有计数减半，近期样本权重更高。
+    """
+
+    def __init__(self, decay_after: int = 10000):
+        self.decay_after = decay_after
+        self._counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """记录一次延迟"""
+        index = bisect.bisect_left(_BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+            if self._total > self.decay_after:
+                self._counts = [c // 2 for c in self._counts]
+                self._total = sum(self._counts)
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """延迟分位数 (所在桶的上界)，没有样本时返回None"""
+        with self._lock:
+            if not self._total:
+                return None
+            target = q * self._total
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if count and seen >= target:
+                    return _BUCKET_BOUNDS[min(index, len(_BUCKET_BOUNDS) - 1)]
+            return _BUCKET_BOUNDS[-1]
+
+
+class HedgingTransport:
+    """
+    对冲请求传输层
+
+    Args:
+        transport: 被包装的传输层 (需提供 post / close)
+        quantile: 触发对冲的延迟分位数
+        min_samples: 接口样本数不足时不对冲
+        min_delay: 对冲等待时间下限 (秒)
+        max_ratio: 额外请求占请求总数的上限
+        burst: 预算最多累积的额外请求数
+        max_workers: 发送请求的线程数
+        admit: 发出额外请求前调用 admit(api_name)，返回False时不对冲；
+               由客户端设置为扣减接口令牌和积分配额并记录调用，None时只受预算限制
+    """
+
+    def __init__(self, transport, quantile: float = 0.95, min_samples: int = 20,
+                 min_delay: float = 0.05, max_ratio: float = 0.05, burst: float = 10,
+                 max_workers: int = 32, admit: Optional[Callable[[str], bool]] = None):
+        self.transport = transport
+        self.admit = admit
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._budget = 0.0
+        self._stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_denied': 0, 'admit_denied': 0}
+
+    def histogram(self, api_name: str) -> LatencyHistogram:
+        """接口的延迟直方图"""
+        with self._lock:
+            histogram = self._histograms.get(api_name)
+            if histogram is None:
+                histogram = self._histograms[api_name] = LatencyHistogram()
+            return histogram
+
+    def hedge_delay(self, api_name: str) -> Optional[float]:
+        """对冲等待时间 (该接口的 p95 延迟)，样本不足时返回None"""
+        histogram = self.histogram(api_name)
+        if histogram.count < self.min_samples:
+            return None
+        return max(self.min_delay, histogram.quantile(self.quantile))
+
+    def _take_budget(self, api_name: str) -> bool:
+        """扣减一次额外请求的预算，并经 admit 回调放行"""
+        with self._lock:
+            if self._budget < 1.0:
+                self._stats['budget_denied'] += 1
+                return False
+            self._budget -= 1.0
+
+        if self.admit is not None and not self.admit(api_name):
+            with self._lock:
+                self._budget += 1.0
+                self._stats['admit_denied'] += 1
+            return False
+
+        with self._lock:
+            self._stats['hedged'] += 1
+        return True
+
+    def _timed_post(self, api_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """发送请求，成功时记录延迟"""
+        started = time.monotonic()
+        result = self.transport.post(api_name, payload)
+        self.histogram(api_name).record(time.monotonic() - started)
+        return result
+
+    def post(self, api_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """发送请求，超过 p95 延迟未返回时发出对冲请求，返回先成功的结果"""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._budget = min(self.burst, self._budget + self.max_ratio)
+
+        delay = self.hedge_delay(api_name)
+        if delay is None:
+            return self._timed_post(api_name, payload)
+
+        primary = self._executor.submit(self._timed_post, api_name, payload)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget(api_name):
+            return primary.result()
+
+        hedge = self._executor.submit(self._timed_post, api_name, payload)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self._stats['hedge_wins'] += 1
+                    return future.result()
+                if future is primary or error is None:
+                    error = future.exception()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """对冲统计及各接口的对冲阈值"""
+        with self._lock:
+            stats = dict(self._stats)
+            names = list(self._histograms)
+        stats['thresholds'] = {name: self.hedge_delay(name) for name in names}
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.transport.close()
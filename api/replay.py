@@ -0,0 +1,281 @@
+"""
+录制/回放传输层与本地 Tushare 替身服务
+功能：
+1. ResponseStore: 按 (接口, 参数, 字段) 把接口响应存为JSON文件
+2. RecordingTransport: 包装 HttpTransport，真实请求的响应同时写入录制目录
+3. ReplayTransport: 直接从录制目录返回响应，不访问网络
+4. StandInServer: 本地HTTP服务，按Tushare协议返回录制的响应 (未录制时可用Mock数据)，
+   可配置延迟、长尾慢请求、错误率和每分钟限流，用于离线、可复现地测量完整网络链路的吞吐
+
+命令行启动替身服务:
+    python -m api.replay --store data_cache/recordings --port 8765 --latency 0.05 --error-rate 0.01 --rate-limit 500
+然后:
+    python run_full.py --api-url http://127.0.0.1:8765
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+
+def request_key(api_name: str, params: Dict[str, Any], fields: str = '') -> str:
+    """请求的规范化标识 (不含token)"""
+    canonical = json.dumps([api_name, params or {}, fields or ''], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def frame_to_result(df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """DataFrame 转为 Tushare 响应格式"""
+    if df is None:
+        df = pd.DataFrame()
+    split = json.loads(df.to_json(orient='split', index=False, force_ascii=False))
+    return {
+        'code': 0,
+        'msg': '',
+        'data': {'fields': split['columns'], 'items': split['data']},
+    }
+
+
+class ResponseStore:
+    """录制的接口响应 - 每个请求一个JSON文件，线程安全"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, api_name: str, params: Dict[str, Any], fields: str) -> Path:
+        return self.directory / f"{api_name}_{request_key(api_name, params, fields)}.json"
+
+    def save(self, api_name: str, params: Dict[str, Any], fields: str, result: Dict[str, Any]):
+        """保存一次响应 (同一请求覆盖旧录制)"""
+        record = {'api_name': api_name, 'params': params, 'fields': fields, 'response': result}
+        path = self._path(api_name, params, fields)
+        with self._lock:
+            tmp = path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(record, ensure_ascii=False), encoding='utf-8')
+            tmp.replace(path)
+
+    def load(self, api_name: str, params: Dict[str, Any], fields: str = '') -> Optional[Dict[str, Any]]:
+        """读取录制的响应，未录制返回None"""
+        path = self._path(api_name, params, fields)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))['response']
+
+    def __len__(self) -> int:
+        return len(list(self.directory.glob('*.json')))
+
+
+class RecordingTransport:
+    """录制传输层 - 透传请求并把成功的响应写入 ResponseStore"""
+
+    def __init__(self, transport, store: ResponseStore):
+        self.transport = transport
+        self.store = store
+
+    def post(self, api_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.transport.post(api_name, payload)
+        if result.get('code') == 0:
+            self.store.save(api_name, payload.get('params', {}), payload.get('fields', ''), result)
+        return result
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport:
+    """回放传输层 - 只从 ResponseStore 返回响应，未录制的请求返回错误码"""
+
+    def __init__(self, store: ResponseStore):
+        self.store = store
+
+    def post(self, api_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.store.load(api_name, payload.get('params', {}), payload.get('fields', ''))
+        if result is None:
+            return {'code': 40404, 'msg': f'未录制的请求: {api_name}', 'data': None}
+        return result
+
+    def close(self):
+        pass
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """按Tushare协议处理 POST /<api_name>"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server: StandInServer = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        api_name = body.get('api_name') or self.path.strip('/')
+
+        status, result = server.respond(api_name, body.get('params') or {}, body.get('fields') or '')
+
+        payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    本地 Tushare 替身服务
+
+    Args:
+        store: 录制目录 (ResponseStore)，为None时只使用Mock数据
+        latency: 每个请求的固定延迟 (秒)
+        slow_rate: 请求成为慢请求的概率 (模拟长尾延迟)
+        slow_latency: 慢请求的额外延迟 (秒)
+        error_rate: 返回 HTTP 500 的概率
+        rate_limit: 每个接口每分钟最多请求次数，超出返回Tushare限流提示
+        use_mock: 未录制的请求是否用 MockTushareClient 生成响应
+        seed: 错误注入的随机种子 (相同种子结果可复现)
+    """
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, address=('127.0.0.1', 0), store: Optional[ResponseStore] = None,
+                 latency: float = 0.0, error_rate: float = 0.0, rate_limit: Optional[int] = None,
+                 use_mock: bool = True, seed: int = 0, slow_rate: float = 0.0, slow_latency: float = 0.0):
+        super().__init__(address, _StandInHandler)
+        self.store = store
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._mock = None
+        if use_mock:
+            from data.mock_data import MockTushareClient
+            self._mock = MockTushareClient()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent: Dict[str, deque] = {}
+        self.stats = {'requests': 0, 'errors': 0, 'throttled': 0, 'missing': 0, 'slow': 0}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def respond(self, api_name: str, params: Dict[str, Any], fields: str) -> tuple:
+        """生成一次响应: (HTTP状态码, Tushare响应)"""
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = self.latency
+            if self.slow_rate and self._random.random() < self.slow_rate:
+                self.stats['slow'] += 1
+                delay += self.slow_latency
+        if delay:
+            time.sleep(delay)
+
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 500, {'code': -1, 'msg': '服务器内部错误', 'data': None}
+
+            if self.rate_limit and self._throttled(api_name):
+                self.stats['throttled'] += 1
+                return 200, {'code': 40203, 'msg': f'抱歉，您每分钟最多访问该接口{self.rate_limit}次', 'data': None}
+
+        result = self.store.load(api_name, params, fields) if self.store is not None else None
+        if result is None:
+            result = self._mock_result(api_name, params, fields)
+        if result is None:
+            with self._lock:
+                self.stats['missing'] += 1
+            return 200, {'code': 40404, 'msg': f'未录制的请求: {api_name}', 'data': None}
+        return 200, result
+
+    def _throttled(self, api_name: str) -> bool:
+        """滑动一分钟窗口计数 (调用方需持有锁)"""
+        now = time.monotonic()
+        recent = self._recent.setdefault(api_name, deque())
+        while recent and now - recent[0] >= 60:
+            recent.popleft()
+        if len(recent) >= self.rate_limit:
+            return True
+        recent.append(now)
+        return False
+
+    def _mock_result(self, api_name: str, params: Dict[str, Any], fields: str) -> Optional[Dict[str, Any]]:
+        """用 MockTushareClient 生成响应"""
+        func = getattr(self._mock, api_name, None) if self._mock is not None else None
+        if func is None:
+            return None
+
+        kwargs = dict(params)
+        accepted = inspect.signature(func).parameters
+        if fields and 'fields' in accepted:
+            kwargs['fields'] = fields
+        kwargs = {k: v for k, v in kwargs.items() if k in accepted}
+
+        with self._lock:  # Mock客户端非线程安全 (惰性生成面板)
+            df = func(**kwargs)
+        if isinstance(df, dict):
+            df = pd.DataFrame(df)
+        if fields and df is not None and not df.empty:
+            df = df[[f for f in fields.split(',') if f in df.columns]]
+        return frame_to_result(df)
+
+    def start(self) -> 'StandInServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地 Tushare 替身服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--store', default=None, help='录制目录')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的延迟 (秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回HTTP 500的概率')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='慢请求的概率 (长尾延迟)')
+    parser.add_argument('--slow-latency', type=float, default=0.0, help='慢请求的额外延迟 (秒)')
+    parser.add_argument('--rate-limit', type=int, default=None, help='每个接口每分钟最多请求次数')
+    parser.add_argument('--no-mock', action='store_true', help='未录制的请求返回错误，不使用Mock数据')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    store = ResponseStore(args.store) if args.store else None
+    server = StandInServer(
+        (args.host, args.port), store=store, latency=args.latency, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, use_mock=not args.no_mock, seed=args.seed,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+    )
+    print(f"🔧 Tushare 替身服务: {server.url} (录制: {len(store) if store else 0} 条)")
+    try:
+        server.serve_forever(0.05)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 请求统计: {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
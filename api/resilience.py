@@ -0,0 +1,230 @@
+"""
+接口容错工具
+功能：
+1. 熔断器 (接口连续失败后快速失败，冷却后放行一次试探请求)
+2. 按接口的配额统计 (每分钟调用次数、积分)
+3. 服务端限流识别 (限流提示 / HTTP 429 / Retry-After)
+4. 带抖动的指数退避
+5. 接口健康状态 (失败、熔断拒绝) - 用于标记本次扫描为"降级"
+"""
+
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# 服务端限流提示 (Tushare 返回 msg)
+THROTTLE_MARKERS = ('每分钟最多访问', '每小时最多访问', '访问频率', '访问过于频繁', 'rate limit')
+
+# 配额耗尽提示，当日重试无意义，直接熔断
+QUOTA_EXHAUSTED_MARKERS = ('每天最多访问', '今日访问次数', '积分不足')
+
+
+class CircuitBreaker:
+    """
+    熔断器 - 线程安全
+
+    closed: 正常放行；连续失败达到阈值后进入 open
+    open: 直接拒绝，冷却时间过后进入 half_open
+    half_open: 只放行一个试探请求，成功则 closed，失败则重新 open；结果不计入熔断时 release_trial 释放名额
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次请求"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            # half_open: 只放行一个试探请求
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        """请求成功，关闭熔断"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """请求失败，连续失败达到阈值 (或试探失败) 时打开熔断"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def release_trial(self):
+        """试探请求结束但结果不计入熔断 (如被限流)，释放试探名额"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def trip(self):
+        """立即打开熔断 (如配额耗尽)"""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class _EndpointStats:
+    """单个接口的统计"""
+
+    def __init__(self):
+        self.recent: deque = deque()  # 最近一分钟的 (时间, 积分)
+        self.calls = 0
+        self.points = 0.0
+        self.throttled = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_error = ''
+
+
+class ApiHealth:
+    """
+    接口配额与健康状态统计 - 线程安全
+
+    每次实际发出的请求都记一次调用和对应积分；最终失败 (重试用尽) 或被熔断拒绝的
+    调用记为降级，扫描结束后据此给出明确的 "degraded" 状态。
+    """
+
+    WINDOW = 60.0  # 配额统计窗口 (秒)
+
+    def __init__(self):
+        self._stats: Dict[str, _EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, api_name: str) -> _EndpointStats:
+        stats = self._stats.get(api_name)
+        if stats is None:
+            stats = self._stats[api_name] = _EndpointStats()
+        return stats
+
+    def _trim(self, stats: _EndpointStats, now: float):
+        while stats.recent and now - stats.recent[0][0] >= self.WINDOW:
+            stats.recent.popleft()
+
+    def record_call(self, api_name: str, points: float = 1.0):
+        """记录一次实际发出的请求"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._get(api_name)
+            self._trim(stats, now)
+            stats.recent.append((now, points))
+            stats.calls += 1
+            stats.points += points
+
+    def record_throttled(self, api_name: str):
+        """记录一次服务端限流"""
+        with self._lock:
+            self._get(api_name).throttled += 1
+
+    def record_failure(self, api_name: str, error: str):
+        """记录一次最终失败 (重试用尽)"""
+        with self._lock:
+            stats = self._get(api_name)
+            stats.failures += 1
+            stats.last_error = error
+
+    def record_rejected(self, api_name: str):
+        """记录一次被熔断拒绝的调用"""
+        with self._lock:
+            self._get(api_name).rejected += 1
+
+    def usage(self, api_name: str) -> Dict[str, float]:
+        """接口最近一分钟的调用次数与积分"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._get(api_name)
+            self._trim(stats, now)
+            return {
+                'calls_per_minute': len(stats.recent),
+                'points_per_minute': sum(p for _, p in stats.recent),
+            }
+
+    @property
+    def degraded(self) -> bool:
+        """是否有调用最终失败或被熔断拒绝"""
+        with self._lock:
+            return any(s.failures or s.rejected for s in self._stats.values())
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """按接口汇总统计"""
+        with self._lock:
+            return {
+                name: {
+                    'calls': s.calls,
+                    'points': s.points,
+                    'throttled': s.throttled,
+                    'failures': s.failures,
+                    'rejected': s.rejected,
+                    'last_error': s.last_error,
+                }
+                for name, s in self._stats.items()
+            }
+
+
+def throttle_wait(error: BaseException) -> Optional[float]:
+    """
+    识别服务端限流
+
+    Returns:
+        限流时返回建议等待秒数 (Retry-After，未给出时为0)，非限流错误返回None
+    """
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) == 429:
+        retry_after = response.headers.get('Retry-After', '')
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return 0.0
+
+    message = str(error)
+    if any(marker in message for marker in THROTTLE_MARKERS):
+        match = re.search(r'(\d+)\s*秒后', message)
+        return float(match.group(1)) if match else 0.0
+
+    return None
+
+
+def is_quota_exhausted(error: BaseException) -> bool:
+    """是否为配额耗尽 (当日不可恢复)"""
+    message = str(error)
+    return any(marker in message for marker in QUOTA_EXHAUSTED_MARKERS)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """带抖动的指数退避 (full jitter): [0, min(cap, base * 2^attempt)] 内均匀随机"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
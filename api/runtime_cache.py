@@ -0,0 +1,174 @@
+"""
+运行时缓存 (进程内)
+功能：
+1. 按字节数限制容量，超出时按LRU淘汰最久未使用的条目
+2. 按key的命名空间 (如 daily_、mv_、fin_) 设置过期时间，对应 CACHE_EXPIRY 中的缓存类型
+3. 命中/未命中/淘汰/过期统计，用于判断缓存是否有效
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(value: Any) -> int:
+    """估算对象占用的字节数 (DataFrame按实际内存，容器递归一层)"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class RuntimeCache:
+    """
+    有界 LRU + TTL 缓存 - 线程安全
+
+    兼容原来的 dict 用法 (in / [] / 赋值)，推荐用 get() 读取:
+    检查与读取在同一把锁内完成，并计入命中统计。
+
+    Args:
+        max_bytes: 容量上限 (字节)，单个条目超过上限时不缓存
+        ttl: 命名空间 -> 过期秒数，命名空间为key中第一个 '_' 之前的部分
+        default_ttl: 未配置命名空间的过期秒数，None表示不过期
+        clock: 时间函数 (测试时可替换)
+    """
+
+    def __init__(self, max_bytes: int, ttl: Optional[Dict[str, float]] = None,
+                 default_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._data: OrderedDict = OrderedDict()  # key -> (value, 字节数, 过期时间)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def namespace(key: str) -> str:
+        return key.split('_', 1)[0]
+
+    def _expires_at(self, key: str) -> Optional[float]:
+        ttl = self.ttl.get(self.namespace(key), self.default_ttl)
+        return None if ttl is None else self._clock() + ttl
+
+    def _lookup(self, key: str):
+        """查找未过期的条目并标记为最近使用 (调用方需持有锁)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and self._clock() >= entry[2]:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存，未命中或已过期返回 default"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size, self._expires_at(key))
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """删除并返回条目"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def discard_prefix(self, prefix: str) -> int:
+        """删除 key 以 prefix 开头的所有条目，返回删除数量"""
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        """清空缓存 (保留统计)"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                raise KeyError(key)
+            return entry[0]
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                raise KeyError(key)
+            self._remove(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率与容量统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'items': len(self._data),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,148 @@
+"""
+Tushare HTTP 传输层
+功能：
+1. 持久化 requests.Session，keep-alive 连接池复用
+2. 可配置连接池大小 (API_POOL_SIZE)
+3. 每次请求强制 API_TIMEOUT 超时
+4. 与 ts.pro_api 相同的调用方式 (pro.daily(ts_code=...))
+5. 可选的对冲请求 (API_HEDGING，见 api/hedging.py)
+
+一个传输层实例可被线程池和 asyncio.to_thread 共享，
+连接池满时请求排队等待空闲连接，而不是新建连接。
+"""
+
+import functools
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+# 导入配置
+from config import config
+
+
+class TushareApiError(Exception):
+    """Tushare接口返回错误 (code != 0)"""
+
+    def __init__(self, api_name: str, code: Any, msg: str):
+        super().__init__(f"{api_name}: [{code}] {msg}")
+        self.api_name = api_name
+        self.code = code
+        self.msg = msg
+
+
+class HttpTransport:
+    """基于 requests.Session 的连接池传输层"""
+
+    def __init__(self, base_url: str, pool_size: int = None, timeout: float = None):
+        """
+        Args:
+            base_url: 接口地址 (如 TUSHARE_API_URL)
+            pool_size: 连接池大小，默认 API_POOL_SIZE
+            timeout: 单次请求超时秒数，默认 API_TIMEOUT
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size or config.API_POOL_SIZE
+        self.timeout = timeout if timeout is not None else config.API_TIMEOUT
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+            max_retries=0,  # 重试由 _call_with_retry 负责
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, api_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """发送一次请求并返回解析后的JSON"""
+        response = self.session.post(
+            f"{self.base_url}/{api_name}",
+            json=payload,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+class TushareHttpApi:
+    """
+    Tushare 数据接口 - ts.pro_api 的替代实现
+
+    请求格式与官方SDK一致: {'api_name', 'token', 'params', 'fields'}，
+    通过 HttpTransport 复用连接。
+    """
+
+    def __init__(self, token: str, transport: HttpTransport):
+        self.token = token
+        self.transport = transport
+
+    def query(self, api_name: str, fields: str = '', **params) -> pd.DataFrame:
+        """调用接口并转换为DataFrame"""
+        payload = {
+            'api_name': api_name,
+            'token': self.token,
+            'params': params,
+            'fields': fields,
+        }
+        result = self.transport.post(api_name, payload)
+
+        if result.get('code') != 0:
+            raise TushareApiError(api_name, result.get('code'), result.get('msg', ''))
+
+        data = result.get('data') or {}
+        return pd.DataFrame(data.get('items', []), columns=data.get('fields', []))
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return functools.partial(self.query, name)
+
+
+def create_pro_api(token: str = None, base_url: str = None,
+                   pool_size: int = None, timeout: float = None,
+                   record_dir: str = None, hedging: bool = None) -> Optional[TushareHttpApi]:
+    """
+    创建基于连接池的数据接口
+
+    Args:
+        record_dir: 录制目录，默认 API_RECORD_DIR；设置后成功的响应同时写入该目录
+        hedging: 是否启用对冲请求，默认 API_HEDGING
+
+    Returns:
+        TushareHttpApi，未安装 requests 时返回None
+    """
+    try:
+        transport = HttpTransport(
+            base_url or config.TUSHARE_API_URL,
+            pool_size=pool_size,
+            timeout=timeout,
+        )
+    except ImportError:
+        return None
+
+    record_dir = record_dir or config.API_RECORD_DIR
+    if record_dir:
+        from api.replay import RecordingTransport, ResponseStore
+        transport = RecordingTransport(transport, ResponseStore(record_dir))
+
+    if hedging is None:
+        hedging = config.API_HEDGING
+    if hedging:
+        from api.hedging import HedgingTransport
+        transport = HedgingTransport(
+            transport,
+            quantile=config.API_HEDGE_QUANTILE,
+            min_samples=config.API_HEDGE_MIN_SAMPLES,
+            max_ratio=config.API_HEDGE_MAX_RATIO,
+            max_workers=2 * (pool_size or config.API_POOL_SIZE),
+        )
+
+    return TushareHttpApi(token or config.TUSHARE_TOKEN, transport)
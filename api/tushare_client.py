@@ -16,23 +16,57 @@ import pandas as pd
 import numpy as np
 import datetime
 import time
+import threading
 import warnings
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional
 
 # 导入配置
 from config import config
 
+# 导入并发控制
+from api.concurrency import TokenBucket, SingleFlight
+
+# 导入运行时缓存
+from api.runtime_cache import RuntimeCache
+
+# 导入容错工具
+from api.resilience import CircuitBreaker, ApiHealth, throttle_wait, is_quota_exhausted, backoff_delay
+
+# 导入传输层
+from api.transport import create_pro_api
+from api.hedging import HedgingTransport
+
 # 导入缓存
 from data.cache_manager import (
     is_cache_valid, load_cache, save_cache,
-    load_market_cap_cache, save_market_cap_cache,
-    load_financial_ttm_cache, save_financial_ttm_cache,
-    load_stock_list_cache, save_stock_list_cache,
-    load_adj_factor_cache, save_adj_factor_cache,
+    load_market_cap_cache, save_market_cap_cache, load_market_cap_index,
+    load_financial_ttm_cache, save_financial_ttm_cache, load_financial_ttm_index,
+    load_financial_periods_cache, save_financial_periods_cache,
+    load_stock_list_cache, save_stock_list_cache, load_stock_list_index,
+    load_adj_factor_cache, save_adj_factor_cache, load_adj_factor_index,
     load_industry_rps_cache, save_industry_rps_cache,
-    load_daily_cache, save_daily_cache,
+    load_daily_cache, save_daily_cache, flush_daily_store,
+    load_daily_panel_cache, save_daily_panel_cache, bar_arrays, save_bar_arrays,
+    load_adj_factor_panel_cache, save_adj_factor_panel_cache,
+    load_moneyflow_panel_cache, save_moneyflow_panel_cache,
+    load_northbound_flow_cache, save_northbound_flow_cache,
+    load_sw_daily_panel_cache, save_sw_daily_panel_cache,
+    append_stock_list_changes, touch_cache, drop_cache_rows, delete_daily_cache,
+    load_cache_index, upsert_cache,
 )
 
+# 导入复权计算与数据类型压缩
+from data.adjust import PRICE_COLUMNS, adj_ratio, adjust_prices
+from data.array_store import BarArrayStore
+from data.dtypes import compact_frame, expand_frame
+from data.negative_cache import NegativeCache
+from data.stock_list_diff import diff_stock_lists, is_empty_diff, format_diff, diff_to_changes
+
+# 导入资金流向因子与行业RPS
+from indicators.fund_flow import calculate_flow_factors
+from indicators.rps import calculate_period_returns, calculate_rps
+
 # 导入Mock数据
 from data.mock_data import (
     MockTushareClient,
@@ -48,6 +82,23 @@ from data.mock_data import (
 
 warnings.filterwarnings('ignore')
 
+# 按报告期批量拉取的财务字段
+FINA_BULK_FIELDS = 'ts_code,ann_date,end_date,roe,net_profit,revenue'
+
+# 日线字段 (指标只需要 OHLCV)
+DAILY_FIELDS = 'ts_code,trade_date,open,high,low,close,vol'
+
+# 按交易日批量拉取的个股资金流向字段
+MONEYFLOW_FIELDS = 'ts_code,trade_date,net_mf_amount'
+
+# 各报告期的法定披露截止日 (月日)，年报为次年
+REPORT_DEADLINES = {
+    '0331': '0430',
+    '0630': '0831',
+    '0930': '1031',
+    '1231': '0430',
+}
+
 
 class TushareClient:
     """Tushare API 客户端"""
@@ -57,8 +108,65 @@ class TushareClient:
         self._pro = None
         self._init_client()
         
-        # 运行时缓存
-        self._runtime_cache: Dict[str, Any] = {}
+        # 按接口限流 (令牌桶)
+        self._rate_limiters: Dict[str, TokenBucket] = {}
+        self._rate_limiters_lock = threading.Lock()
+        
+        # 积分配额 (所有接口共享)、按接口熔断、配额与健康统计
+        self._points_limiter = self._create_points_limiter()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.health = ApiHealth()
+        
+        # 对冲请求同样受接口令牌和积分配额约束 (启用 API_HEDGING 时)
+        transport = getattr(self._pro, 'transport', None)
+        if isinstance(transport, HedgingTransport):
+            transport.admit = self._try_acquire_quota
+        
+        # 合并并发的相同请求
+        self._single_flight = SingleFlight()
+        
+        # 运行时缓存 (有界LRU，按命名空间过期)
+        self._runtime_cache = self._create_runtime_cache()
+        
+        # 空结果缓存 (持久化，跨运行跳过已知无数据的股票)
+        self._negative_cache = NegativeCache(config.NEGATIVE_CACHE_EXPIRY, config.NEGATIVE_CACHE_FLUSH_EVERY)
+        
+        # 全市场日线面板 (按 ts_code 建立行号索引)
+        self._daily_panel: Optional[pd.DataFrame] = None
+        self._daily_panel_index: Dict[str, np.ndarray] = {}
+        self._daily_panel_range: Optional[tuple] = None
+        
+        # 日线面板对应的内存映射数组 (BAR_ARRAYS_ENABLED 时 Step 4 从中读取单只股票)
+        self._bar_arrays: Optional[BarArrayStore] = None
+        self._bar_array_fields: List[str] = []
+        
+        # 全市场复权因子面板，及按复权方式缓存的复权日线面板
+        self._adj_panel: Optional[pd.DataFrame] = None
+        self._adj_panel_index: Dict[str, np.ndarray] = {}
+        self._adj_panel_range: Optional[tuple] = None
+        self._adjusted_panels: Dict[str, pd.DataFrame] = {}
+        
+        # 全市场资金流向面板及计算好的资金因子
+        self._moneyflow_panel: Optional[pd.DataFrame] = None
+        self._main_fund_factors: Optional[pd.DataFrame] = None
+        self._northbound_flow: Optional[Dict[str, Any]] = None
+        
+        # 最近一次刷新股票列表得到的变化 (见 data/stock_list_diff.py)
+        self.stock_list_diff: Optional[Dict[str, pd.DataFrame]] = None
+    
+    @staticmethod
+    def _create_runtime_cache() -> RuntimeCache:
+        """运行时缓存: 容量取 RUNTIME_CACHE_MAX_MB，过期时间取命名空间对应的 CACHE_EXPIRY"""
+        day = 24 * 3600
+        ttl = {
+            namespace: config.CACHE_EXPIRY.get(cache_name, 1) * day
+            for namespace, cache_name in config.RUNTIME_CACHE_NAMESPACES.items()
+        }
+        return RuntimeCache(
+            max_bytes=int(config.RUNTIME_CACHE_MAX_MB * 1024 * 1024),
+            ttl=ttl,
+            default_ttl=config.CACHE_EXPIRY.get('daily_data', 1) * day,
+        )
     
     def _init_client(self):
         """初始化客户端"""
@@ -69,10 +177,7 @@ class TushareClient:
         
         # 真实API初始化
         try:
-            import tushare as ts
-            ts.set_token(config.TUSHARE_TOKEN)
-            self._pro = ts.pro_api(config.TUSHARE_TOKEN)
-            self._pro._DataApi__http_url = config.TUSHARE_API_URL
+            self._pro = self._create_pro_api()
             print("✅ Tushare API 初始化成功")
         except Exception as e:
             print(f"⚠️ Tushare API 初始化失败: {e}")
@@ -80,24 +185,344 @@ class TushareClient:
             self.use_mock = True
             self._mock_client = MockTushareClient()
     
-    def _call_with_retry(self, func, *args, **kwargs) -> Any:
-        """带重试的API调用"""
+    def _create_pro_api(self):
+        """创建数据接口 - 优先使用连接池传输层，未安装requests时使用 ts.pro_api"""
+        if config.API_POOLED_TRANSPORT:
+            pro = create_pro_api()
+            if pro is not None:
+                return pro
+        
+        import tushare as ts
+        ts.set_token(config.TUSHARE_TOKEN)
+        pro = ts.pro_api(config.TUSHARE_TOKEN, timeout=config.API_TIMEOUT)
+        pro._DataApi__http_url = config.TUSHARE_API_URL
+        return pro
+    
+    def _call_with_retry(self, api_name: str, func, *args, **kwargs) -> Any:
+        """
+        带重试的API调用 - 熔断 + 限流感知的抖动退避
+        
+        熔断打开时直接返回None，不再等待重试；服务端限流时暂停该接口的令牌桶。
+        最终失败和熔断拒绝都记入 self.health，扫描结束后报告降级状态。
+        """
         if self.use_mock:
             return func(*args, **kwargs)
         
         for attempt in range(config.API_RETRY_TIMES):
+            if not self._admit(api_name):
+                return None
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except Exception as e:
-                if attempt < config.API_RETRY_TIMES - 1:
-                    wait_time = 2 ** attempt  # 指数退避
-                    print(f"    ⚠️ API调用失败，{wait_time}秒后重试... ({attempt + 1}/{config.API_RETRY_TIMES})")
-                    time.sleep(wait_time)
-                else:
-                    print(f"    ❌ API调用失败: {e}")
+                wait_time = self._on_failure(api_name, e, attempt)
+                if wait_time is None:
                     return None
+                time.sleep(wait_time)
+            else:
+                self._get_breaker(api_name).record_success()
+                return result
         return None
     
+    def _admit(self, api_name: str) -> bool:
+        """熔断检查，拒绝时记入健康状态"""
+        if self._get_breaker(api_name).allow():
+            return True
+        self.health.record_rejected(api_name)
+        return False
+    
+    def _on_failure(self, api_name: str, error: Exception, attempt: int) -> Optional[float]:
+        """
+        处理一次失败的尝试
+        
+        Returns:
+            重试前等待的秒数，None表示放弃 (重试用尽/熔断/配额耗尽)
+        """
+        breaker = self._get_breaker(api_name)
+        last_attempt = attempt >= config.API_RETRY_TIMES - 1
+        
+        if is_quota_exhausted(error):
+            breaker.trip()
+            return self._give_up(api_name, error)
+        
+        throttle = throttle_wait(error)
+        if throttle is not None:
+            # 限流不是接口故障，不计入熔断 (释放半开状态的试探名额)；暂停令牌桶让所有线程一起等待
+            breaker.release_trial()
+            self.health.record_throttled(api_name)
+            if last_attempt:
+                return self._give_up(api_name, error)
+            pause = throttle or config.API_THROTTLE_WAIT
+            self._get_rate_limiter(api_name).pause(pause)
+            print(f"    ⏳ {api_name} 被限流，暂停{pause:.0f}秒后重试... ({attempt + 1}/{config.API_RETRY_TIMES})")
+            return backoff_delay(0, config.API_BACKOFF_BASE, config.API_BACKOFF_MAX)
+        
+        breaker.record_failure()
+        if last_attempt or breaker.state != CircuitBreaker.CLOSED:
+            return self._give_up(api_name, error)
+        
+        wait_time = backoff_delay(attempt, config.API_BACKOFF_BASE, config.API_BACKOFF_MAX)
+        print(f"    ⚠️ API调用失败，{wait_time:.1f}秒后重试... ({attempt + 1}/{config.API_RETRY_TIMES})")
+        return wait_time
+    
+    def _give_up(self, api_name: str, error: Exception) -> None:
+        """放弃本次调用并记入健康状态"""
+        print(f"    ❌ API调用失败: {error}")
+        self.health.record_failure(api_name, str(error))
+        return None
+    
+    def _get_breaker(self, api_name: str) -> CircuitBreaker:
+        """获取接口对应的熔断器"""
+        with self._rate_limiters_lock:
+            breaker = self._breakers.get(api_name)
+            if breaker is None:
+                breaker = CircuitBreaker(config.API_BREAKER_THRESHOLD, config.API_BREAKER_COOLDOWN)
+                self._breakers[api_name] = breaker
+            return breaker
+    
+    @staticmethod
+    def _create_points_limiter() -> Optional[TokenBucket]:
+        """创建积分令牌桶，容量至少能容纳单次消耗最高的接口"""
+        rate = config.API_POINTS_PER_MINUTE
+        if not rate:
+            return None
+        capacity = max(1.0, rate / 60.0, max(config.API_POINT_COSTS.values()))
+        return TokenBucket(rate, capacity=capacity)
+    
+    def _get_rate_limiter(self, api_name: str) -> TokenBucket:
+        """获取接口对应的令牌桶 (同一接口共享一个)"""
+        with self._rate_limiters_lock:
+            limiter = self._rate_limiters.get(api_name)
+            if limiter is None:
+                rate = config.API_RATE_LIMITS.get(api_name, config.API_RATE_LIMITS['default'])
+                limiter = TokenBucket(rate)
+                self._rate_limiters[api_name] = limiter
+            return limiter
+    
+    @staticmethod
+    def _point_cost(api_name: str) -> float:
+        """接口单次调用消耗的积分"""
+        return config.API_POINT_COSTS.get(api_name, config.API_POINT_COSTS['default'])
+    
+    def _acquire_quota(self, api_name: str):
+        """发出请求前获取接口令牌和积分配额，并记入配额统计"""
+        cost = self._point_cost(api_name)
+        self._get_rate_limiter(api_name).acquire()
+        if self._points_limiter is not None:
+            self._points_limiter.acquire(cost)
+        self.health.record_call(api_name, cost)
+    
+    def _try_acquire_quota(self, api_name: str) -> bool:
+        """不等待地获取接口令牌和积分配额 (对冲请求用)，成功时记入配额统计"""
+        cost = self._point_cost(api_name)
+        if not self._get_rate_limiter(api_name).try_acquire():
+            return False
+        if self._points_limiter is not None and not self._points_limiter.try_acquire(cost):
+            return False
+        self.health.record_call(api_name, cost)
+        return True
+    
+    def flush(self):
+        """写入批量缓存中尚未落盘的变化 (日线存储缓冲、空结果记录)，扫描结束时调用"""
+        flush_daily_store()
+        self._negative_cache.flush()
+    
+    def get_api_status(self) -> Dict[str, Any]:
+        """
+        接口健康状态
+        
+        Returns:
+            {'status': 'ok' / 'degraded', 'endpoints': 按接口的调用/积分/限流/失败/熔断拒绝统计}
+        """
+        status = {
+            'status': 'degraded' if self.health.degraded else 'ok',
+            'endpoints': self.health.report(),
+            'runtime_cache': self._runtime_cache.stats(),
+            'negative_cache': {'hits': self._negative_cache.hits, 'entries': self._negative_cache.summary()},
+        }
+        
+        # 对冲请求统计 (启用 API_HEDGING 时)
+        transport = getattr(self._pro, 'transport', None)
+        if isinstance(transport, HedgingTransport):
+            status['hedging'] = transport.stats()
+        return status
+    
+    def _query(self, api_name: str, **params) -> Any:
+        """
+        调用Tushare接口 - 单飞合并 + 按接口限流 + 熔断重试
+        
+        每次尝试 (包括重试) 都先从该接口的令牌桶取令牌，
+        多线程并发时总速率不超过 API_RATE_LIMITS 配额。
+        相同 (接口, 参数) 的并发调用共享同一次请求及其结果。
+        """
+        if self.use_mock:
+            return getattr(self._mock_client, api_name)(**params)
+        
+        def _fetch():
+            self._acquire_quota(api_name)
+            return getattr(self._pro, api_name)(**params)
+        
+        return self._single_flight.do(
+            self._request_key(api_name, params),
+            lambda: self._call_with_retry(api_name, _fetch)
+        )
+    
+    @staticmethod
+    def _request_key(api_name: str, params: Dict[str, Any]) -> tuple:
+        """请求标识: (接口名, 排序后的参数)"""
+        return (api_name, tuple(sorted(params.items())))
+    
+    # ==========================================
+    # 分页拉取 (单次返回行数受限的接口)
+    # ==========================================
+    
+    @staticmethod
+    def _row_limit(api_name: str) -> int:
+        """接口单次返回的最大行数"""
+        return config.API_ROW_LIMITS.get(api_name, config.API_ROW_LIMITS['default'])
+    
+    def query_all(self, api_name: str, split_by: str = 'offset', codes: List[str] = None,
+                  page_size: int = None, batch_size: int = 100, max_workers: int = None,
+                  **params) -> Optional[pd.DataFrame]:
+        """
+        拉取行数受限接口的完整数据 - 检测截断并自动拆分请求，拆分出的请求并发拉取
+        
+        返回行数达到单次上限即视为被截断，按 split_by 拆分后重新请求:
+            'offset': 按 limit/offset 翻页，后续页按 1、2、4... 页成倍并发预取 (不超过线程数)
+            'date': 把 start_date ~ end_date 对半拆分，直到不再截断或只剩一天
+            'codes': 把 codes 按 batch_size 分批 (ts_code 逗号分隔)，截断的批次对半拆分
+        所有请求都经过 _query (按接口限流、熔断重试)，并发度受 API_MAX_WORKERS 与接口配额共同约束。
+        
+        Args:
+            api_name: 接口名
+            split_by: 拆分方式 'offset' / 'date' / 'codes'
+            codes: split_by='codes' 时的股票代码列表
+            page_size: 单次返回上限，默认取 API_ROW_LIMITS
+            batch_size: split_by='codes' 时每批代码数
+            max_workers: 并发线程数，默认 API_MAX_WORKERS
+            **params: 接口参数
+        
+        Returns:
+            按请求顺序合并的 DataFrame，任一请求失败时返回None
+        """
+        limit = page_size or self._row_limit(api_name)
+        workers = max(1, max_workers or config.API_MAX_WORKERS)
+        
+        if split_by == 'offset':
+            tasks = [((0,), dict(params, limit=limit, offset=0))]
+        elif split_by == 'date':
+            tasks = [((0,), dict(params))]
+        elif split_by == 'codes':
+            codes = list(codes or [])
+            tasks = [
+                ((i,), dict(params, ts_code=','.join(codes[i:i + batch_size])))
+                for i in range(0, len(codes), batch_size)
+            ]
+        else:
+            raise ValueError(f"不支持的拆分方式: {split_by}")
+        
+        frames: Dict[tuple, pd.DataFrame] = {}
+        issued_offset = 0  # 已发出的最大 offset
+        wave = 1  # 下一轮预取的页数
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(self._query, api_name, **task): (key, task) for key, task in tasks}
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, task = pending.pop(future)
+                    df = future.result()
+                    if df is None:
+                        for other in pending:
+                            other.cancel()
+                        return None
+                    
+                    truncated = len(df) >= limit
+                    if split_by == 'offset':
+                        if not df.empty:
+                            frames[key] = df
+                        follow = []
+                        if truncated and task['offset'] == issued_offset:
+                            wave = min(wave * 2, workers)
+                            follow = [
+                                ((issued_offset + limit * n,), dict(task, offset=issued_offset + limit * n))
+                                for n in range(1, wave + 1)
+                            ]
+                            issued_offset += limit * wave
+                    elif truncated:
+                        follow = self._split_request(split_by, key, task)
+                        if not follow:
+                            print(f"    ⚠️ {api_name} 返回 {len(df)} 行已达上限且无法再拆分，数据可能不完整")
+                            frames[key] = df
+                    else:
+                        frames[key] = df
+                        follow = []
+                    
+                    for sub_key, sub_task in follow:
+                        pending[executor.submit(self._query, api_name, **sub_task)] = (sub_key, sub_task)
+        
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat([frames[k] for k in sorted(frames)], ignore_index=True)
+    
+    @staticmethod
+    def _split_request(split_by: str, key: tuple, task: Dict[str, Any]) -> List[tuple]:
+        """把被截断的请求对半拆分，无法拆分时返回空列表"""
+        if split_by == 'date':
+            start = datetime.datetime.strptime(task['start_date'], '%Y%m%d')
+            end = datetime.datetime.strptime(task['end_date'], '%Y%m%d')
+            if start >= end:
+                return []
+            mid = start + (end - start) // 2
+            return [
+                (key + (0,), dict(task, end_date=mid.strftime('%Y%m%d'))),
+                (key + (1,), dict(task, start_date=(mid + datetime.timedelta(days=1)).strftime('%Y%m%d'))),
+            ]
+        
+        codes = task['ts_code'].split(',')
+        if len(codes) <= 1:
+            return []
+        half = len(codes) // 2
+        return [
+            (key + (0,), dict(task, ts_code=','.join(codes[:half]))),
+            (key + (1,), dict(task, ts_code=','.join(codes[half:]))),
+        ]
+    
+    # ==========================================
+    # 空结果缓存
+    # ==========================================
+    
+    def is_known_empty(self, api_name: str, ts_code: str) -> bool:
+        """该接口对该股票是否已知返回空数据 (未过期)"""
+        return self._negative_cache.get(api_name, ts_code) is not None
+    
+    def _record_empty(self, api_name: str, ts_code: str):
+        """记录一次空结果 (接口调用成功但无数据，调用失败不记录)"""
+        if self.use_mock:
+            return
+        self._negative_cache.add(api_name, ts_code, self._empty_reason(api_name, ts_code))
+    
+    @staticmethod
+    def _empty_reason(api_name: str, ts_code: str) -> str:
+        """
+        空结果原因 - 按股票列表缓存判断
+        
+        delisted: 不在上市股票列表中; new_listing: 上市不足 NEW_LISTING_DAYS 天;
+        suspended: 已上市的股票没有日线; 其余为 no_data
+        """
+        stocks = load_stock_list_index()
+        if stocks:
+            row = stocks.get(ts_code)
+            if row is None or str(row.get('list_status', 'L')) == 'D':
+                return 'delisted'
+            
+            list_date = str(row.get('list_date', ''))
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=config.NEW_LISTING_DAYS)).strftime('%Y%m%d')
+            if list_date > cutoff:
+                return 'new_listing'
+        
+        return 'suspended' if api_name == 'daily' else 'no_data'
+    
     # ==========================================
     # 股票列表相关
     # ==========================================
@@ -112,28 +537,63 @@ class TushareClient:
                 return df
         
         # 从API获取
-        def _fetch():
-            if self.use_mock:
-                return self._mock_client.stock_basic(
-                    exchange='',
-                    list_status='L',
-                    fields='ts_code,symbol,name,industry,list_date,list_status'
-                )
-            return self._call_with_retry(
-                self._pro.stock_basic,
-                exchange='',
-                list_status='L',
-                fields='ts_code,symbol,name,industry,list_date,list_status'
-            )
-        
-        df = _fetch()
+        df = self._query(
+            'stock_basic',
+            exchange='',
+            list_status='L',
+            fields='ts_code,symbol,name,industry,list_date,list_status'
+        )
         
         if df is not None and not df.empty:
-            save_stock_list_cache(df)
+            self._refresh_stock_list(df)
             print(f"    -> API获取股票列表: {len(df)} 只")
         
         return df
     
+    def _refresh_stock_list(self, df: pd.DataFrame):
+        """
+        与缓存中的股票列表对比后写入缓存
+        
+        列表未变化时只刷新文件修改时间；有变化时记录流水，
+        并只让变化股票的缓存失效 (见 _apply_stock_list_diff)。
+        """
+        old = load_stock_list_cache()
+        if old is None or old.empty or 'ts_code' not in old.columns:
+            save_stock_list_cache(df)
+            return
+        
+        diff = diff_stock_lists(old, df)
+        self.stock_list_diff = diff
+        if is_empty_diff(diff):
+            touch_cache('stock_list')
+            print("    -> 股票列表无变化")
+            return
+        
+        self._apply_stock_list_diff(diff)
+        save_stock_list_cache(df)
+        append_stock_list_changes(diff_to_changes(diff, datetime.date.today().strftime('%Y%m%d')))
+        print(f"    -> 股票列表变化: {format_diff(diff)}")
+    
+    def _apply_stock_list_diff(self, diff: Dict[str, pd.DataFrame]):
+        """
+        按股票列表变化失效缓存
+        
+        退市: 删除该股票的市值/财务/复权因子缓存行、日线缓存文件和运行时缓存;
+        新上市: 清除空结果记录 (上市前查询记下的空结果不再成立);
+        更名/行业调整: 行业归属在筛选时直接读取股票列表，不涉及其他缓存。
+        """
+        delisted = diff['delisted']['ts_code'].astype(str).tolist()
+        if delisted:
+            for cache_name in ('market_cap', 'financial_ttm', 'financial_periods', 'adj_factor', 'daily_heads'):
+                drop_cache_rows(cache_name, delisted)
+            delete_daily_cache(delisted)
+            for ts_code in delisted:
+                for namespace in ('daily', 'mv', 'fin', 'adj', 'adjs', 'hsgt', 'mf'):
+                    self._runtime_cache.discard_prefix(f"{namespace}_{ts_code}")
+        
+        for ts_code in diff['listed']['ts_code'].astype(str):
+            self._negative_cache.discard_code(ts_code)
+    
     # ==========================================
     # 市值相关
     # ==========================================
@@ -142,33 +602,35 @@ class TushareClient:
         """
         获取单只股票市值 (亿元)
         """
+        mv = self._cached_market_cap(ts_code)
+        if mv is not None:
+            return mv
+        
+        # 从API获取
+        df = self._query('daily_basic', ts_code=ts_code, fields='total_mv')
+        return self._parse_market_cap(ts_code, df)
+    
+    def _cached_market_cap(self, ts_code: str) -> Optional[float]:
+        """从运行时缓存/文件缓存读取市值，未命中返回None"""
         cache_key = f"mv_{ts_code}"
         
         # 检查运行时缓存
-        if cache_key in self._runtime_cache:
-            return self._runtime_cache[cache_key]
-        
-        # 尝试从缓存批量获取
-        df_cache = load_market_cap_cache()
-        if df_cache is not None:
-            cached = df_cache[df_cache['ts_code'] == ts_code]
-            if not cached.empty:
-                # Tushare返回千元，除以100000得到亿元
-                mv = float(cached.iloc[0]['total_mv']) / 100000
-                self._runtime_cache[cache_key] = mv
-                return mv
+        mv = self._runtime_cache.get(cache_key)
+        if mv is not None:
+            return mv
         
-        # 从API获取
-        def _fetch():
-            if self.use_mock:
-                return self._mock_client.daily_basic(ts_code=ts_code, fields='total_mv')
-            return self._call_with_retry(
-                self._pro.daily_basic,
-                ts_code=ts_code,
-                fields='total_mv'
-            )
+        # 从缓存索引查找 (文件变化时才重建)
+        row = load_market_cap_index().get(ts_code)
+        if row is not None:
+            # Tushare返回千元，除以100000得到亿元
+            mv = float(row['total_mv']) / 100000
+            self._runtime_cache[cache_key] = mv
+            return mv
         
-        df = _fetch()
+        return None
+    
+    def _parse_market_cap(self, ts_code: str, df: Optional[pd.DataFrame]) -> float:
+        """解析 daily_basic 返回的市值"""
         if df is not None and not df.empty:
             # 注意：API返回所有历史数据，需要取最新的一条
             # 按trade_date排序后取最后一行
@@ -176,7 +638,7 @@ class TushareClient:
                 df = df.sort_values('trade_date', ascending=False)
             # Tushare返回千元，除以100000得到亿元
             mv = float(df.iloc[0]['total_mv']) / 100000
-            self._runtime_cache[cache_key] = mv
+            self._runtime_cache[f"mv_{ts_code}"] = mv
             return mv
         
         return 0.0
@@ -195,33 +657,32 @@ class TushareClient:
             save_market_cap_cache(df)
             return df
         
-        # 从API批量获取
-        stocks = self.get_stock_list()
-        if stocks is None:
-            return None
-        
-        market_caps = []
-        codes = stocks['ts_code'].tolist()
-        
-        print(f"    批量获取市值: {len(codes)} 只...")
-        
-        for i in range(0, len(codes), 100):
-            batch = codes[i:i+100]
-            def _fetch_batch():
-                return self._pro.daily_basic(
-                    ts_code=','.join(batch),
-                    fields='ts_code,total_mv'
-                )
-            
-            df = self._call_with_retry(_fetch_batch)
-            if df is not None and not df.empty:
-                market_caps.append(df)
-            
-            if (i // 100) % 5 == 0:
-                print(f"      进度: {min(i + 100, len(codes))}/{len(codes)}")
+        # 最新交易日一次拉取全市场 (截断时自动翻页)，当日数据未发布时取前一交易日
+        fields = 'ts_code,trade_date,total_mv'
+        trade_dates = self.get_trade_dates(**self._recent_date_range(15))
+        df_result = None
+        for trade_date in reversed(trade_dates[-3:]):
+            df = self.query_all('daily_basic', trade_date=trade_date, fields=fields)
+            if df is None:
+                break
+            if not df.empty:
+                df_result = df
+                break
         
-        if market_caps:
-            df_result = pd.concat(market_caps, ignore_index=True)
+        # 回退: 按代码分批拉取最近数据 (截断的批次自动拆分)
+        if df_result is None:
+            stocks = self.get_stock_list()
+            if stocks is None:
+                return None
+            codes = stocks['ts_code'].tolist()
+            print(f"    批量获取市值: {len(codes)} 只...")
+            df_result = self.query_all('daily_basic', split_by='codes', codes=codes, fields=fields,
+                                       **self._recent_date_range(15))
+        
+        if df_result is not None and not df_result.empty:
+            # 每只股票保留最新一条 (缓存索引取首行)
+            df_result = df_result.sort_values('trade_date', ascending=False)
+            df_result = df_result.drop_duplicates(subset=['ts_code']).reset_index(drop=True)
             save_market_cap_cache(df_result)
             print(f"    -> 获取市值: {len(df_result)} 条")
             return df_result
@@ -237,39 +698,47 @@ class TushareClient:
         获取TTM财务数据
         返回: {'roe_ttm': float, 'net_profit_ttm': float, 'revenue_ttm': float}
         """
+        result = self._cached_financial_ttm(ts_code)
+        if result is not None:
+            return result
+        
+        # 从API获取
+        df = self._query(
+            'fina_indicator',
+            ts_code=ts_code,
+            fields='ts_code,report_date,roe,net_profit,revenue'
+        )
+        return self._parse_financial_ttm(ts_code, df)
+    
+    def _cached_financial_ttm(self, ts_code: str) -> Optional[Dict[str, Any]]:
+        """从运行时缓存/文件缓存读取财务数据，未命中返回None"""
         cache_key = f"fin_{ts_code}"
         
         # 检查运行时缓存
-        if cache_key in self._runtime_cache:
-            return self._runtime_cache[cache_key]
+        result = self._runtime_cache.get(cache_key)
+        if result is not None:
+            return result
         
-        # 尝试从缓存批量获取
-        df_cache = load_financial_ttm_cache()
-        if df_cache is not None:
-            cached = df_cache[df_cache['ts_code'] == ts_code]
-            if not cached.empty:
-                row = cached.iloc[0]
-                result = {
-                    'roe_ttm': float(row.get('roe', 0)),
-                    'net_profit_ttm': float(row.get('net_profit', 0)),
-                    'revenue_ttm': float(row.get('revenue', 0)),
-                }
-                self._runtime_cache[cache_key] = result
-                return result
+        # 从缓存索引查找 (文件变化时才重建)
+        row = load_financial_ttm_index().get(ts_code)
+        if row is not None:
+            result = {
+                'roe_ttm': float(row.get('roe', 0)),
+                'net_profit_ttm': float(row.get('net_profit', 0)),
+                'revenue_ttm': float(row.get('revenue', 0)),
+            }
+            self._runtime_cache[cache_key] = result
+            return result
         
-        # 从API获取
-        def _fetch():
-            if self.use_mock:
-                return self._mock_client.fina_indicator(
-                    ts_code=ts_code,
-                    fields='ts_code,report_date,roe,net_profit,revenue'
-                )
-            return self._pro.fina_indicator(
-                ts_code=ts_code,
-                fields='ts_code,report_date,roe,net_profit,revenue'
-            )
+        # 已知无财务数据，直接返回默认值
+        if self.is_known_empty('fina_indicator', ts_code):
+            return self._parse_financial_ttm(ts_code, None)
         
-        df = self._call_with_retry(_fetch)
+        return None
+    
+    def _parse_financial_ttm(self, ts_code: str, df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        """解析 fina_indicator 返回的最新一期财务数据"""
+        cache_key = f"fin_{ts_code}"
         
         if df is not None and not df.empty:
             # 按日期排序，取最新数据
@@ -286,6 +755,9 @@ class TushareClient:
             self._runtime_cache[cache_key] = result
             return result
         
+        if df is not None:
+            self._record_empty('fina_indicator', ts_code)
+        
         # 返回默认值
         result = {
             'roe_ttm': 0.0,
@@ -295,8 +767,13 @@ class TushareClient:
         self._runtime_cache[cache_key] = result
         return result
     
-    def get_all_financial_ttm(self) -> pd.DataFrame:
-        """批量获取所有股票财务数据"""
+    def get_all_financial_ttm(self, max_workers: int = None) -> pd.DataFrame:
+        """
+        批量获取所有股票财务数据
+        
+        Args:
+            max_workers: 并发线程数，默认 API_MAX_WORKERS；为1时串行获取
+        """
         # 尝试从缓存加载
         if is_cache_valid('financial_ttm', 90):
             df = load_financial_ttm_cache()
@@ -309,280 +786,934 @@ class TushareClient:
             save_financial_ttm_cache(df)
             return df
         
+        # 按报告期批量拉取，失败时回退到逐只获取
+        if config.FINA_BULK_MODE:
+            df = self.sync_financial_periods()
+            if df is not None:
+                return df
+        
         stocks = self.get_stock_list()
         if stocks is None:
             return None
         
         financial_data = []
         codes = stocks['ts_code'].tolist()
+        workers = max_workers or config.API_MAX_WORKERS
         
-        print(f"    批量获取财务数据: {len(codes)} 只...")
-        
-        for i, code in enumerate(codes):
-            def _fetch():
-                if self.use_mock:
-                    return self._mock_client.fina_indicator(
-                        ts_code=code,
-                        fields='ts_code,report_date,roe,net_profit,revenue'
-                    )
-                return self._pro.fina_indicator(
-                    ts_code=code,
-                    fields='ts_code,report_date,roe,net_profit,revenue'
-                )
-            
-            df = self._call_with_retry(_fetch)
-            if df is not None and not df.empty:
-                df = df.sort_values('report_date', ascending=False)
-                financial_data.append(df.iloc[0])
-            
-            if (i + 1) % 100 == 0:
-                print(f"      进度: {i + 1}/{len(codes)}")
+        print(f"    批量获取财务数据: {len(codes)} 只 ({workers} 线程)...")
+        
+        def _fetch_latest(code):
+            df = self._query(
+                'fina_indicator',
+                ts_code=code,
+                fields='ts_code,report_date,roe,net_profit,revenue'
+            )
+            if df is None or df.empty:
+                return None
+            return df.sort_values('report_date', ascending=False).iloc[0]
+        
+        if workers <= 1:
+            rows = map(_fetch_latest, codes)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = [executor.submit(_fetch_latest, code) for code in codes]
+            rows = (future.result() for future in as_completed(futures))
+        
+        try:
+            for i, row in enumerate(rows):
+                if row is not None:
+                    financial_data.append(row)
+                
+                if (i + 1) % 100 == 0:
+                    print(f"      进度: {i + 1}/{len(codes)}")
+        finally:
+            if workers > 1:
+                executor.shutdown(wait=True, cancel_futures=True)
         
         if financial_data:
-            df_result = pd.concat(financial_data, ignore_index=True)
+            df_result = pd.DataFrame(financial_data).reset_index(drop=True)
             save_financial_ttm_cache(df_result)
             print(f"    -> 获取财务数据: {len(df_result)} 条")
             return df_result
         
         return None
     
+    def get_financial_by_period(self, period: str, start_date: str = None) -> Optional[pd.DataFrame]:
+        """
+        按报告期分页拉取全市场财务指标 (fina_indicator_vip)
+        
+        Args:
+            period: 报告期 (如 '20250930')
+            start_date: 只拉取该公告日期及之后的记录，用于增量刷新
+        
+        Returns:
+            DataFrame，任意一页失败时返回None
+        """
+        params = {'period': period, 'fields': FINA_BULK_FIELDS}
+        if start_date:
+            params['start_date'] = start_date
+        
+        df = self.query_all('fina_indicator_vip', page_size=config.FINA_PAGE_SIZE, **params)
+        if df is not None and df.empty:
+            return pd.DataFrame(columns=FINA_BULK_FIELDS.split(','))
+        return df
+    
+    @staticmethod
+    def _recent_report_periods(count: int, today: datetime.date = None) -> List[str]:
+        """最近N个已结束的报告期 (降序)"""
+        today = today or datetime.date.today()
+        periods = []
+        year = today.year
+        while len(periods) < count:
+            for month_day in ('1231', '0930', '0630', '0331'):
+                period = f"{year}{month_day}"
+                if period <= today.strftime('%Y%m%d'):
+                    periods.append(period)
+                    if len(periods) == count:
+                        break
+            year -= 1
+        return periods
+    
+    @staticmethod
+    def _report_deadline(period: str) -> str:
+        """报告期的披露截止日"""
+        year = int(period[:4])
+        if period[4:] == '1231':
+            year += 1
+        return f"{year}{REPORT_DEADLINES[period[4:]]}"
+    
+    def sync_financial_periods(self, periods: List[str] = None) -> Optional[pd.DataFrame]:
+        """
+        按报告期同步全市场财务指标并合并到财务缓存
+        
+        每个报告期记录已拉取的最大公告日期，之后只拉取新公告的记录；
+        披露截止日之后已拉取过的报告期不再请求，当天已同步的报告期也跳过。
+        
+        Args:
+            periods: 报告期列表，默认最近 FINA_PERIODS 个
+        
+        Returns:
+            合并后的财务缓存，全部报告期都失败时返回None
+        """
+        periods = periods or self._recent_report_periods(config.FINA_PERIODS)
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        
+        df_meta = load_financial_periods_cache()
+        meta = {}
+        if df_meta is not None and not df_meta.empty:
+            df_meta = df_meta.astype({'period': str, 'max_ann_date': str, 'fetched_at': str})
+            meta = {row['period']: row for row in df_meta.to_dict('records')}
+        
+        frames = []
+        failed = 0
+        for period in periods:
+            record = meta.get(period)
+            if record is not None:
+                if record['fetched_at'] > self._report_deadline(period) or record['fetched_at'] == today:
+                    continue
+            
+            start_date = None
+            if record is not None and record['max_ann_date'] not in ('', 'nan'):
+                start_date = (datetime.datetime.strptime(record['max_ann_date'], '%Y%m%d')
+                              + datetime.timedelta(days=1)).strftime('%Y%m%d')
+            
+            df = self.get_financial_by_period(period, start_date=start_date)
+            if df is None:
+                failed += 1
+                continue
+            
+            max_ann_date = record['max_ann_date'] if record is not None else ''
+            if not df.empty:
+                df = df.astype({'ann_date': str, 'end_date': str})
+                max_ann_date = max(max_ann_date, df['ann_date'].max())
+                frames.append(df)
+            
+            meta[period] = {
+                'period': period,
+                'max_ann_date': max_ann_date,
+                'rows': int(record['rows'] if record is not None else 0) + len(df),
+                'fetched_at': today,
+            }
+            print(f"    -> 报告期 {period}: 新增 {len(df)} 条")
+        
+        if failed == len(periods):
+            return None
+        
+        df_cache = load_financial_ttm_cache()
+        if df_cache is not None and 'end_date' not in df_cache.columns:
+            # 逐只获取模式的旧缓存以 report_date 标识报告期
+            df_cache = df_cache.rename(columns={'report_date': 'end_date'})
+        if frames:
+            if df_cache is not None and not df_cache.empty and 'end_date' in df_cache.columns:
+                frames.insert(0, df_cache)
+            df_cache = pd.concat(frames, ignore_index=True)
+            df_cache = df_cache.astype({'ts_code': str, 'end_date': str, 'ann_date': str})
+            df_cache = df_cache.drop_duplicates(subset=['ts_code', 'end_date'], keep='last')
+            # 每只股票最新报告期排在首行，供 ts_code 索引取用
+            df_cache = df_cache.sort_values(['ts_code', 'end_date'], ascending=[True, False])
+            df_cache = df_cache.reset_index(drop=True)
+            save_financial_ttm_cache(df_cache)
+        
+        save_financial_periods_cache(pd.DataFrame(list(meta.values())))
+        return df_cache
+    
     # ==========================================
     # 复权因子相关
     # ==========================================
     
     def get_adj_factor(self, ts_code: str) -> float:
         """获取复权因子"""
+        factor = self._cached_adj_factor(ts_code)
+        if factor is not None:
+            return factor
+        
+        # 从API获取
+        df = self._query('adj_factor', ts_code=ts_code)
+        return self._parse_adj_factor(ts_code, df)
+    
+    def _cached_adj_factor(self, ts_code: str) -> Optional[float]:
+        """从运行时缓存/文件缓存读取复权因子，未命中返回None"""
         cache_key = f"adj_{ts_code}"
         
-        if cache_key in self._runtime_cache:
-            return self._runtime_cache[cache_key]
+        factor = self._runtime_cache.get(cache_key)
+        if factor is not None:
+            return factor
         
-        # 尝试从缓存批量获取
-        df_cache = load_adj_factor_cache()
-        if df_cache is not None:
-            cached = df_cache[df_cache['ts_code'] == ts_code]
-            if not cached.empty:
-                factor = float(cached.iloc[0]['adj_factor'])
-                self._runtime_cache[cache_key] = factor
-                return factor
+        # 从缓存索引查找 (文件变化时才重建)
+        row = load_adj_factor_index().get(ts_code)
+        if row is not None:
+            factor = float(row['adj_factor'])
+            self._runtime_cache[cache_key] = factor
+            return factor
         
-        # 从API获取
-        def _fetch():
-            if self.use_mock:
-                return self._mock_client.adj_factor(ts_code=ts_code)
-            return self._pro.adj_factor(ts_code=ts_code)
+        if self.is_known_empty('adj_factor', ts_code):
+            return self._parse_adj_factor(ts_code, None)
         
-        df = self._call_with_retry(_fetch)
+        return None
+    
+    def _parse_adj_factor(self, ts_code: str, df: Optional[pd.DataFrame]) -> float:
+        """解析 adj_factor 返回的最新复权因子"""
+        factor = 1.0
         if df is not None and not df.empty:
-            factor = float(df.iloc[-1]['adj_factor'])
-            self._runtime_cache[cache_key] = factor
-            return factor
+            # 接口按日期倒序返回，取 trade_date 最大的一期
+            latest = df.loc[df['trade_date'].astype(str).idxmax()] if 'trade_date' in df.columns else df.iloc[0]
+            factor = float(latest['adj_factor'])
+        elif df is not None:
+            self._record_empty('adj_factor', ts_code)
+        
+        self._runtime_cache[f"adj_{ts_code}"] = factor
+        return factor
+    
+    def get_adj_factor_series(self, ts_code: str) -> pd.DataFrame:
+        """
+        获取复权因子序列 (ts_code, trade_date, adj_factor)
+        
+        复权因子面板已同步时直接切出，否则拉取该股票的完整因子历史
+        """
+        if self._adj_panel is not None and self._adj_panel_range is not None:
+            rows = self._adj_panel_index.get(ts_code)
+            if rows is not None:
+                return expand_frame(self._adj_panel.iloc[rows].reset_index(drop=True))
         
-        self._runtime_cache[cache_key] = 1.0
-        return 1.0
+        df = self._runtime_cache.get(f"adjs_{ts_code}")
+        if df is not None:
+            return df
+        
+        if self.is_known_empty('adj_factor', ts_code):
+            return self._parse_adj_factor_series(ts_code, None)
+        
+        df = self._query('adj_factor', ts_code=ts_code)
+        return self._parse_adj_factor_series(ts_code, df)
+    
+    def _parse_adj_factor_series(self, ts_code: str, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """整理复权因子序列 (按 trade_date 升序)"""
+        if df is None or df.empty:
+            if df is not None:
+                self._record_empty('adj_factor', ts_code)
+            df = pd.DataFrame(columns=['ts_code', 'trade_date', 'adj_factor'])
+        else:
+            df = df[['ts_code', 'trade_date', 'adj_factor']].copy()
+            df['trade_date'] = df['trade_date'].astype(str)
+            df = df.sort_values('trade_date').reset_index(drop=True)
+        
+        self._runtime_cache[f"adjs_{ts_code}"] = df
+        return df
     
     # ==========================================
     # 日线数据相关
     # ==========================================
     
-    def get_daily_data(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    def get_daily_data(self, ts_code: str, start_date: str, end_date: str,
+                       adj: str = None) -> pd.DataFrame:
         """
-        获取日线数据 - 带缓存
+        获取日线数据 - 带缓存，增量同步
         
         Args:
             ts_code: 股票代码 (如 '300274.SZ')
             start_date: 开始日期 (如 '20250101')
             end_date: 结束日期 (如 '20260218')
+            adj: 复权方式，None 不复权 / 'qfq' 前复权 / 'hfq' 后复权
         
         Returns:
             DataFrame with OHLCV data
         """
-        cache_key = f"daily_{ts_code}_{start_date}_{end_date}"
+        if adj:
+            df = self._get_daily_from_panel(ts_code, start_date, end_date, adj=adj)
+            if df is not None:
+                return df
+            df = self.get_daily_data(ts_code, start_date, end_date)
+            return adjust_prices(df, self.get_adj_factor_series(ts_code), how=adj)
         
-        if cache_key in self._runtime_cache:
-            return self._runtime_cache[cache_key]
+        df = self._cached_daily_data(ts_code, start_date, end_date)
+        if df is not None:
+            return df
         
-        # 尝试从缓存加载
-        df_cache = load_daily_cache(ts_code)
-        if df_cache is not None and not df_cache.empty:
-            # 简单检查日期范围
-            if 'trade_date' in df_cache.columns:
-                # 转换日期格式
-                if df_cache['trade_date'].dtype != object:
-                    df_cache['trade_date'] = df_cache['trade_date'].astype(str)
-                df_cache = df_cache[
-                    (df_cache['trade_date'] >= start_date) & 
-                    (df_cache['trade_date'] <= end_date)
-                ]
-                # 如果缓存数据足够，直接返回
-                if len(df_cache) >= 60:
-                    self._runtime_cache[cache_key] = df_cache
-                    return df_cache
+        history, fetch_start = self._daily_sync_plan(ts_code, start_date, end_date)
+        if fetch_start is None:
+            return self._store_daily_data(ts_code, start_date, end_date, history, None)
         
         # 缓存数据不足，从API获取
         if self.use_mock:
-            days = (datetime.datetime.strptime(end_date, '%Y%m%d') - 
-                    datetime.datetime.strptime(start_date, '%Y%m%d')).days
-            df = generate_mock_daily_data(ts_code, min(days, 120))
-            save_daily_cache(ts_code, df)
-            self._runtime_cache[cache_key] = df
+            return self._mock_daily_data(ts_code, start_date, end_date)
+        
+        df_new = self._query('daily', ts_code=ts_code, start_date=fetch_start, end_date=end_date, fields=DAILY_FIELDS)
+        if fetch_start == start_date:
+            self._record_daily_head(ts_code, start_date, end_date, df_new)
+        return self._store_daily_data(ts_code, start_date, end_date, history, df_new)
+    
+    def _cached_daily_data(self, ts_code: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """从运行时缓存/日线面板读取日线，未命中返回None"""
+        cache_key = f"daily_{ts_code}_{start_date}_{end_date}"
+        
+        df = self._runtime_cache.get(cache_key)
+        if df is not None:
             return df
         
-        def _fetch():
-            return self._pro.daily(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date
-            )
+        # 优先从全市场日线面板读取
+        df_panel = self._get_daily_from_panel(ts_code, start_date, end_date)
+        if df_panel is not None:
+            self._runtime_cache[cache_key] = df_panel
+            return df_panel
         
-        df = self._call_with_retry(_fetch)
-        if df is not None and not df.empty:
-            self._runtime_cache[cache_key] = df
-            # 缓存全部数据
-            save_daily_cache(ts_code, df)
+        return None
+    
+    @staticmethod
+    def _min_daily_bars() -> int:
+        """指标计算所需的最少K线数 - MA周期与MACD预热取大"""
+        return max(config.MA_PERIOD, config.MACD_SLOW + config.MACD_SIGNAL)
+    
+    def _daily_sync_plan(self, ts_code: str, start_date: str, end_date: str) -> tuple:
+        """
+        日线增量同步计划
+        
+        只读取请求区间内的缓存 (过滤在存储内完成)，按最后一个 trade_date 只拉取之后的新交易日；
+        缓存未覆盖区间起点时整段拉取，保证均线和MACD预热所需的历史。
+        区间内上市、或区间起点停牌的股票，起点按其在区间内应有的第一根K线判断 (见 _daily_head)。
+        
+        Returns:
+            (区间内的缓存历史, 拉取起始日期)，拉取起始日期为None表示缓存已是最新
+        """
+        history = load_daily_cache(ts_code, start_date=start_date, end_date=end_date)
+        if history is None or history.empty or 'trade_date' not in history.columns:
+            # 已知无日线 (停牌/退市/未上市)，不再请求
+            if self.is_known_empty('daily', ts_code):
+                return None, None
+            return None, start_date
+        
+        history['trade_date'] = history['trade_date'].astype(str)
+        first_cached = history['trade_date'].min()
+        last_cached = history['trade_date'].max()
+        
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        if trade_dates:
+            head_covered = first_cached <= self._daily_head(ts_code, trade_dates)
         else:
-            df = pd.DataFrame()
+            in_range = history[(history['trade_date'] >= start_date) & (history['trade_date'] <= end_date)]
+            head_covered = len(in_range) >= self._min_daily_bars()
+        
+        if not head_covered:
+            return history, start_date
+        
+        expected_last = trade_dates[-1] if trade_dates else end_date
+        if last_cached >= expected_last:
+            return history, None
+        
+        next_day = (datetime.datetime.strptime(last_cached, '%Y%m%d') + datetime.timedelta(days=1)).strftime('%Y%m%d')
+        return history, max(next_day, start_date)
+    
+    @staticmethod
+    def _daily_head(ts_code: str, trade_dates: List[str]) -> str:
+        """
+        股票在区间内应有的第一根K线日期
+        
+        默认为区间第一个交易日；区间内上市的股票取上市后的第一个交易日；
+        daily_heads 中记录过 "从 checked_from 起第一根K线为 first_date" (如区间起点停牌) 时取 first_date。
+        """
+        head = trade_dates[0]
+        
+        row = load_stock_list_index().get(ts_code)
+        list_date = str(row.get('list_date', '')) if row else ''
+        if list_date > head:
+            head = next((d for d in trade_dates if d >= list_date), list_date)
+        
+        marker = load_cache_index('daily_heads').get(ts_code)
+        if marker and str(marker['checked_from']) <= trade_dates[0]:
+            head = max(head, str(marker['first_date']))
+        return head
+    
+    def _record_daily_head(self, ts_code: str, start_date: str, end_date: str, df_new: Optional[pd.DataFrame]):
+        """
+        整段拉取后第一根K线晚于应有的起点 (如区间起点停牌) 时记入 daily_heads，
+        之后同一区间起点只拉取末尾的新交易日，不再整段重拉
         
+        只有股票列表无法解释的情况才会写入，写入次数很少，直接 upsert。
+        """
+        if df_new is None or df_new.empty:
+            return
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        if not trade_dates:
+            return
+        first_date = df_new['trade_date'].astype(str).min()
+        if first_date > self._daily_head(ts_code, trade_dates):
+            upsert_cache('daily_heads', pd.DataFrame([{
+                'ts_code': ts_code, 'checked_from': start_date, 'first_date': first_date,
+            }]))
+    
+    def _mock_daily_data(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Mock模式生成日线数据"""
+        days = (datetime.datetime.strptime(end_date, '%Y%m%d') - 
+                datetime.datetime.strptime(start_date, '%Y%m%d')).days
+        df = generate_mock_daily_data(ts_code, min(days, 120))
+        save_daily_cache(ts_code, df)
+        self._runtime_cache[f"daily_{ts_code}_{start_date}_{end_date}"] = df
         return df
     
+    def _store_daily_data(self, ts_code: str, start_date: str, end_date: str,
+                          history: Optional[pd.DataFrame], df_new: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """合并缓存历史与新拉取的日线 (按 trade_date 去重)，返回请求区间"""
+        if df_new is not None and not df_new.empty:
+            df_new = df_new.copy()
+            df_new['trade_date'] = df_new['trade_date'].astype(str)
+            # 只写入新拉取的日线，存储按 (ts_code, trade_date) 去重
+            save_daily_cache(ts_code, compact_frame(df_new, category_cols=()))
+            if history is not None and not history.empty:
+                df_new = pd.concat([history, df_new], ignore_index=True)
+            merged = df_new.drop_duplicates(subset=['trade_date'], keep='last')
+            merged = compact_frame(merged.sort_values('trade_date').reset_index(drop=True), category_cols=())
+        elif history is not None:
+            merged = history
+        else:
+            if df_new is not None:
+                self._record_empty('daily', ts_code)
+            return pd.DataFrame()
+        
+        df = merged[
+            (merged['trade_date'] >= start_date) & 
+            (merged['trade_date'] <= end_date)
+        ].reset_index(drop=True)
+        self._runtime_cache[f"daily_{ts_code}_{start_date}_{end_date}"] = df
+        return df
+    
+    # ==========================================
+    # 全市场日线面板 (按交易日批量获取)
+    # ==========================================
+    
+    def get_trade_dates(self, start_date: str, end_date: str) -> List[str]:
+        """获取区间内的交易日列表 (升序)"""
+        cache_key = f"cal_{start_date}_{end_date}"
+        
+        dates = self._runtime_cache.get(cache_key)
+        if dates is not None:
+            return dates
+        
+        df = self._query(
+            'trade_cal',
+            exchange='SSE',
+            start_date=start_date,
+            end_date=end_date,
+            is_open='1'
+        )
+        
+        if df is None or df.empty:
+            return []
+        
+        if 'is_open' in df.columns:
+            df = df[df['is_open'].astype(int) == 1]
+        dates = sorted(df['cal_date'].astype(str).tolist())
+        self._runtime_cache[cache_key] = dates
+        return dates
+    
+    def get_daily_by_trade_date(self, trade_date: str) -> pd.DataFrame:
+        """获取单个交易日的全市场日线 - 通常一次API调用，返回行数达到上限时自动翻页"""
+        return self.query_all('daily', trade_date=trade_date, fields=DAILY_FIELDS)
+    
+    def sync_daily_panel(self, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """
+        同步全市场日线面板
+        
+        只拉取面板中缺失的交易日，每个交易日一次 daily(trade_date=...) 调用，
+        日常刷新只需一次调用即可覆盖全市场。
+        
+        Args:
+            start_date: 开始日期 (如 '20250101')
+            end_date: 结束日期 (如 '20260218')
+        
+        Returns:
+            全市场日线面板 DataFrame
+        """
+        panel = self._daily_panel
+        if panel is None:
+            panel = load_daily_panel_cache()
+        
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        if not trade_dates:
+            return panel
+        
+        panel, have, changed = self._fill_panel(panel, trade_dates, self.get_daily_by_trade_date, '日线')
+        if changed:
+            save_daily_panel_cache(panel)
+        
+        # 之前逐只获取的日线缓冲写入分区存储，不等到进程退出
+        flush_daily_store()
+        
+        if panel is None or panel.empty:
+            return panel
+        
+        self._set_daily_panel(panel)
+        if config.BAR_ARRAYS_ENABLED:
+            self._sync_bar_arrays(rebuild=changed)
+        
+        # 末尾交易日尚未发布数据时视为已覆盖，中间有缺口则不使用面板
+        gaps = self._panel_gaps(trade_dates, have)
+        if gaps:
+            print(f"    ⚠️ 日线面板缺少 {len(gaps)} 个交易日，回退到逐只获取")
+            self._daily_panel_range = None
+        else:
+            self._daily_panel_range = (start_date, end_date)
+        
+        return panel
+    
+    def _fill_panel(self, panel: Optional[pd.DataFrame], trade_dates: List[str],
+                    fetch, label: str) -> tuple:
+        """
+        按交易日补齐全市场面板 - 只对缺失的交易日调用 fetch(trade_date)
+        
+        Returns:
+            (面板, 已有数据的交易日集合, 是否拉取到新数据)
+        """
+        if panel is not None and not panel.empty:
+            panel = panel.copy()
+            panel['trade_date'] = panel['trade_date'].astype(str)
+        
+        have = set(panel['trade_date'].unique()) if panel is not None and not panel.empty else set()
+        missing = [d for d in trade_dates if d not in have]
+        
+        frames = []
+        if missing:
+            print(f"    同步全市场{label}: {len(missing)} 个交易日...")
+        for i, trade_date in enumerate(missing):
+            df = fetch(trade_date)
+            if df is not None and not df.empty:
+                df = df.copy()
+                df['trade_date'] = df['trade_date'].astype(str)
+                frames.append(df)
+                have.add(trade_date)
+            
+            if (i + 1) % 20 == 0:
+                print(f"      进度: {i + 1}/{len(missing)}")
+        
+        if not frames:
+            return panel, have, False
+        
+        if panel is not None and not panel.empty:
+            frames.insert(0, panel)
+        panel = pd.concat(frames, ignore_index=True)
+        panel = panel.drop_duplicates(subset=['ts_code', 'trade_date'], keep='last')
+        
+        # 只保留最近 DAILY_PANEL_DAYS 天
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=config.DAILY_PANEL_DAYS)).strftime('%Y%m%d')
+        panel = panel[panel['trade_date'] >= cutoff]
+        panel = panel.sort_values(['ts_code', 'trade_date']).reset_index(drop=True)
+        return panel, have, True
+    
+    @staticmethod
+    def _panel_gaps(trade_dates: List[str], have: set) -> List[str]:
+        """面板中间缺失的交易日 (最新数据之后的交易日视为尚未发布)"""
+        latest = max(have) if have else ''
+        return [d for d in trade_dates if d not in have and d < latest]
+    
+    def _set_daily_panel(self, panel: pd.DataFrame):
+        """设置日线面板 (压缩数据类型) 并重建 ts_code 索引"""
+        self._daily_panel = panel = compact_frame(panel, date_cols=('trade_date',))
+        self._daily_panel_index = panel.groupby('ts_code', sort=False).indices
+        self._adjusted_panels.clear()
+        self._bar_arrays = None
+    
+    def _sync_bar_arrays(self, rebuild: bool = False):
+        """面板有变化或内存映射数组与面板不一致时重建数组，之后单只股票日线从数组读取"""
+        arrays = bar_arrays()
+        fields = [col for col in self._daily_panel.columns if col != 'ts_code']
+        if rebuild or arrays.stats()['rows'] != len(self._daily_panel) or not set(fields) <= set(arrays.columns()):
+            save_bar_arrays(self._daily_panel)
+        # BAR_ARRAY_FIELDS 未包含面板的全部列时仍从面板读取
+        if set(fields) <= set(arrays.columns()):
+            self._bar_arrays = arrays
+            self._bar_array_fields = fields
+    
+    def _get_daily_from_panel(self, ts_code: str, start_date: str, end_date: str,
+                              adj: str = None) -> Optional[pd.DataFrame]:
+        """
+        从日线面板切出单只股票数据，面板未覆盖该区间时返回None
+        
+        adj 不为空时从复权后的面板切出 (复权面板与原始面板行顺序一致，共用索引)
+        """
+        if self._daily_panel is None or self._daily_panel_range is None:
+            return None
+        
+        panel_start, panel_end = self._daily_panel_range
+        if start_date < panel_start or end_date > panel_end:
+            return None
+        
+        if adj and not self._adj_panel_covers(start_date, end_date):
+            return None
+        
+        rows = self._daily_panel_index.get(ts_code)
+        if rows is None:
+            return pd.DataFrame()
+        
+        if self._bar_arrays is not None:
+            return self._get_daily_from_arrays(ts_code, start_date, end_date, adj)
+        
+        panel = self._get_adjusted_panel(adj) if adj else self._daily_panel
+        df = panel.iloc[rows]
+        df = df[(df['trade_date'] >= int(start_date)) & (df['trade_date'] <= int(end_date))]
+        return expand_frame(df.reset_index(drop=True))
+    
+    def _get_daily_from_arrays(self, ts_code: str, start_date: str, end_date: str,
+                               adj: str = None) -> pd.DataFrame:
+        """
+        从内存映射数组切出单只股票数据 (二分定位区间，不复权的数值列直接引用映射)
+        
+        adj 不为空时只对该股票复权，不生成全市场复权面板；结果与从面板切出的一致
+        """
+        arrays = self._bar_arrays.stock(ts_code, self._bar_array_fields, start_date, end_date)
+        if arrays is None:
+            return pd.DataFrame()
+        
+        dates = arrays['trade_date']
+        ratio = None
+        rows = self._adj_panel_index.get(ts_code) if adj else None
+        if rows is not None and len(dates):
+            factors = self._adj_panel.iloc[rows]
+            ratio = adj_ratio(dates, factors['trade_date'].to_numpy(), factors['adj_factor'].to_numpy(), how=adj)
+        
+        dtypes = self._daily_panel.dtypes
+        data = {}
+        for col in self._daily_panel.columns:
+            if col == 'ts_code':
+                data[col] = np.full(len(dates), ts_code, dtype=object)
+            elif col == 'trade_date':
+                data[col] = dates.astype(str)
+            elif ratio is not None and col in PRICE_COLUMNS:
+                data[col] = (arrays[col] * ratio).astype(np.float32)
+            else:
+                # 数组中数值列均为 float32，面板中的整数列还原类型
+                values = arrays[col]
+                data[col] = values if values.dtype == dtypes[col] else values.astype(dtypes[col])
+        return pd.DataFrame(data, copy=False)
+    
+    def _adj_panel_covers(self, start_date: str, end_date: str) -> bool:
+        """复权因子面板是否覆盖该区间"""
+        if self._adj_panel is None or self._adj_panel_range is None:
+            return False
+        panel_start, panel_end = self._adj_panel_range
+        return panel_start <= start_date and end_date <= panel_end
+    
+    def _get_adjusted_panel(self, adj: str) -> pd.DataFrame:
+        """全市场复权日线 - 整个面板一次向量化复权，结果按复权方式缓存"""
+        if adj not in self._adjusted_panels:
+            adjusted = adjust_prices(self._daily_panel, self._adj_panel, how=adj)
+            self._adjusted_panels[adj] = compact_frame(adjusted, date_cols=('trade_date',))
+        return self._adjusted_panels[adj]
+    
+    # ==========================================
+    # 全市场复权因子面板 (按交易日批量获取)
+    # ==========================================
+    
+    def get_adj_factor_by_trade_date(self, trade_date: str) -> pd.DataFrame:
+        """获取单个交易日的全市场复权因子 (截断时自动翻页)"""
+        return self.query_all('adj_factor', trade_date=trade_date)
+    
+    def sync_adj_factor_panel(self, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """
+        同步全市场复权因子面板
+        
+        与日线面板相同，每个交易日一次 adj_factor(trade_date=...) 调用，
+        只拉取缺失的交易日。面板覆盖后，前/后复权按每根K线当日的因子计算。
+        
+        Args:
+            start_date: 开始日期 (如 '20250101')
+            end_date: 结束日期 (如 '20260218')
+        
+        Returns:
+            全市场复权因子面板 DataFrame (ts_code, trade_date, adj_factor)
+        """
+        panel = self._adj_panel
+        if panel is None:
+            panel = load_adj_factor_panel_cache()
+        
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        if not trade_dates:
+            return panel
+        
+        panel, have, changed = self._fill_panel(
+            panel, trade_dates, self.get_adj_factor_by_trade_date, '复权因子'
+        )
+        if changed:
+            save_adj_factor_panel_cache(panel)
+        
+        if panel is None or panel.empty:
+            return panel
+        
+        self._set_adj_panel(panel)
+        
+        gaps = self._panel_gaps(trade_dates, have)
+        if gaps:
+            print(f"    ⚠️ 复权因子面板缺少 {len(gaps)} 个交易日，回退到逐只获取")
+            self._adj_panel_range = None
+        else:
+            self._adj_panel_range = (start_date, end_date)
+        
+        return panel
+    
+    def _set_adj_panel(self, panel: pd.DataFrame):
+        """设置复权因子面板 (压缩数据类型) 并重建 ts_code 索引"""
+        self._adj_panel = panel = compact_frame(panel, date_cols=('trade_date',))
+        self._adj_panel_index = panel.groupby('ts_code', sort=False).indices
+        self._adjusted_panels.clear()
+    
     # ==========================================
     # 行业RPS相关
     # ==========================================
     
     def get_industry_rps(self) -> pd.DataFrame:
-        """获取行业RPS数据"""
-        # 尝试从缓存加载
+        """
+        获取行业RPS数据
+        
+        申万一级行业指数日线按交易日批量同步为面板 (每个交易日一次 sw_daily 调用)，
+        一次计算所有行业的多周期涨幅 (ret_N) 与百分位RPS (rps_N)；
+        rps 列为主周期 RPS_DAYS 的百分位，按 rps 降序排列。
+        """
+        # 尝试从缓存加载 (旧格式缓存没有多周期涨幅，需重新计算)
         if is_cache_valid('industry_rps', 1):
             df = load_industry_rps_cache()
-            if df is not None and not df.empty:
+            if df is not None and not df.empty and f'ret_{config.RPS_DAYS}' in df.columns:
                 print(f"    -> 使用行业RPS缓存")
                 return df
         
         if self.use_mock:
-            df = generate_mock_industry_rps()
+            df = calculate_rps(generate_mock_industry_rps())
+            df = df.sort_values('rps', ascending=False).reset_index(drop=True)
             save_industry_rps_cache(df)
             return df
         
         # 从API获取申万行业列表 - 使用 index_classify
-        def _fetch_sw():
-            if self.use_mock:
-                return self._mock_client.index_classify()
-            return self._pro.index_classify()
-        
-        industry_list = self._call_with_retry(_fetch_sw)
+        industry_list = self._query('index_classify')
         if industry_list is None or industry_list.empty:
             return None
         
-        industry_rps = []
+        # 只处理一级行业
+        if 'level' in industry_list.columns:
+            industry_list = industry_list[industry_list['level'] == 'L1']
+        industry_list = industry_list[['index_code', 'industry_name']].drop_duplicates('index_code')
         
-        # 计算每个行业的RPS
-        for _, ind in industry_list.iterrows():
-            index_code = ind['index_code']
-            industry_name = ind['industry_name']
-            
-            # 只处理一级行业
-            if ind.get('level') != 'L1':
-                continue
-            
-            # 获取行业指数数据 - 使用 sw_daily 接口
-            start_date = (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y%m%d')
-            
-            def _fetch_idx():
-                if self.use_mock:
-                    return self._mock_client.sw_daily(index_code=index_code, start_date=start_date)
-                return self._pro.sw_daily(index_code=index_code, start_date=start_date)
-            
-            df_ind = self._call_with_retry(_fetch_idx)
-            
-            if df_ind is not None and len(df_ind) >= config.RPS_DAYS:
-                df_ind = df_ind.sort_values('trade_date')
-                recent = df_ind.tail(config.RPS_DAYS)
-                if len(recent) >= 2:
-                    rps = (recent['close'].iloc[-1] - recent['close'].iloc[0]) / recent['close'].iloc[0] * 100
-                    industry_rps.append({
-                        'industry': industry_name,
-                        'rps': rps,
-                        'code': index_code
-                    })
-        
-        if industry_rps:
-            df_rps = pd.DataFrame(industry_rps)
-            df_rps = df_rps.sort_values('rps', ascending=False).reset_index(drop=True)
-            save_industry_rps_cache(df_rps)
-            return df_rps
+        panel = self.sync_sw_daily_panel()
+        if panel is None or panel.empty:
+            return None
         
-        return None
+        panel = panel[panel['ts_code'].isin(industry_list['index_code'])]
+        returns = calculate_period_returns(panel)
+        if returns.empty:
+            return None
+        
+        df_rps = industry_list.merge(returns, left_on='index_code', right_index=True)
+        df_rps = df_rps.rename(columns={'industry_name': 'industry', 'index_code': 'code'})
+        df_rps = df_rps.dropna(subset=[f'ret_{config.RPS_DAYS}'])
+        if df_rps.empty:
+            return None
+        
+        df_rps = calculate_rps(df_rps)
+        df_rps = df_rps.sort_values('rps', ascending=False).reset_index(drop=True)
+        save_industry_rps_cache(df_rps)
+        return df_rps
+    
+    def sync_sw_daily_panel(self) -> Optional[pd.DataFrame]:
+        """
+        同步申万行业指数日线面板
+        
+        覆盖最长周期所需的交易日，只拉取缺失的交易日 (sw_daily(trade_date=...) 返回全部行业指数)
+        """
+        days = int(max(config.RPS_WINDOWS) * 1.5) + 15  # 日历天数，覆盖最长周期 + 节假日
+        date_range = self._recent_date_range(days)
+        trade_dates = self.get_trade_dates(date_range['start_date'], date_range['end_date'])
+        
+        panel = load_sw_daily_panel_cache()
+        if not trade_dates:
+            return panel
+        
+        panel, have, changed = self._fill_panel(
+            panel, trade_dates, lambda d: self._query('sw_daily', trade_date=d), '行业指数'
+        )
+        if changed:
+            save_sw_daily_panel_cache(panel)
+        
+        gaps = self._panel_gaps(trade_dates, have)
+        if gaps:
+            print(f"    ⚠️ 行业指数面板缺少 {len(gaps)} 个交易日")
+        
+        return panel
     
     # ==========================================
     # 资金流向相关
     # ==========================================
     
     def get_northbound_funds(self, ts_code: str) -> Dict[str, Any]:
-        """获取北向资金数据"""
+        """获取北向资金数据 - 资金流向面板已同步时不发起请求"""
+        if self._northbound_flow is not None:
+            return dict(self._northbound_flow)
+        
         if self.use_mock:
             return generate_mock_northbound_funds(ts_code)
         
-        end_date = datetime.datetime.now().strftime('%Y%m%d')
-        start_date = (datetime.datetime.now() - datetime.timedelta(days=10)).strftime('%Y%m%d')
-        
-        def _fetch():
-            return self._pro.moneyflow_hsgt(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date
-            )
-        
-        df = self._call_with_retry(_fetch)
-        
+        cache_key = f"hsgt_{ts_code}"
+        result = self._runtime_cache.get(cache_key)
+        if result is None:
+            df = self._query('moneyflow_hsgt', ts_code=ts_code, **self._recent_date_range(10))
+            result = self._runtime_cache[cache_key] = self._parse_northbound_funds(df)
+        return result
+    
+    def _recent_date_range(self, days: int) -> Dict[str, str]:
+        """最近N天的 start_date/end_date 参数"""
+        now = datetime.datetime.now()
+        return {
+            'start_date': (now - datetime.timedelta(days=days)).strftime('%Y%m%d'),
+            'end_date': now.strftime('%Y%m%d'),
+        }
+    
+    @staticmethod
+    def _flow_value_column(df: pd.DataFrame, *candidates: str) -> Optional[str]:
+        """资金流向的净流入字段 (兼容接口字段与旧的 net_inflow)"""
+        for col in candidates + ('net_inflow',):
+            if col in df.columns:
+                return col
+        return None
+    
+    def _parse_northbound_funds(self, df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        """解析 moneyflow_hsgt 返回的北向资金"""
         if df is not None and not df.empty:
-            # 计算5日净流入
-            net_inflow = df.tail(5)['net_inflow'].sum() if 'net_inflow' in df.columns else 0
-            return {
-                'total_net_inflow': float(net_inflow) if not pd.isna(net_inflow) else 0,
-                'consecutive_days': self._count_consecutive_days(df),
-            }
+            col = self._flow_value_column(df, 'north_money')
+            if col is not None:
+                factors = calculate_flow_factors(df.assign(_all=''), col, key='_all')
+                return {
+                    'total_net_inflow': float(factors['net_inflow'].iloc[0]),
+                    'consecutive_days': int(factors['consecutive_days'].iloc[0]),
+                }
         
         return {'total_net_inflow': 0, 'consecutive_days': 0}
     
-    def _count_consecutive_days(self, df: pd.DataFrame) -> int:
-        """计算北向资金连续净买入天数"""
-        if 'net_inflow' not in df.columns:
-            return 0
-        
-        consecutive = 0
-        for _, row in df.tail(5).iterrows():
-            if row['net_inflow'] > 0:
-                consecutive += 1
-            else:
-                break
-        
-        return consecutive
-    
     def get_main_funds(self, ts_code: str) -> Dict[str, Any]:
-        """获取主力资金数据"""
+        """获取主力资金数据 - 资金流向面板已同步时不发起请求"""
+        if self._main_fund_factors is not None:
+            if ts_code in self._main_fund_factors.index:
+                return {'net_inflow_5d': float(self._main_fund_factors.at[ts_code, 'net_inflow'])}
+            return {'net_inflow_5d': 0}
+        
         if self.use_mock:
             return generate_mock_main_funds(ts_code)
         
-        end_date = datetime.datetime.now().strftime('%Y%m%d')
-        start_date = (datetime.datetime.now() - datetime.timedelta(days=5)).strftime('%Y%m%d')
-        
-        def _fetch():
-            return self._pro.moneyflow(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date
-            )
-        
-        df = self._call_with_retry(_fetch)
-        
+        cache_key = f"mf_{ts_code}"
+        result = self._runtime_cache.get(cache_key)
+        if result is None:
+            df = self._query('moneyflow', ts_code=ts_code, **self._recent_date_range(5))
+            result = self._runtime_cache[cache_key] = self._parse_main_funds(df)
+        return result
+    
+    def _parse_main_funds(self, df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        """解析 moneyflow 返回的主力资金"""
         if df is not None and not df.empty:
-            net_inflow = df['net_inflow'].sum() if 'net_inflow' in df.columns else 0
+            col = self._flow_value_column(df, 'net_mf_amount')
+            net_inflow = df[col].sum() if col is not None else 0
             return {
                 'net_inflow_5d': float(net_inflow) if not pd.isna(net_inflow) else 0,
             }
         
         return {'net_inflow_5d': 0}
-
+    
+    # ==========================================
+    # 全市场资金流向面板 (按交易日批量获取)
+    # ==========================================
+    
+    def get_moneyflow_by_trade_date(self, trade_date: str) -> pd.DataFrame:
+        """获取单个交易日的全市场个股资金流向 (截断时自动翻页)"""
+        return self.query_all('moneyflow', trade_date=trade_date, fields=MONEYFLOW_FIELDS)
+    
+    def sync_fund_flows(self, days: int = None) -> bool:
+        """
+        同步资金流向面板并计算全市场资金因子
+        
+        - 主力资金: 每个交易日一次 moneyflow(trade_date=...) 调用，只拉取缺失的交易日
+        - 北向资金: moneyflow_hsgt 为市场级数据，整个区间一次调用，所有股票共用
+        
+        同步成功后 get_main_funds / get_northbound_funds 直接读取计算结果，不再逐只请求。
+        
+        Args:
+            days: 同步最近N天，默认 FUND_FLOW_SYNC_DAYS
+        
+        Returns:
+            主力资金面板是否完整覆盖
+        """
+        date_range = self._recent_date_range(days or config.FUND_FLOW_SYNC_DAYS)
+        start_date, end_date = date_range['start_date'], date_range['end_date']
+        
+        # 北向资金 (市场级)
+        df_hsgt = self._query('moneyflow_hsgt', start_date=start_date, end_date=end_date)
+        if df_hsgt is not None and not df_hsgt.empty:
+            save_northbound_flow_cache(df_hsgt)
+        else:
+            df_hsgt = load_northbound_flow_cache()
+        if df_hsgt is not None and not df_hsgt.empty:
+            df_hsgt = df_hsgt.astype({'trade_date': str})
+            self._northbound_flow = self._parse_northbound_funds(df_hsgt[df_hsgt['trade_date'] <= end_date])
+        
+        # 主力资金 (个股)
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        if not trade_dates:
+            return False
+        
+        panel = self._moneyflow_panel
+        if panel is None:
+            panel = load_moneyflow_panel_cache()
+        
+        panel, have, changed = self._fill_panel(
+            panel, trade_dates, self.get_moneyflow_by_trade_date, '资金流向'
+        )
+        if changed:
+            save_moneyflow_panel_cache(panel)
+        
+        if panel is None or panel.empty:
+            return False
+        self._moneyflow_panel = panel = compact_frame(panel)
+        
+        gaps = self._panel_gaps(trade_dates, have)
+        if gaps:
+            print(f"    ⚠️ 资金流向面板缺少 {len(gaps)} 个交易日，回退到逐只获取")
+            self._main_fund_factors = None
+            return False
+        
+        in_range = panel[panel['trade_date'] <= end_date]
+        col = self._flow_value_column(in_range, 'net_mf_amount')
+        self._main_fund_factors = calculate_flow_factors(in_range, col)
+        return True
 
 # 全局客户端实例
 _client: Optional[TushareClient] = None
@@ -597,6 +1728,8 @@ def get_client(use_mock: bool = False) -> TushareClient:
 
 
 def reset_client():
-    """重置客户端"""
+    """重置客户端 (先写入旧客户端尚未落盘的缓存)"""
     global _client
+    if _client is not None:
+        _client.flush()
     _client = None
@@ -8,6 +8,44 @@ TUSHARE_TOKEN = "82e556132679ef72ee42217682fa809a68c2d32a8d50d0df9b87d0f37384"
 TUSHARE_API_URL = "http://lianghua.nanyangqiankun.top"
 API_TIMEOUT = 10  # 秒
 API_RETRY_TIMES = 3
+API_MAX_WORKERS = 8  # 并发拉取线程数
+API_POOLED_TRANSPORT = True  # 使用连接池传输层 (keep-alive)，需要 requests
+API_POOL_SIZE = 16  # 连接池大小，应不小于 API_MAX_WORKERS
+API_RECORD_DIR = None  # 录制目录，设置后接口响应写入该目录 (供 api/replay.py 替身服务回放)
+
+# 接口每分钟调用上限 (令牌桶限流)，未列出的接口使用 default
+API_RATE_LIMITS = {
+    'default': 500,
+    'fina_indicator': 200,
+}
+
+# 接口单次返回的最大行数 (达到上限视为截断，自动拆分请求)，未列出的接口使用 default
+API_ROW_LIMITS = {
+    'default': 5000,
+    'daily': 6000,
+    'daily_basic': 6000,
+    'moneyflow': 6000,
+    'adj_factor': 6000,
+}
+
+# 每次调用消耗的积分 (配额统计)，未列出的接口使用 default
+API_POINT_COSTS = {
+    'default': 1,
+}
+API_POINTS_PER_MINUTE = None  # 所有接口每分钟积分上限，None 表示不限制
+
+# 重试与熔断
+API_BACKOFF_BASE = 1.0  # 退避基数 (秒)，实际等待在 [0, base * 2^n] 内随机
+API_BACKOFF_MAX = 30.0  # 单次退避上限 (秒)
+API_THROTTLE_WAIT = 60.0  # 服务端限流且未给出 Retry-After 时暂停的秒数
+API_BREAKER_THRESHOLD = 5  # 接口连续失败N次后熔断
+API_BREAKER_COOLDOWN = 60.0  # 熔断冷却时间 (秒)，之后放行一次试探请求
+
+# 对冲请求: 请求超过该接口 p95 延迟仍未返回时再发一个相同请求，取先返回的结果
+API_HEDGING = False
+API_HEDGE_QUANTILE = 0.95  # 触发对冲的延迟分位数
+API_HEDGE_MIN_SAMPLES = 20  # 接口延迟样本数不足时不对冲
+API_HEDGE_MAX_RATIO = 0.05  # 额外请求不超过请求总数的5%
 
 # ==========================================
 # 股票池筛选配置
@@ -26,6 +64,7 @@ MIN_NET_PROFIT_TTM = 0  # 扣非净利润(TTM) > 0 (单位: 元)
 # ==========================================
 RPS_THRESHOLD = 85  # RPS > 85
 RPS_DAYS = 20  # RPS计算周期
+RPS_WINDOWS = [5, 20, 60]  # 多周期涨幅 (交易日)，RPS_DAYS 为主周期，需包含在内
 TOP_N_INDUSTRIES = 5  # 选取前N个强势行业
 
 # ==========================================
@@ -89,6 +128,55 @@ CACHE_EXPIRY = {
     'daily_data': 1,  # 日线数据1天
 }
 
+# 缓存文件格式: parquet / feather / csv (未安装 pyarrow 时回退到 csv)
+CACHE_FORMAT = 'parquet'
+
+# 日线分区存储: 按月 (month) 或按年 (year) 分区；缓冲行数达到 FLUSH_ROWS 时写入增量文件，
+# 分区增量文件数达到 MAX_DELTAS 时合并
+DAILY_STORE_PARTITION = 'month'
+DAILY_STORE_FLUSH_ROWS = 50000
+DAILY_STORE_MAX_DELTAS = 8
+
+# 日线内存映射数组 (bar_arrays/): 同步全市场日线面板后重建，Step 4 的单只股票日线从中读取，回测与多进程扫描零拷贝读取
+BAR_ARRAYS_ENABLED = True
+BAR_ARRAY_FIELDS = ['open', 'high', 'low', 'close', 'vol']
+
+# 空结果缓存: 接口对某只股票返回空数据时记录原因，过期前不再请求 (天)
+NEGATIVE_CACHE_EXPIRY = {
+    'fina_indicator': {'new_listing': 7, 'delisted': 180, 'no_data': 30},
+    'daily': {'new_listing': 1, 'suspended': 1, 'delisted': 180, 'no_data': 1},
+    'adj_factor': {'new_listing': 1, 'delisted': 180, 'no_data': 7},
+}
+NEW_LISTING_DAYS = 90  # 上市不足N天的股票空结果原因记为 new_listing
+NEGATIVE_CACHE_FLUSH_EVERY = 200  # 空结果记录每累计N条变化写入一次文件，扫描结束时写入剩余部分
+
+# 运行时缓存 (进程内)：容量上限，及key命名空间对应的 CACHE_EXPIRY 缓存类型
+RUNTIME_CACHE_MAX_MB = 512
+RUNTIME_CACHE_NAMESPACES = {
+    'daily': 'daily_data',  # daily_{code}_{start}_{end}
+    'mv': 'market_cap',
+    'fin': 'financial_ttm',
+    'adj': 'adj_factor',
+    'adjs': 'adj_factor',
+    'cal': 'stock_list',  # 交易日历
+    'hsgt': 'daily_data',
+    'mf': 'daily_data',
+}
+
+# ==========================================
+# 批量数据配置
+# ==========================================
+DAILY_BULK_MODE = True  # 按交易日批量拉取全市场日线 (每个交易日一次API调用)
+DAILY_PANEL_DAYS = 180  # 全市场日线面板保留天数
+FINA_BULK_MODE = True  # 按报告期批量拉取全市场财务指标 (fina_indicator_vip)
+FINA_PAGE_SIZE = 100  # 财务指标每页条数
+FINA_PERIODS = 4  # 同步最近N个报告期
+FUND_FLOW_BULK_MODE = True  # 按交易日批量拉取全市场资金流向 (moneyflow / moneyflow_hsgt)
+FUND_FLOW_WINDOW = 5  # 资金流向统计窗口 (交易日)
+FUND_FLOW_SYNC_DAYS = 15  # 资金流向面板同步最近N天
+PIPELINE_MODE = True  # Step 3 与 Step 4 流水线执行 (龙头筛出即开始预取行情)
+PIPELINE_QUEUE_SIZE = 32  # 流水线队列容量
+
 # ==========================================
 # 数据源配置
 # ==========================================
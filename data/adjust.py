@@ -0,0 +1,127 @@
+"""
+复权计算
+功能：
+1. 按交易日对齐复权因子 (因子只在除权日变化，稀疏序列按最近一期对齐)
+2. 前复权 (qfq): 价格 * 当日因子 / 最新因子，最新价格不变
+3. 后复权 (hfq): 价格 * 当日因子
+4. 支持单只股票或全市场面板，一次向量化运算完成
+5. 单只股票可直接在有序数组上二分对齐因子 (adj_ratio)，不经过 DataFrame 合并
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 需要复权的价格列
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'pre_close')
+
+
+def align_adj_factors(df_daily: pd.DataFrame, df_adj: pd.DataFrame) -> np.ndarray:
+    """
+    为每根K线对齐当日复权因子
+
+    按 (ts_code, trade_date) 向后查找最近一期因子；早于首个因子的K线使用首个因子，
+    没有任何因子的股票视为 1.0。
+
+    Returns:
+        与 df_daily 行顺序一致的因子数组
+    """
+    by = 'ts_code' if 'ts_code' in df_daily.columns and 'ts_code' in df_adj.columns else None
+
+    left = pd.DataFrame({
+        '_pos': np.arange(len(df_daily)),
+        '_date': df_daily['trade_date'].astype(int).to_numpy(),
+    })
+    right = pd.DataFrame({
+        '_date': df_adj['trade_date'].astype(int).to_numpy(),
+        'adj_factor': df_adj['adj_factor'].astype(float).to_numpy(),
+    })
+    if by:
+        left[by] = df_daily[by].to_numpy()
+        right[by] = df_adj[by].to_numpy()
+
+    left = left.sort_values('_date', kind='stable')
+    right = right.dropna(subset=['adj_factor']).sort_values('_date', kind='stable')
+
+    aligned = pd.merge_asof(left, right, on='_date', by=by, direction='backward')
+    missing = aligned['adj_factor'].isna().to_numpy()
+    if missing.any():
+        first = pd.merge_asof(left, right, on='_date', by=by, direction='forward')
+        aligned.loc[missing, 'adj_factor'] = first.loc[missing, 'adj_factor']
+
+    factors = np.empty(len(df_daily))
+    factors[aligned['_pos'].to_numpy()] = aligned['adj_factor'].fillna(1.0).to_numpy()
+    return factors
+
+
+def latest_adj_factors(df_daily: pd.DataFrame, df_adj: pd.DataFrame) -> np.ndarray:
+    """每根K线所属股票的最新复权因子 (前复权基准)"""
+    latest = df_adj.dropna(subset=['adj_factor']).sort_values('trade_date', kind='stable')
+
+    if 'ts_code' in df_daily.columns and 'ts_code' in df_adj.columns:
+        ref = latest.groupby('ts_code')['adj_factor'].last()
+        return df_daily['ts_code'].map(ref).fillna(1.0).astype(float).to_numpy()
+
+    value = float(latest['adj_factor'].iloc[-1]) if not latest.empty else 1.0
+    return np.full(len(df_daily), value)
+
+
+def adj_ratio(trade_dates: np.ndarray, adj_dates: np.ndarray, adj_factors: np.ndarray,
+              how: str = 'qfq') -> np.ndarray:
+    """
+    单只股票每根K线的复权系数 (价格乘以该系数即为复权价，与 adjust_prices 结果一致)
+
+    Args:
+        trade_dates: K线日期 (YYYYMMDD 整数)
+        adj_dates: 复权因子日期 (YYYYMMDD 整数)
+        adj_factors: 复权因子
+        how: 'qfq' 前复权 / 'hfq' 后复权
+    """
+    if how not in ('qfq', 'hfq'):
+        raise ValueError(f"不支持的复权方式: {how}")
+
+    adj_factors = np.asarray(adj_factors, dtype=float)
+    valid = ~np.isnan(adj_factors)
+    adj_dates, adj_factors = np.asarray(adj_dates)[valid], adj_factors[valid]
+    if not len(adj_factors):
+        return np.ones(len(trade_dates))
+
+    order = np.argsort(adj_dates, kind='stable')
+    adj_dates, adj_factors = adj_dates[order], adj_factors[order]
+    # 最近一期因子，早于首个因子的K线使用首个因子
+    pos = np.searchsorted(adj_dates, trade_dates, side='right') - 1
+    ratio = adj_factors[np.maximum(pos, 0)]
+    if how == 'qfq':
+        ratio = ratio / adj_factors[-1]
+    return ratio
+
+
+def adjust_prices(df_daily: pd.DataFrame, df_adj: Optional[pd.DataFrame], how: str = 'qfq',
+                  price_cols: Sequence[str] = PRICE_COLUMNS) -> pd.DataFrame:
+    """
+    复权 - 单只股票或全市场面板
+
+    Args:
+        df_daily: 日线数据 (需含 trade_date，面板需含 ts_code)
+        df_adj: 复权因子序列 (ts_code, trade_date, adj_factor)
+        how: 'qfq' 前复权 / 'hfq' 后复权
+        price_cols: 需要复权的价格列
+
+    Returns:
+        复权后的日线 (新DataFrame，行顺序与输入一致)
+    """
+    if how not in ('qfq', 'hfq'):
+        raise ValueError(f"不支持的复权方式: {how}")
+
+    if df_daily is None or df_daily.empty or df_adj is None or df_adj.empty:
+        return df_daily
+
+    ratio = align_adj_factors(df_daily, df_adj)
+    if how == 'qfq':
+        ratio = ratio / latest_adj_factors(df_daily, df_adj)
+
+    df = df_daily.copy()
+    cols = [c for c in price_cols if c in df.columns]
+    df[cols] = df[cols].to_numpy(dtype=float) * ratio[:, None]
+    return df
@@ -0,0 +1,234 @@
+"""
+日线内存映射数组存储
+功能：
+1. 全市场日线按字段存为定长二进制列文件 (价格/成交量 float32，交易日 int32)，另存按股票的行偏移索引
+2. 用 np.memmap 只读打开，单只股票的切片与整列面板都是文件映射上的视图，不复制、不解析
+3. 多个进程打开同一份文件时共享操作系统页缓存；重建时写入新版本目录后切换 CURRENT，正在读取的进程不受影响
+4. 重建持有进程间独占锁，打开版本持有共享锁 (打开后的映射不再需要锁)
+
+目录结构:
+    bar_arrays/CURRENT              # 当前版本目录名
+    bar_arrays/v000002/meta.json    # 行数、字段类型、股票代码与行偏移
+    bar_arrays/v000002/close.f32    # 按 (ts_code, trade_date) 排序的整列数据
+    bar_arrays/v000002/trade_date.i32
+"""
+
+import json
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.locks import atomic_write, cache_lock
+
+DEFAULT_FIELDS = ('open', 'high', 'low', 'close', 'vol')
+
+# 字段类型 -> 文件后缀
+_SUFFIXES = {'float32': '.f32', 'int32': '.i32'}
+
+_VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+
+class _Generation:
+    """一个已打开的版本: 各字段的 memmap 与行偏移索引"""
+
+    def __init__(self, directory: Path):
+        meta = json.loads((directory / 'meta.json').read_text(encoding='utf-8'))
+        self.directory = directory
+        self.rows = meta['rows']
+        self.fields: Dict[str, str] = meta['fields']
+        self.codes: List[str] = meta['codes']
+        self.offsets = np.asarray(meta['offsets'], dtype=np.int64)
+        self.positions = {code: i for i, code in enumerate(self.codes)}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for field, dtype in self.fields.items():
+            path = directory / f"{field}{_SUFFIXES[dtype]}"
+            # 空文件无法映射
+            self.arrays[field] = (np.memmap(path, dtype=dtype, mode='r', shape=(self.rows,))
+                                  if self.rows else np.empty(0, dtype=dtype))
+
+
+class BarArrayStore:
+    """
+    日线内存映射数组存储 - 线程安全，读取返回只读视图
+
+    Args:
+        root: 存储目录
+        fields: 写入的数值字段 (trade_date 总是写入)
+    """
+
+    def __init__(self, root: Path, fields: Iterable[str] = DEFAULT_FIELDS):
+        self.root = Path(root)
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        self._file_lock = cache_lock(self.root.parent, self.root.name)
+        self._generation: Optional[_Generation] = None
+        self._signature = None
+
+    # ==========================================
+    # 写入
+    # ==========================================
+
+    def write(self, df: pd.DataFrame) -> int:
+        """
+        用 df 重建存储 (需包含 ts_code / trade_date 列)，同一 (ts_code, trade_date) 保留最后一行
+
+        Returns:
+            写入的行数
+        """
+        if df is None or df.empty:
+            return 0
+
+        df = df.assign(ts_code=df['ts_code'].astype(str),
+                       trade_date=pd.to_numeric(df['trade_date'], errors='coerce').fillna(0).astype(np.int32))
+        df = df.drop_duplicates(subset=['ts_code', 'trade_date'], keep='last')
+        df = df.sort_values(['ts_code', 'trade_date'], kind='mergesort').reset_index(drop=True)
+
+        codes = df['ts_code'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        fields = {'trade_date': 'int32'}
+        fields.update({field: 'float32' for field in self.fields if field in df.columns})
+
+        with self._lock, self._file_lock.write():
+            self.root.mkdir(parents=True, exist_ok=True)
+            directory = self.root / f"v{self._next_version():06d}"
+            directory.mkdir()
+            for field, dtype in fields.items():
+                values = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=dtype)
+                values.tofile(directory / f"{field}{_SUFFIXES[dtype]}")
+            meta = {
+                'rows': len(df),
+                'fields': fields,
+                'codes': codes[starts].tolist(),
+                'offsets': np.r_[starts, len(df)].tolist(),
+            }
+            (directory / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+
+            # 先写临时文件再替换，读取方看到的 CURRENT 总是完整的
+            atomic_write(self.root / 'CURRENT', lambda tmp: tmp.write_text(directory.name, encoding='utf-8'))
+            self._remove_old(directory.name)
+        return len(df)
+
+    def _next_version(self) -> int:
+        versions = [int(m.group(1)) for m in (_VERSION_PATTERN.match(p.name) for p in self.root.iterdir()) if m]
+        return max(versions, default=0) + 1
+
+    def _remove_old(self, current: str):
+        """删除旧版本 (其他进程仍映射着的文件删除失败时留到下次)"""
+        for path in self.root.iterdir():
+            if path.is_dir() and _VERSION_PATTERN.match(path.name) and path.name != current:
+                shutil.rmtree(path, ignore_errors=True)
+
+    # ==========================================
+    # 读取
+    # ==========================================
+
+    def _open(self) -> Optional[_Generation]:
+        """当前版本 (CURRENT 变化时重新映射)，没有数据时返回None"""
+        pointer = self.root / 'CURRENT'
+        try:
+            stat = pointer.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._generation = self._signature = None
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._generation is None or self._signature != signature:
+                with self._file_lock.read():
+                    stat = pointer.stat()
+                    directory = self.root / pointer.read_text(encoding='utf-8').strip()
+                    self._generation = _Generation(directory)
+                self._signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            return self._generation
+
+    def exists(self) -> bool:
+        return self._open() is not None
+
+    def codes(self) -> List[str]:
+        """存储中的股票代码 (升序)"""
+        generation = self._open()
+        return list(generation.codes) if generation is not None else []
+
+    def columns(self) -> List[str]:
+        """存储中的字段 (含 trade_date)"""
+        generation = self._open()
+        return list(generation.fields) if generation is not None else []
+
+    def column(self, field: str) -> Optional[np.ndarray]:
+        """
+        整列面板 (全部股票按 (ts_code, trade_date) 排序)，配合 offsets() 按股票分段
+
+        Returns:
+            只读 memmap，存储或字段不存在时返回None
+        """
+        generation = self._open()
+        if generation is None:
+            return None
+        return generation.arrays.get(field)
+
+    def offsets(self) -> Dict[str, tuple]:
+        """每只股票在整列中的行范围 {ts_code: (起始行, 结束行)}"""
+        generation = self._open()
+        if generation is None:
+            return {}
+        bounds = generation.offsets.tolist()
+        return {code: (bounds[i], bounds[i + 1]) for i, code in enumerate(generation.codes)}
+
+    def stock(self, ts_code: str, fields: Iterable[str] = None, start_date: str = None,
+              end_date: str = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        单只股票的各字段数组 (按 trade_date 升序)，均为 memmap 上的视图
+
+        Args:
+            fields: 只返回的字段，默认全部 (含 trade_date)
+            start_date / end_date: 日期区间 (含两端)
+
+        Returns:
+            {字段: 只读数组}，存储中没有该股票时返回None
+        """
+        generation = self._open()
+        if generation is None:
+            return None
+        position = generation.positions.get(ts_code)
+        if position is None:
+            return None
+
+        start, stop = int(generation.offsets[position]), int(generation.offsets[position + 1])
+        if start_date or end_date:
+            # 股票内 trade_date 升序，二分定位区间
+            dates = generation.arrays['trade_date'][start:stop]
+            low = np.searchsorted(dates, int(start_date), side='left') if start_date else 0
+            high = np.searchsorted(dates, int(end_date), side='right') if end_date else len(dates)
+            start, stop = start + int(low), start + int(high)
+
+        names = generation.fields if fields is None else [f for f in fields if f in generation.arrays]
+        return {name: generation.arrays[name][start:stop] for name in names}
+
+    def frame(self, ts_code: str, fields: Iterable[str] = None, start_date: str = None,
+              end_date: str = None) -> Optional[pd.DataFrame]:
+        """
+        单只股票的日线 DataFrame，列直接引用 memmap (不复制)，可直接传给 indicators 中的函数
+
+        trade_date 为 int32 (与压缩后的日线面板一致)，需要字符串时用 dtypes.expand_frame 还原
+        """
+        arrays = self.stock(ts_code, fields, start_date, end_date)
+        if arrays is None:
+            return None
+        return pd.DataFrame(arrays, copy=False)
+
+    def stats(self) -> Dict[str, int]:
+        """股票数、行数与字段数"""
+        generation = self._open()
+        if generation is None:
+            return {'stocks': 0, 'rows': 0, 'fields': 0}
+        return {'stocks': len(generation.codes), 'rows': generation.rows, 'fields': len(generation.fields)}
+
+    def close(self):
+        """释放映射 (之后读取时重新打开)"""
+        with self._lock:
+            self._generation = self._signature = None
@@ -0,0 +1,325 @@
+"""
+日线分区存储
+功能：
+1. 全市场日线按月 (或按年) 分区合并存储，取代每只股票一个文件
+2. 分区内按 (ts_code, trade_date) 排序，单只股票的历史与单日截面都是一次顺序读取
+3. 追加先写入内存缓冲，达到行数阈值时写成分区的增量文件；增量文件过多时合并 (compaction) 为一个基础文件
+4. 写入与合并持有读写锁的写锁 (含进程间独占锁)，读取持有读锁，多个读取并行解析分区；文件均先写临时文件再替换
+
+目录结构 (文件格式由存储后端决定，见 data/storage.py):
+    daily_bars/202610/base.parquet
+    daily_bars/202610/delta_000001.parquet
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.locks import atomic_write, cache_lock
+
+KEY_COLUMNS = ['ts_code', 'trade_date']
+
+_DELTA_PATTERN = re.compile(r'^delta_(\d+)$')
+
+
+class DailyBarStore:
+    """
+    日线分区存储 - 线程安全
+
+    锁的顺序: 先读写锁 (_file_lock)，后互斥锁 (_lock)。互斥锁只保护缓冲与已解析分区的登记，不在持有时读写文件。
+
+    Args:
+        root: 存储目录
+        backend: 存储后端 (提供 suffix / read / write)
+        partition: 'month' 或 'year'
+        max_deltas: 分区增量文件数达到该值时合并
+        flush_rows: 内存缓冲行数达到该值时写入增量文件
+        max_cached_partitions: 内存中保留的已解析分区数
+    """
+
+    def __init__(self, root: Path, backend, partition: str = 'month', max_deltas: int = 8,
+                 flush_rows: int = 50000, max_cached_partitions: int = 24):
+        if partition not in ('month', 'year'):
+            raise ValueError(f"未知的分区方式: {partition}")
+        self.root = Path(root)
+        self.backend = backend
+        self.partition = partition
+        self.max_deltas = max_deltas
+        self.flush_rows = flush_rows
+        self.max_cached_partitions = max_cached_partitions
+
+        # 缓冲与已解析分区的互斥锁
+        self._lock = threading.Lock()
+        # 读写锁 (含进程间文件锁 (锁文件在存储目录同级的 .locks/ 下)
+        self._file_lock = cache_lock(self.root.parent, self.root.name)
+        # 未写入文件的追加: {分区: {ts_code: DataFrame}}
+        self._pending: Dict[str, Dict[str, pd.DataFrame]] = {}
+        self._pending_rows = 0
+        # 已解析的分区: {分区: (文件签名, 数据, {ts_code: (起始行, 结束行)})}
+        self._partitions: OrderedDict = OrderedDict()
+
+    # ==========================================
+    # 分区与文件
+    # ==========================================
+
+    def partition_key(self, trade_date: str) -> str:
+        """交易日所在分区 (YYYYMM 或 YYYY)"""
+        return str(trade_date)[:6 if self.partition == 'month' else 4]
+
+    def partitions(self) -> List[str]:
+        """所有分区 (含未写入文件的缓冲)"""
+        with self._lock:
+            keys = set(self._pending)
+        if self.root.exists():
+            keys.update(path.name for path in self.root.iterdir() if path.is_dir())
+        return sorted(keys)
+
+    def _files(self, key: str) -> Tuple[Path, List[Path]]:
+        """分区的基础文件与增量文件 (按序号升序)"""
+        directory = self.root / key
+        base = directory / f"base{self.backend.suffix}"
+        deltas = []
+        if directory.exists():
+            for path in directory.glob(f"delta_*{self.backend.suffix}"):
+                match = _DELTA_PATTERN.match(path.name[:-len(self.backend.suffix)])
+                if match:
+                    deltas.append((int(match.group(1)), path))
+        return base, [path for _, path in sorted(deltas)]
+
+    @staticmethod
+    def _signature(paths: Iterable[Path]) -> tuple:
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """代码与日期统一为字符串"""
+        return df.astype({'ts_code': str, 'trade_date': str})
+
+    @staticmethod
+    def _merge(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """合并多份数据，同一 (ts_code, trade_date) 保留最后一份，按 (ts_code, trade_date) 排序"""
+        frames = [df for df in frames if df is not None and not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=KEY_COLUMNS)
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+        return df.sort_values(KEY_COLUMNS, kind='mergesort').reset_index(drop=True)
+
+    def _read_files(self, key: str) -> pd.DataFrame:
+        """读取分区文件 (不含缓冲) 并合并"""
+        base, deltas = self._files(key)
+        frames = [self._normalize(self.backend.read(path)) for path in [base] + deltas if path.exists()]
+        return self._merge(frames)
+
+    def _load_partition(self, key: str) -> Tuple[pd.DataFrame, Dict[str, Tuple[int, int]]]:
+        """已解析的分区数据及按 ts_code 的行范围 (文件在互斥锁外读取和解析)"""
+        with self._file_lock.read():
+            base, deltas = self._files(key)
+            signature = self._signature([base] + deltas)
+            with self._lock:
+                cached = self._partitions.get(key)
+                if cached is not None and cached[0] == signature:
+                    self._partitions.move_to_end(key)
+                    return cached[1], cached[2]
+
+            df = self._read_files(key)
+        codes = df['ts_code'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(codes)]
+        ranges = {codes[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+        with self._lock:
+            self._partitions[key] = (signature, df, ranges)
+            while len(self._partitions) > self.max_cached_partitions:
+                self._partitions.popitem(last=False)
+        return df, ranges
+
+    # ==========================================
+    # 写入
+    # ==========================================
+
+    def append(self, df: pd.DataFrame):
+        """追加日线 (需包含 ts_code / trade_date 列)，同一 (ts_code, trade_date) 以最后写入为准"""
+        if df is None or df.empty:
+            return
+        df = self._normalize(df)
+        keys = df['trade_date'].str.slice(0, 6 if self.partition == 'month' else 4)
+
+        with self._lock:
+            for key, part in df.groupby(keys.to_numpy(), sort=False):
+                pending = self._pending.setdefault(key, {})
+                for ts_code, rows in part.groupby('ts_code', sort=False):
+                    rows = rows.reset_index(drop=True)
+                    previous = pending.get(ts_code)
+                    if previous is not None:
+                        self._pending_rows -= len(previous)
+                        rows = self._merge([previous, rows])
+                    pending[ts_code] = rows
+                    self._pending_rows += len(rows)
+            full = self._pending_rows >= self.flush_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """把缓冲写成各分区的增量文件，增量文件过多的分区随即合并"""
+        with self._file_lock.write():
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_rows = 0
+            for key, by_code in pending.items():
+                _, deltas = self._files(key)
+                seq = int(_DELTA_PATTERN.match(deltas[-1].stem).group(1)) + 1 if deltas else 1
+                directory = self.root / key
+                directory.mkdir(parents=True, exist_ok=True)
+                df = self._merge(list(by_code.values()))
+                atomic_write(directory / f"delta_{seq:06d}{self.backend.suffix}",
+                             lambda tmp: self.backend.write(tmp, df))
+                if len(deltas) + 1 >= self.max_deltas:
+                    self.compact([key])
+
+    def discard_pending(self):
+        """丢弃未写入文件的缓冲 (存储目录已被删除时使用)"""
+        with self._lock:
+            self._pending = {}
+            self._pending_rows = 0
+
+    def compact(self, keys: Iterable[str] = None):
+        """合并分区的基础文件与增量文件为一个基础文件，默认合并所有有增量文件的分区"""
+        with self._file_lock.write():
+            for key in (self.partitions() if keys is None else keys):
+                _, deltas = self._files(key)
+                if not deltas:
+                    continue
+                self._write_partition(key, self._read_files(key))
+
+    def _write_partition(self, key: str, df: pd.DataFrame):
+        """用 df 替换分区的全部文件 (调用方需持有写锁)"""
+        base, deltas = self._files(key)
+        with self._lock:
+            self._partitions.pop(key, None)
+        if df.empty:
+            for path in [base] + deltas:
+                path.unlink(missing_ok=True)
+            if base.parent.exists() and not any(base.parent.iterdir()):
+                base.parent.rmdir()
+            return
+        base.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(base, lambda tmp: self.backend.write(tmp, df))
+        for path in deltas:
+            path.unlink(missing_ok=True)
+
+    def delete(self, ts_codes: Iterable[str]) -> int:
+        """删除股票的全部日线，返回删除的行数"""
+        codes = set(ts_codes)
+        removed = 0
+        with self._file_lock.write():
+            with self._lock:
+                for by_code in self._pending.values():
+                    for ts_code in codes & set(by_code):
+                        rows = len(by_code.pop(ts_code))
+                        self._pending_rows -= rows
+                        removed += rows
+                self._pending = {key: by_code for key, by_code in self._pending.items() if by_code}
+            for key in self.partitions():
+                df, ranges = self._load_partition(key)
+                hit = codes & set(ranges)
+                if hit:
+                    removed += sum(ranges[c][1] - ranges[c][0] for c in hit)
+                    self._write_partition(key, df[~df['ts_code'].isin(hit)].reset_index(drop=True))
+        return removed
+
+    # ==========================================
+    # 读取
+    # ==========================================
+
+    def _keys_between(self, start_date: Optional[str], end_date: Optional[str]) -> List[str]:
+        """与日期区间有交集的分区"""
+        low = self.partition_key(start_date) if start_date else None
+        high = self.partition_key(end_date) if end_date else None
+        return [key for key in self.partitions()
+                if (low is None or key >= low) and (high is None or key <= high)]
+
+    def read_partition(self, key: str) -> pd.DataFrame:
+        """整个分区 (含缓冲)，按 (ts_code, trade_date) 排序"""
+        with self._file_lock.read():
+            with self._lock:
+                pending = list(self._pending.get(key, {}).values())
+            df, _ = self._load_partition(key)
+        return self._merge([df] + pending)
+
+    def read_stock(self, ts_code: str, start_date: str = None, end_date: str = None,
+                   columns: Iterable[str] = None) -> Optional[pd.DataFrame]:
+        """
+        单只股票的日线 (按 trade_date 升序)
+
+        Returns:
+            DataFrame，存储中没有该股票时返回None
+        """
+        frames = []
+        has_pending = False
+        # 读锁期间缓冲不会被写入文件，缓冲快照与分区文件一致
+        with self._file_lock.read():
+            keys = self._keys_between(start_date, end_date)
+            with self._lock:
+                pendings = [self._pending.get(key, {}).get(ts_code) for key in keys]
+            for key, pending in zip(keys, pendings):
+                df, ranges = self._load_partition(key)
+                span = ranges.get(ts_code)
+                if span is not None:
+                    frames.append(df.iloc[span[0]:span[1]])
+                if pending is not None:
+                    frames.append(pending)
+                    has_pending = True
+        if not frames:
+            return None
+        # 分区按日期先后排列且各自有序，没有缓冲时直接拼接
+        df = self._merge(frames) if has_pending else pd.concat(frames, ignore_index=True)
+        return self._select(df, start_date, end_date, columns)
+
+    def read_cross_section(self, trade_date: str, columns: Iterable[str] = None) -> Optional[pd.DataFrame]:
+        """单个交易日的全部股票 (按 ts_code 升序)，没有数据时返回None"""
+        trade_date = str(trade_date)
+        key = self.partition_key(trade_date)
+        with self._file_lock.read():
+            if key not in self.partitions():
+                return None
+            with self._lock:
+                pending = list(self._pending.get(key, {}).values())
+            df, _ = self._load_partition(key)
+        frames = [df[df['trade_date'].to_numpy() == trade_date]]
+        frames += [rows[rows['trade_date'] == trade_date] for rows in pending]
+        df = self._merge(frames)
+        if df.empty:
+            return None
+        return self._select(df, None, None, columns)
+
+    @staticmethod
+    def _select(df: pd.DataFrame, start_date: Optional[str], end_date: Optional[str],
+                columns: Optional[Iterable[str]]) -> pd.DataFrame:
+        """按日期区间和列筛选"""
+        if start_date:
+            df = df[df['trade_date'] >= start_date]
+        if end_date:
+            df = df[df['trade_date'] <= end_date]
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df.reset_index(drop=True)
+
+    def stats(self) -> Dict[str, int]:
+        """分区数、增量文件数和缓冲行数"""
+        with self._file_lock.read():
+            keys = self.partitions()
+            deltas = sum(len(self._files(key)[1]) for key in keys)
+        return {'partitions': len(keys), 'deltas': deltas, 'pending_rows': self._pending_rows}
@@ -6,20 +6,55 @@
 3. 股票列表缓存 (1天有效期)
 4. 复权因子缓存 (30天有效期)
 5. 行业RPS缓存 (1天有效期)
+
+文件格式由 CACHE_FORMAT 决定 (默认 parquet，见 data/storage.py)，
+旧的 CSV 缓存在迁移 (migrate_cache) 前仍可读取。
+单只股票的日线存入按月分区的合并存储 (daily_bars/，见 data/bar_store.py)。
+CACHE_FORMAT = 'sqlite' 时所有缓存存入 cache.db (见 data/sql_store.py)。
+全市场日线另存为内存映射数组 (bar_arrays/，见 data/array_store.py)，供回测零拷贝读取。
+每个缓存一把读写锁并持有进程间文件锁，文件先写临时文件再原子替换 (见 data/locks.py)。
 """
 
 import os
+import atexit
+import shutil
 import pandas as pd
 import datetime
 import warnings
 import json
 import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# 导入配置与存储后端
+from config import config
+from data.storage import CsvBackend, StorageBackend, SUFFIXES, get_backend
+from data.bar_store import DailyBarStore
+from data.array_store import BarArrayStore
+from data.locks import RWLock, atomic_write, cache_lock
+from data.sql_store import SqliteStore
 
 warnings.filterwarnings('ignore')
 
-# 线程锁 - 用于并发访问缓存
-_cache_lock = threading.Lock()
+# 按key建立的内存索引: (缓存路径, key列) -> (文件签名, {key: 行})
+_index_cache: Dict[tuple, tuple] = {}
+_index_lock = threading.Lock()
+
+# 存储后端 (首次使用时按 CACHE_FORMAT 创建)
+_backend: Optional[StorageBackend] = None
+_csv_backend = CsvBackend()
+
+# 日线分区存储 (首次使用时创建，缓存目录或存储格式变化时重建)
+_daily_store: Optional[DailyBarStore] = None
+_daily_store_lock = threading.Lock()
+
+# 日线内存映射数组 (缓存目录变化时重建)
+_bar_arrays: Optional[BarArrayStore] = None
+_bar_arrays_lock = threading.Lock()
+
+# SQLite 存储 (CACHE_FORMAT = 'sqlite' 时使用，缓存目录变化时重建)
+_sql_store: Optional[SqliteStore] = None
+_sql_store_lock = threading.Lock()
 
 # 缓存目录
 CACHE_DIR = Path(__file__).parent.parent / "data_cache"
@@ -40,10 +75,73 @@ def ensure_cache_dir():
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def storage_backend() -> StorageBackend:
+    """当前的文件存储后端 (sqlite 模式下用于读取尚未迁移的 CSV)"""
+    global _backend
+    if _backend is None:
+        _backend = get_backend('csv' if config.CACHE_FORMAT == 'sqlite' else config.CACHE_FORMAT)
+    return _backend
+
+
+def sql_store() -> Optional[SqliteStore]:
+    """SQLite 存储，CACHE_FORMAT 不是 sqlite 时返回None"""
+    global _sql_store
+    if config.CACHE_FORMAT != 'sqlite':
+        return None
+    with _sql_store_lock:
+        path = CACHE_DIR / 'cache.db'
+        if _sql_store is None or _sql_store.path != path:
+            if _sql_store is not None:
+                _sql_store.close()
+            _sql_store = SqliteStore(path)
+        return _sql_store
+
+
+def set_storage_backend(name: str) -> StorageBackend:
+    """切换存储后端 (parquet / feather / csv)"""
+    global _backend
+    _backend = get_backend(name)
+    return _backend
+
+
 def get_cache_path(cache_name: str) -> Path:
-    """获取缓存文件路径"""
+    """
+    获取缓存文件路径
+
+    当前格式的文件不存在而旧的 CSV 文件存在时返回 CSV 路径 (尚未迁移)。
+    """
     ensure_cache_dir()
-    return CACHE_DIR / f"{cache_name}.csv"
+    cache_path = CACHE_DIR / f"{cache_name}{storage_backend().suffix}"
+    if cache_path.suffix != '.csv' and not cache_path.exists():
+        legacy_path = cache_path.with_suffix('.csv')
+        if legacy_path.exists():
+            return legacy_path
+    return cache_path
+
+
+def _backend_for(cache_path: Path) -> StorageBackend:
+    """读取某个缓存文件使用的后端"""
+    return _csv_backend if cache_path.suffix == '.csv' else storage_backend()
+
+
+def _lock(cache_name: str) -> RWLock:
+    """缓存的读写锁 (线程间读写锁 + 进程间文件锁)"""
+    return cache_lock(CACHE_DIR, cache_name)
+
+
+def _cache_mtime(cache_name: str) -> Optional[float]:
+    """缓存的更新时间 (文件修改时间或 SQLite 表的更新时间)，不存在返回None"""
+    store = sql_store()
+    if store is not None:
+        updated_at = store.updated_at(cache_name)
+        if updated_at is not None:
+            return updated_at
+
+    cache_path = get_cache_path(cache_name)
+    try:
+        return cache_path.stat().st_mtime
+    except FileNotFoundError:
+        return None
 
 
 def is_cache_valid(cache_name: str, max_age_days: int = None) -> bool:
@@ -51,51 +149,273 @@ def is_cache_valid(cache_name: str, max_age_days: int = None) -> bool:
     if max_age_days is None:
         max_age_days = CACHE_EXPIRY.get(cache_name, 7)
 
-    cache_path = get_cache_path(cache_name)
-    if not cache_path.exists():
+    mtime = _cache_mtime(cache_name)
+    if mtime is None:
         return False
 
-    # 检查文件修改时间
-    file_mtime = datetime.datetime.fromtimestamp(cache_path.stat().st_mtime)
-    age = datetime.datetime.now() - file_mtime
+    # 检查更新时间
+    age = datetime.datetime.now() - datetime.datetime.fromtimestamp(mtime)
 
     return age.days < max_age_days
 
 
-def load_cache(cache_name: str) -> pd.DataFrame | None:
-    """加载缓存数据 - 线程安全"""
-    cache_path = get_cache_path(cache_name)
-    if cache_path.exists():
-        try:
-            with _cache_lock:
-                df = pd.read_csv(cache_path, encoding='utf-8-sig')
+def load_cache(cache_name: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame | None:
+    """
+    加载缓存数据 - 线程安全
+
+    Args:
+        columns: 只读取这些列 (文件中不存在的列忽略)，默认全部
+    """
+    store = sql_store()
+    if store is not None:
+        df = store.read_table(cache_name, columns)
+        if df is not None:
             return df
+
+    with _lock(cache_name).read():
+        cache_path = get_cache_path(cache_name)
+        if not cache_path.exists():
+            return None
+        try:
+            return _backend_for(cache_path).read(cache_path, columns)
         except Exception as e:
             print(f"    [缓存] 加载失败 {cache_name}: {e}")
-    return None
+            return None
 
 
 def save_cache(cache_name: str, df: pd.DataFrame | None):
-    """保存缓存数据 - 线程安全"""
+    """保存缓存数据 - 线程安全 (同名的旧 CSV 缓存一并删除)"""
     if df is None or df.empty:
         return
 
-    cache_path = get_cache_path(cache_name)
-    try:
-        with _cache_lock:
-            df.to_csv(cache_path, index=False, encoding='utf-8-sig')
-    except Exception as e:
-        print(f"    [缓存] 保存失败 {cache_name}: {e}")
+    store = sql_store()
+    if store is not None:
+        try:
+            store.write_table(cache_name, df)
+        except Exception as e:
+            print(f"    [缓存] 保存失败 {cache_name}: {e}")
+            return
+        _remove_cache_files(cache_name)
+        return
+
+    backend = storage_backend()
+    ensure_cache_dir()
+    cache_path = CACHE_DIR / f"{cache_name}{backend.suffix}"
+    with _lock(cache_name).write():
+        try:
+            atomic_write(cache_path, lambda tmp: backend.write(tmp, df))
+        except Exception as e:
+            print(f"    [缓存] 保存失败 {cache_name}: {e}")
+            return
+        finally:
+            _invalidate_index(cache_path)
+
+        legacy_path = cache_path.with_suffix('.csv')
+        if legacy_path != cache_path and legacy_path.exists():
+            _invalidate_index(legacy_path)
+            legacy_path.unlink()
+
+
+def upsert_cache(cache_name: str, df: pd.DataFrame | None, keys: Iterable[str] = ('ts_code',)):
+    """按 keys 更新或插入缓存行 (sqlite 模式在单个事务内完成)，缓存更新时间刷新"""
+    if df is None or df.empty:
+        return
+
+    store = sql_store()
+    if store is not None and store.has_table(cache_name):
+        store.upsert_table(cache_name, df, keys)
+        return
+
+    # 读取与写回在同一把写锁内，并发的 upsert 不会互相覆盖
+    with _lock(cache_name).write():
+        existing = load_cache(cache_name)
+        if existing is not None and not existing.empty:
+            keys = list(keys)
+            df = pd.concat([existing, df], ignore_index=True).astype({key: str for key in keys})
+            df = df.drop_duplicates(subset=keys, keep='last')
+        save_cache(cache_name, df.reset_index(drop=True))
+
+
+def merge_cache(cache_name: str, merge: Callable[[Optional[pd.DataFrame]], Optional[pd.DataFrame]]):
+    """
+    读改写: 在缓存写锁 (含进程间文件锁) 内读取当前内容，写回 merge(当前内容) 的结果
+
+    merge 返回None或空表时删除缓存。用于多个进程都会追加记录的小缓存 (如 negative_cache)。
+    """
+    with _lock(cache_name).write():
+        df = merge(load_cache(cache_name))
+        if df is None or df.empty:
+            clear_cache_by_name(cache_name)
+        else:
+            save_cache(cache_name, df)
+
+
+def _remove_cache_files(cache_name: str):
+    """删除缓存的文件 (所有格式)"""
+    with _lock(cache_name).write():
+        for cache_path in _cache_files(cache_name):
+            _invalidate_index(cache_path)
+            cache_path.unlink(missing_ok=True)
+
+
+def migrate_cache() -> int:
+    """
+    一次性把缓存目录中的 CSV 文件转换为当前格式 (保留文件修改时间，有效期不变)，
+    并把单只股票的日线缓存导入分区存储
+
+    Returns:
+        迁移的文件数
+    """
+    if sql_store() is not None:
+        return migrate_to_sql()
+
+    backend = storage_backend()
+    if backend.suffix == '.csv':
+        return migrate_daily_cache()
+
+    ensure_cache_dir()
+    migrated = 0
+    for csv_path in sorted(CACHE_DIR.glob("*.csv")):
+        target = csv_path.with_suffix(backend.suffix)
+        with _lock(csv_path.stem).write():
+            try:
+                stat = csv_path.stat()
+                df = _csv_backend.read(csv_path)
+                atomic_write(target, lambda tmp: backend.write(tmp, df))
+                os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            except Exception as e:
+                print(f"    [缓存] 迁移失败 {csv_path.name}: {e}")
+                continue
+            _invalidate_index(csv_path)
+            _invalidate_index(target)
+            csv_path.unlink()
+        migrated += 1
+
+    print(f"[缓存] 已迁移 {migrated} 个CSV缓存为 {backend.name} 格式")
+    return migrated + migrate_daily_cache()
+
+
+def migrate_daily_cache() -> int:
+    """
+    一次性把单只股票的日线缓存文件 (daily_*.csv 等) 导入分区存储并合并
+
+    Returns:
+        导入的文件数
+    """
+    store = daily_store()
+    migrated = 0
+    for cache_path in sorted(_cache_files('daily_*')):
+        cache_name = cache_path.stem
+        if cache_name in ('daily_panel',):
+            continue
+        ts_code = cache_name[len('daily_'):].replace('_', '.')
+        df = load_cache(cache_name)
+        if df is None or 'trade_date' not in df.columns:
+            continue
+        save_daily_cache(ts_code, df)
+        migrated += 1
+
+    if migrated:
+        store.flush()
+        store.compact()
+        print(f"[缓存] 已导入 {migrated} 只股票的日线到 daily_bars/")
+    return migrated
+
+
+def migrate_to_sql() -> int:
+    """
+    一次性把缓存文件 (任意格式) 与日线分区存储导入 SQLite，表的更新时间取文件修改时间
+
+    Returns:
+        导入的文件数
+    """
+    store = sql_store()
+    migrated = 0
+    for cache_path in sorted(_cache_files()):
+        cache_name = cache_path.stem
+        with _lock(cache_name).write():
+            try:
+                df = _backend_for(cache_path).read(cache_path)
+            except Exception as e:
+                print(f"    [缓存] 迁移失败 {cache_path.name}: {e}")
+                continue
+            if cache_name.startswith('daily_') and cache_name != 'daily_panel' and 'trade_date' in df.columns:
+                if 'ts_code' not in df.columns:
+                    df = df.assign(ts_code=cache_name[len('daily_'):].replace('_', '.'))
+                store.upsert_bars(df)
+            elif not df.empty:
+                store.write_table(cache_name, df, updated_at=cache_path.stat().st_mtime)
+            _invalidate_index(cache_path)
+            cache_path.unlink()
+        migrated += 1
+
+    bar_root = CACHE_DIR / 'daily_bars'
+    if bar_root.exists():
+        bars = daily_store()
+        bars.flush()
+        for key in bars.partitions():
+            store.upsert_bars(bars.read_partition(key))
+        bars.discard_pending()
+        shutil.rmtree(bar_root, ignore_errors=True)
+        migrated += 1
+
+    print(f"[缓存] 已导入 {migrated} 个缓存到 {store.path.name}")
+    return migrated
+
+
+def _invalidate_index(cache_path: Path):
+    """丢弃某个缓存文件的内存索引"""
+    with _index_lock:
+        for index_key in [k for k in _index_cache if k[0] == str(cache_path)]:
+            del _index_cache[index_key]
+
+
+def load_cache_index(cache_name: str, key: str = 'ts_code') -> Dict[Any, Dict[str, Any]]:
+    """
+    加载缓存并按 key 列建立内存索引 - 同一key保留文件中的首行
+
+    索引按文件 (修改时间, 大小) 签名复用，文件未变化时不再解析CSV，
+    单次查询为字典查找。
+
+    Returns:
+        {key: 行字典}，缓存不存在时返回空字典
+    """
+    store = sql_store()
+    version = store.version(cache_name) if store is not None else None
+    if version is not None:
+        index_key = (f"sqlite:{store.path}:{cache_name}", key)
+        signature = version
+    else:
+        cache_path = get_cache_path(cache_name)
+        try:
+            stat = cache_path.stat()
+        except FileNotFoundError:
+            return {}
+        index_key = (str(cache_path), key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    with _index_lock:
+        cached = _index_cache.get(index_key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    index = {}
+    df = load_cache(cache_name)
+    if df is not None and key in df.columns:
+        df = df.drop_duplicates(subset=[key], keep='first')
+        index = dict(zip(df[key], df.to_dict('records')))
+
+    with _index_lock:
+        _index_cache[index_key] = (signature, index)
+    return index
 
 
 def get_cache_age(cache_name: str) -> int | None:
     """获取缓存年龄(天)"""
-    cache_path = get_cache_path(cache_name)
-    if not cache_path.exists():
+    mtime = _cache_mtime(cache_name)
+    if mtime is None:
         return None
 
-    file_mtime = datetime.datetime.fromtimestamp(cache_path.stat().st_mtime)
-    age = datetime.datetime.now() - file_mtime
+    age = datetime.datetime.now() - datetime.datetime.fromtimestamp(mtime)
     return age.days
 
 
@@ -113,6 +433,11 @@ def save_market_cap_cache(df: pd.DataFrame | None):
     save_cache('market_cap', df)
 
 
+def load_market_cap_index() -> Dict[Any, Dict[str, Any]]:
+    """加载市值缓存的 ts_code 索引"""
+    return load_cache_index('market_cap')
+
+
 def load_financial_ttm_cache() -> pd.DataFrame | None:
     """加载财务TTM缓存"""
     return load_cache('financial_ttm')
@@ -123,6 +448,21 @@ def save_financial_ttm_cache(df: pd.DataFrame | None):
     save_cache('financial_ttm', df)
 
 
+def load_financial_ttm_index() -> Dict[Any, Dict[str, Any]]:
+    """加载财务TTM缓存的 ts_code 索引"""
+    return load_cache_index('financial_ttm')
+
+
+def load_financial_periods_cache() -> pd.DataFrame | None:
+    """加载财务报告期同步记录"""
+    return load_cache('financial_periods')
+
+
+def save_financial_periods_cache(df: pd.DataFrame | None):
+    """保存财务报告期同步记录"""
+    save_cache('financial_periods', df)
+
+
 def load_stock_list_cache() -> pd.DataFrame | None:
     """加载股票列表缓存"""
     return load_cache('stock_list')
@@ -143,6 +483,11 @@ def save_adj_factor_cache(df: pd.DataFrame | None):
     save_cache('adj_factor', df)
 
 
+def load_adj_factor_index() -> Dict[Any, Dict[str, Any]]:
+    """加载复权因子缓存的 ts_code 索引"""
+    return load_cache_index('adj_factor')
+
+
 def load_industry_rps_cache() -> pd.DataFrame | None:
     """加载行业RPS缓存"""
     return load_cache('industry_rps')
@@ -153,31 +498,346 @@ def save_industry_rps_cache(df: pd.DataFrame | None):
     save_cache('industry_rps', df)
 
 
-def load_daily_cache(ts_code: str) -> pd.DataFrame | None:
-    """加载日线数据缓存"""
+def daily_store() -> DailyBarStore:
+    """日线分区存储"""
+    global _daily_store
+    with _daily_store_lock:
+        backend = storage_backend()
+        root = CACHE_DIR / 'daily_bars'
+        store = _daily_store
+        if store is None or store.root != root or store.backend is not backend:
+            if store is not None:
+                _flush_store(store)
+            store = _daily_store = DailyBarStore(
+                root, backend,
+                partition=config.DAILY_STORE_PARTITION,
+                max_deltas=config.DAILY_STORE_MAX_DELTAS,
+                flush_rows=config.DAILY_STORE_FLUSH_ROWS,
+            )
+        return store
+
+
+def _flush_store(store: DailyBarStore):
+    """写入缓冲；所在缓存目录已被删除时丢弃"""
+    if store.root.parent.exists():
+        store.flush()
+    else:
+        store.discard_pending()
+
+
+@atexit.register
+def flush_daily_store():
+    """
+    把日线存储的缓冲写入文件
+
+    由 sync_daily_panel 和 client.flush() (扫描结束) 显式调用；进程退出时的自动调用只是兜底，
+    进程被强制结束时不会执行。
+    """
+    if _daily_store is not None:
+        _flush_store(_daily_store)
+
+
+def _load_legacy_daily(ts_code: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame | None:
+    """旧的单只股票日线文件"""
     cache_name = f"daily_{ts_code.replace('.', '_')}"
-    return load_cache(cache_name)
+    with _lock(cache_name).read():
+        cache_path = get_cache_path(cache_name)
+        if not cache_path.exists():
+            return None
+        try:
+            return _backend_for(cache_path).read(cache_path, columns)
+        except Exception as e:
+            print(f"    [缓存] 加载失败 {cache_path.name}: {e}")
+            return None
+
+
+def load_daily_cache(ts_code: str, columns: Optional[Iterable[str]] = None,
+                     start_date: str = None, end_date: str = None) -> pd.DataFrame | None:
+    """
+    加载日线数据缓存
+
+    优先读取日线存储 (sqlite 模式为数据库，否则为分区存储)，没有该股票时读取旧的单文件缓存。
+
+    Args:
+        columns: 只读取的列
+        start_date / end_date: 只读取该区间 (含两端) 的日线，过滤在存储内完成
+    """
+    store = sql_store()
+    if store is not None:
+        df = store.read_bars(ts_code, start_date=start_date, end_date=end_date, columns=columns)
+    else:
+        df = daily_store().read_stock(ts_code, start_date=start_date, end_date=end_date, columns=columns)
+    if df is not None:
+        return df
+
+    df = _load_legacy_daily(ts_code, columns)
+    if df is None or (start_date is None and end_date is None) or 'trade_date' not in df.columns:
+        return df
+    dates = df['trade_date'].astype(str)
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= dates >= start_date
+    if end_date:
+        mask &= dates <= end_date
+    return df[mask].reset_index(drop=True)
 
 
 def save_daily_cache(ts_code: str, df: pd.DataFrame | None):
-    """保存日线数据缓存"""
+    """
+    保存日线数据缓存 - 按 (ts_code, trade_date) 写入日线存储，已有的日期以新数据为准
+
+    旧的单文件缓存在首次写入时并入存储后删除；没有 trade_date 列的数据无法分区，仍按单文件保存。
+    """
+    if df is None or df.empty:
+        return
+
     cache_name = f"daily_{ts_code.replace('.', '_')}"
-    save_cache(cache_name, df)
+    if 'trade_date' not in df.columns:
+        save_cache(cache_name, df)
+        return
+
+    df = df.assign(ts_code=ts_code)
+    with _lock(cache_name).write():
+        legacy = _load_legacy_daily(ts_code)
+        if legacy is not None and 'trade_date' in legacy.columns:
+            legacy = legacy.assign(ts_code=ts_code)
+            df = pd.concat([legacy.astype({'trade_date': str}), df.astype({'trade_date': str})], ignore_index=True)
+
+        store = sql_store()
+        if store is not None:
+            store.upsert_bars(df)
+        else:
+            daily_store().append(df)
+        _remove_cache_files(cache_name)
+
+
+def read_daily_cross_section(trade_date: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame | None:
+    """已缓存的某个交易日全部股票日线 (按 ts_code 排序)"""
+    store = sql_store()
+    if store is not None:
+        return store.read_bars(trade_date=trade_date, columns=columns)
+    return daily_store().read_cross_section(trade_date, columns=columns)
+
+
+def bar_arrays() -> BarArrayStore:
+    """日线内存映射数组存储"""
+    global _bar_arrays
+    with _bar_arrays_lock:
+        root = CACHE_DIR / 'bar_arrays'
+        if _bar_arrays is None or _bar_arrays.root != root:
+            _bar_arrays = BarArrayStore(root, fields=config.BAR_ARRAY_FIELDS)
+        return _bar_arrays
+
+
+def save_bar_arrays(df: pd.DataFrame | None) -> int:
+    """用全市场日线 (ts_code, trade_date, 价格/成交量) 重建内存映射数组，返回行数"""
+    return bar_arrays().write(df)
+
+
+def build_bar_arrays() -> int:
+    """
+    从已缓存的日线 (数据库或分区存储，没有时用全市场日线面板) 重建内存映射数组
+
+    Returns:
+        写入的行数
+    """
+    store = sql_store()
+    if store is not None:
+        df = store.read_bars(columns=['ts_code', 'trade_date'] + list(config.BAR_ARRAY_FIELDS))
+    else:
+        bars = daily_store()
+        frames = [bars.read_partition(key) for key in bars.partitions()]
+        df = pd.concat(frames, ignore_index=True) if frames else None
+    if df is None or df.empty:
+        df = load_daily_panel_cache()
+
+    rows = save_bar_arrays(df)
+    stats = bar_arrays().stats()
+    print(f"[缓存] 已写入 bar_arrays/: {stats['stocks']} stocks, {rows} rows")
+    return rows
+
+
+def load_daily_panel_cache() -> pd.DataFrame | None:
+    """加载全市场日线面板缓存"""
+    return load_cache('daily_panel')
+
+
+def save_daily_panel_cache(df: pd.DataFrame | None):
+    """保存全市场日线面板缓存"""
+    save_cache('daily_panel', df)
+
+
+def load_adj_factor_panel_cache() -> pd.DataFrame | None:
+    """加载全市场复权因子面板缓存"""
+    return load_cache('adj_factor_panel')
+
+
+def save_adj_factor_panel_cache(df: pd.DataFrame | None):
+    """保存全市场复权因子面板缓存"""
+    save_cache('adj_factor_panel', df)
+
+
+def load_moneyflow_panel_cache() -> pd.DataFrame | None:
+    """加载全市场资金流向面板缓存"""
+    return load_cache('moneyflow_panel')
+
+
+def save_moneyflow_panel_cache(df: pd.DataFrame | None):
+    """保存全市场资金流向面板缓存"""
+    save_cache('moneyflow_panel', df)
+
+
+def load_northbound_flow_cache() -> pd.DataFrame | None:
+    """加载北向资金 (市场级) 缓存"""
+    return load_cache('northbound_flow')
+
+
+def save_northbound_flow_cache(df: pd.DataFrame | None):
+    """保存北向资金 (市场级) 缓存"""
+    save_cache('northbound_flow', df)
+
+
+def load_sw_daily_panel_cache() -> pd.DataFrame | None:
+    """加载申万行业指数日线面板缓存"""
+    return load_cache('sw_daily_panel')
+
+
+def save_sw_daily_panel_cache(df: pd.DataFrame | None):
+    """保存申万行业指数日线面板缓存"""
+    save_cache('sw_daily_panel', df)
+
+
+def load_negative_cache() -> pd.DataFrame | None:
+    """加载空结果缓存"""
+    return load_cache('negative_cache')
+
+
+def save_negative_cache(df: pd.DataFrame | None):
+    """保存空结果缓存"""
+    save_cache('negative_cache', df)
+
+
+def load_stock_list_index() -> Dict[Any, Dict[str, Any]]:
+    """按 ts_code 索引的股票列表缓存"""
+    return load_cache_index('stock_list')
+
+
+def load_stock_list_changes_cache() -> pd.DataFrame | None:
+    """加载股票列表变化流水"""
+    return load_cache('stock_list_changes')
+
+
+def append_stock_list_changes(df: pd.DataFrame | None):
+    """追加股票列表变化流水"""
+    if df is None or df.empty:
+        return
+    with _lock('stock_list_changes').write():
+        history = load_stock_list_changes_cache()
+        if history is not None and not history.empty:
+            df = pd.concat([history.astype(str), df.astype(str)], ignore_index=True)
+        save_cache('stock_list_changes', df)
+
+
+def touch_cache(cache_name: str):
+    """刷新缓存文件的修改时间 (内容未变化时延长有效期，不重写文件)"""
+    store = sql_store()
+    if store is not None and store.updated_at(cache_name) is not None:
+        store.touch(cache_name)
+        return
+    with _lock(cache_name).write():
+        cache_path = get_cache_path(cache_name)
+        if cache_path.exists():
+            cache_path.touch()
+
+
+def drop_cache_rows(cache_name: str, codes, key: str = 'ts_code') -> int:
+    """
+    删除缓存中指定股票的行，文件修改时间保持不变 (不延长其余行的有效期)
+
+    Returns:
+        删除的行数
+    """
+    store = sql_store()
+    if store is not None and store.has_table(cache_name):
+        return store.delete_rows(cache_name, key, [str(code) for code in codes])
+
+    with _lock(cache_name).write():
+        df = load_cache(cache_name)
+        if df is None or key not in df.columns:
+            return 0
+
+        mask = df[key].astype(str).isin(set(codes))
+        dropped = int(mask.sum())
+        if not dropped:
+            return 0
+
+        stat = get_cache_path(cache_name).stat()
+        if dropped == len(df):
+            clear_cache_by_name(cache_name)
+        else:
+            save_cache(cache_name, df[~mask])
+            if store is not None:
+                store.touch(cache_name, stat.st_mtime)
+            else:
+                cache_path = get_cache_path(cache_name)
+                os.utime(cache_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                _invalidate_index(cache_path)
+    return dropped
+
+
+def delete_daily_cache(ts_codes: Iterable[str]) -> int:
+    """删除股票的日线缓存 (分区存储中的行及旧的单文件)，返回删除的行数"""
+    ts_codes = list(ts_codes)
+    store = sql_store()
+    deleted = store.delete_bars(ts_codes) if store is not None else daily_store().delete(ts_codes)
+    for ts_code in ts_codes:
+        cache_name = f"daily_{ts_code.replace('.', '_')}"
+        with _lock(cache_name).write():
+            for cache_path in _cache_files(cache_name):
+                _invalidate_index(cache_path)
+                cache_path.unlink(missing_ok=True)
+                deleted += 1
+    return deleted
+
+
+def _cache_files(cache_name: str = '*') -> list:
+    """缓存目录中名为 cache_name 的文件 (所有格式)"""
+    ensure_cache_dir()
+    suffixes = dict.fromkeys(SUFFIXES + (storage_backend().suffix,))
+    return [path for suffix in suffixes for path in CACHE_DIR.glob(f"{cache_name}{suffix}")]
 
 
 def clear_all_cache():
     """清空所有缓存"""
     ensure_cache_dir()
-    for file in CACHE_DIR.glob("*.csv"):
-        file.unlink()
+    for file in _cache_files():
+        with _lock(file.stem).write():
+            _invalidate_index(file)
+            file.unlink(missing_ok=True)
+    global _daily_store
+    with _daily_store_lock:
+        if _daily_store is not None:
+            _daily_store.discard_pending()
+            _daily_store = None
+    shutil.rmtree(CACHE_DIR / 'daily_bars', ignore_errors=True)
+    bar_arrays().close()
+    shutil.rmtree(CACHE_DIR / 'bar_arrays', ignore_errors=True)
+    store = sql_store()
+    if store is not None:
+        store.clear()
     print("[缓存] 已清空所有缓存")
 
 
 def clear_cache_by_name(cache_name: str):
     """清空指定缓存"""
-    cache_path = get_cache_path(cache_name)
-    if cache_path.exists():
-        cache_path.unlink()
+    with _lock(cache_name).write():
+        files = _cache_files(cache_name)
+        for cache_path in files:
+            _invalidate_index(cache_path)
+            cache_path.unlink(missing_ok=True)
+    store = sql_store()
+    dropped = store is not None and store.drop_table(cache_name)
+    if files or dropped:
         print(f"[缓存] 已清空 {cache_name}")
 
 
@@ -190,8 +850,25 @@ def print_cache_status():
         # stdout可能已关闭，忽略
         pass
 
-    files = list(CACHE_DIR.glob("*.csv"))
-    if not files:
+    files = _cache_files()
+    store = sql_store()
+    if store is not None:
+        stats = store.stats()
+        print(f"  {store.path.name}: {stats['tables']} tables, {stats['bars']} bars")
+        for cache_name in store.tables():
+            age = get_cache_age(cache_name)
+            status = "OK" if age < CACHE_EXPIRY.get(cache_name, 7) else "EXPIRED"
+            print(f"    {cache_name}: {age}days {status}")
+
+    bars = daily_store()
+    if bars.root.exists():
+        stats = bars.stats()
+        print(f"  daily_bars/: {stats['partitions']} partitions, {stats['deltas']} deltas")
+    arrays = bar_arrays()
+    if arrays.exists():
+        stats = arrays.stats()
+        print(f"  bar_arrays/: {stats['stocks']} stocks, {stats['rows']} rows")
+    if not bars.root.exists() and not arrays.exists() and not files and store is None:
         print("  (no cache files)")
         return
 
@@ -205,4 +882,9 @@ def print_cache_status():
 
 
 if __name__ == "__main__":
+    import sys
+    if '--migrate' in sys.argv:
+        migrate_cache()
+    if '--build-arrays' in sys.argv:
+        build_bar_arrays()
     print_cache_status()
@@ -0,0 +1,61 @@
+"""
+数据类型压缩
+功能：
+1. 浮点列压缩为 float32，整数列按取值范围压缩 (int8 ~ int32)
+2. 代码类字段 (ts_code 等) 转为 category，全市场面板中每个代码只存一份
+3. 日期字段 (YYYYMMDD) 转为 int32，对外返回前再还原为字符串
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def compact_frame(df: pd.DataFrame, category_cols: Iterable[str] = ('ts_code',),
+                  date_cols: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    压缩 DataFrame 的数据类型 (返回新DataFrame)
+
+    Args:
+        df: 原始数据
+        category_cols: 转为 category 的列
+        date_cols: 转为 int32 的 YYYYMMDD 日期列
+
+    Returns:
+        压缩后的 DataFrame
+    """
+    if df is None or df.empty:
+        return df
+
+    df = df.copy()
+    category_cols = [c for c in category_cols if c in df.columns]
+    date_cols = [c for c in date_cols if c in df.columns]
+
+    for col in date_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(np.int32)
+
+    for col in category_cols:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str).astype('category')
+
+    for col in df.columns:
+        if col in date_cols or col in category_cols:
+            continue
+        dtype = df[col].dtype
+        if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+            df[col] = df[col].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    return df
+
+
+def expand_frame(df: pd.DataFrame, category_cols: Iterable[str] = ('ts_code',),
+                 date_cols: Iterable[str] = ('trade_date',)) -> pd.DataFrame:
+    """还原代码与日期列为字符串 (压缩面板切出的单只股票数据对外返回前调用)，数值列保持 float32"""
+    if df is None or df.empty:
+        return df
+
+    conversions = {c: str for c in list(category_cols) + list(date_cols) if c in df.columns}
+    return df.astype(conversions) if conversions else df
@@ -0,0 +1,180 @@
+"""
+缓存文件锁
+功能：
+1. 读写锁 (RWLock)：同一缓存的多个读取并行，写入独占；不同缓存互不阻塞
+2. 进程间建议锁 (fcntl.flock)：定时刷新与交互运行的进程同时访问同一缓存时互斥
+3. 原子写入：先写同目录临时文件再替换，读取方不会看到写了一半的文件
+
+锁文件统一放在缓存目录的 .locks/ 下，不随缓存删除。
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_DIR_NAME = '.locks'
+
+
+@contextmanager
+def file_lock(lock_path: Path, shared: bool = False):
+    """
+    进程间建议锁 (阻塞直到获得)
+
+    Args:
+        lock_path: 锁文件 (不存在时创建)
+        shared: True 为共享锁 (读)，False 为独占锁 (写)
+
+    Windows 没有共享锁，读取不加进程锁 (写入为原子替换)，写入使用独占锁。
+    """
+    if fcntl is None and shared:
+        yield
+        return
+
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 重试 10 次后失败，继续等待
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+class RWLock:
+    """
+    读写锁 - 写优先 (有写入等待时新的读取排队)，同时持有进程间文件锁
+
+    同一线程可重入：持有写锁时可再获取读锁或写锁，持有读锁时可再获取读锁。
+
+    Args:
+        lock_path: 进程间锁文件，为None时只做线程间互斥
+    """
+
+    def __init__(self, lock_path: Path = None):
+        self.lock_path = lock_path
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def _read_depth(self) -> int:
+        return getattr(self._local, 'reads', 0)
+
+    @contextmanager
+    def read(self):
+        """读锁"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or self._read_depth():
+                # 重入: 已持有写锁或读锁
+                self._local.reads = self._read_depth() + 1
+                nested = True
+            else:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+                self._local.reads = 1
+                nested = False
+        try:
+            if nested or self.lock_path is None:
+                yield
+            else:
+                with file_lock(self.lock_path, shared=True):
+                    yield
+        finally:
+            with self._cond:
+                self._local.reads -= 1
+                if not nested:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """写锁"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                nested = True
+            else:
+                if self._read_depth():
+                    raise RuntimeError("持有读锁时不能升级为写锁")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+                self._write_depth = 1
+                nested = False
+        try:
+            if nested or self.lock_path is None:
+                yield
+            else:
+                with file_lock(self.lock_path):
+                    yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+_locks: Dict[str, RWLock] = {}
+_locks_lock = threading.Lock()
+
+
+def cache_lock(cache_dir: Path, name: str) -> RWLock:
+    """缓存目录中名为 name 的缓存的读写锁 (同一缓存共用一把锁)"""
+    lock_path = Path(cache_dir) / LOCK_DIR_NAME / f"{name}.lock"
+    key = str(lock_path)
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = RWLock(lock_path)
+        return lock
+
+
+def atomic_write(path: Path, write: Callable[[Path], None]):
+    """
+    原子写入: write(临时路径) 写完后替换 path，失败时删除临时文件
+
+    临时文件与目标同目录 (同一文件系统，替换为原子操作)，名称以 . 开头、.tmp 结尾，不会被当作缓存文件。
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
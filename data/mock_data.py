@@ -15,6 +15,7 @@ from typing import Dict, Any
 # 3. fina_indicator: ts_code, ann_date, end_date, roe(%)
 # 4. adj_factor: ts_code, trade_date, adj_factor
 # 5. daily: ts_code, trade_date, open, high, low, close, pre_close, change, pct_chg, vol(手), amount(千元)
+#    daily(trade_date=...) 一次返回全市场当日数据
 # 6. moneyflow_hsgt: trade_date, ggt_ss, ggt_sz, hgt, sgt, north_money, south_money
 # 7. moneyflow: ts_code, trade_date, buy_sm_vol, ..., net_mf_vol, net_mf_amount
 
@@ -162,19 +163,22 @@ def generate_mock_daily_data(ts_code: str, days: int = 120) -> pd.DataFrame:
 
 
 def generate_mock_industry_rps() -> pd.DataFrame:
-    """生成模拟行业RPS数据"""
+    """
+    生成模拟行业多周期涨幅 (%)
+    注意: 百分位RPS由 indicators/rps.py 按涨幅计算
+    """
     data = [
-        {'industry': '电气设备', 'rps': 8.5, 'trend': 'up'},
-        {'industry': '元器件', 'rps': 7.8, 'trend': 'up'},
-        {'industry': '专用机械', 'rps': 7.2, 'trend': 'up'},
-        {'industry': '软件服务', 'rps': 6.9, 'trend': 'up'},
-        {'industry': '汽车配件', 'rps': 6.5, 'trend': 'up'},
-        {'industry': '半导体', 'rps': 6.2, 'trend': 'up'},
-        {'industry': '医药', 'rps': 5.8, 'trend': 'down'},
-        {'industry': '银行', 'rps': 5.2, 'trend': 'down'},
+        {'industry': '电气设备', 'ret_5': 3.1, 'ret_20': 8.5, 'ret_60': 15.2, 'trend': 'up'},
+        {'industry': '元器件', 'ret_5': 2.4, 'ret_20': 7.8, 'ret_60': 12.0, 'trend': 'up'},
+        {'industry': '专用机械', 'ret_5': 1.9, 'ret_20': 7.2, 'ret_60': 9.6, 'trend': 'up'},
+        {'industry': '软件服务', 'ret_5': 2.2, 'ret_20': 6.9, 'ret_60': 8.1, 'trend': 'up'},
+        {'industry': '汽车配件', 'ret_5': 1.1, 'ret_20': 6.5, 'ret_60': 10.4, 'trend': 'up'},
+        {'industry': '半导体', 'ret_5': 0.8, 'ret_20': 6.2, 'ret_60': 11.3, 'trend': 'up'},
+        {'industry': '医药', 'ret_5': -0.6, 'ret_20': 5.8, 'ret_60': 2.5, 'trend': 'down'},
+        {'industry': '银行', 'ret_5': -1.2, 'ret_20': 5.2, 'ret_60': -1.8, 'trend': 'down'},
     ]
     df = pd.DataFrame(data)
-    return df.sort_values('rps', ascending=False).reset_index(drop=True)
+    return df.sort_values('ret_20', ascending=False).reset_index(drop=True)
 
 
 def generate_mock_northbound_funds(ts_code: str) -> Dict[str, Any]:
@@ -212,6 +216,13 @@ def generate_mock_main_funds(ts_code: str) -> Dict[str, Any]:
     }
 
 
+def _page(df: pd.DataFrame, limit=None, offset=0) -> pd.DataFrame:
+    """按 limit/offset 分页 (与 Tushare 一致，limit 为空时返回全部)"""
+    if not limit:
+        return df
+    return df.iloc[offset:offset + limit].reset_index(drop=True)
+
+
 class MockTushareClient:
     """Mock Tushare 客户端 - 与真实API返回格式一致"""
     
@@ -220,6 +231,8 @@ class MockTushareClient:
         self._market_cap = generate_mock_market_cap()
         self._financial_ttm = generate_mock_financial_ttm()
         self._adj_factor = generate_mock_adj_factor()
+        self._daily_panel = None
+        self._sw_panel = None
     
     def stock_basic(self, exchange='', list_status='L', fields=None):
         """获取股票列表"""
@@ -232,19 +245,24 @@ class MockTushareClient:
             return df[field_list]
         return df
     
-    def daily_basic(self, ts_code=None, fields='total_mv'):
-        """获取市值数据"""
+    def daily_basic(self, ts_code=None, trade_date=None, start_date=None, end_date=None,
+                    fields='total_mv', limit=None, offset=0):
+        """获取市值数据 - ts_code 支持逗号分隔多只，trade_date 返回全市场，支持分页"""
+        df = self._market_cap.copy()
         if ts_code:
-            df = self._market_cap[self._market_cap['ts_code'] == ts_code]
-            if fields:
-                field_list = fields.split(',')
-                # 确保包含需要的字段
-                for f in field_list:
-                    if f not in df.columns:
-                        df[f] = 0
-                return df[field_list]
-            return df
-        return self._market_cap
+            df = df[df['ts_code'].isin(ts_code.split(','))]
+        if trade_date:
+            # 模拟数据只有最新一期，视为该交易日的数据
+            df['trade_date'] = trade_date
+        df = _page(df.reset_index(drop=True), limit, offset)
+        if fields:
+            field_list = fields.split(',')
+            # 确保包含需要的字段
+            for f in field_list:
+                if f not in df.columns:
+                    df[f] = 0
+            return df[field_list]
+        return df
     
     def fina_indicator(self, ts_code, fields=None):
         """获取财务指标"""
@@ -258,23 +276,109 @@ class MockTushareClient:
             return df[field_list]
         return df
     
-    def adj_factor(self, ts_code):
-        """获取复权因子"""
-        return self._adj_factor[self._adj_factor['ts_code'] == ts_code]
+    def fina_indicator_vip(self, period, start_date=None, end_date=None, fields=None,
+                           limit=None, offset=0):
+        """按报告期获取全市场财务指标 - 支持分页"""
+        df = self._financial_ttm[self._financial_ttm['end_date'] == period].copy()
+        if start_date:
+            df = df[df['ann_date'] >= start_date]
+        if end_date:
+            df = df[df['ann_date'] <= end_date]
+        df = df.sort_values('ts_code').reset_index(drop=True)
+        if limit:
+            df = df.iloc[offset:offset + limit]
+        if fields:
+            field_list = fields.split(',')
+            for f in field_list:
+                if f not in df.columns:
+                    df[f] = 0
+            return df[field_list]
+        return df
+    
+    def adj_factor(self, ts_code=None, trade_date=None, start_date=None, end_date=None,
+                   limit=None, offset=0):
+        """获取复权因子 - 支持按 trade_date 获取全市场，支持分页"""
+        if trade_date:
+            # 每只股票取该日之前最近一期因子，没有因子的股票为1.0
+            rows = []
+            for code in self._stock_list['ts_code']:
+                history = self._adj_factor[
+                    (self._adj_factor['ts_code'] == code) &
+                    (self._adj_factor['trade_date'] <= trade_date)
+                ].sort_values('trade_date')
+                factor = float(history['adj_factor'].iloc[-1]) if not history.empty else 1.0
+                rows.append({'ts_code': code, 'trade_date': trade_date, 'adj_factor': factor})
+            return _page(pd.DataFrame(rows), limit, offset)
+        
+        df = self._adj_factor[self._adj_factor['ts_code'] == ts_code]
+        if start_date:
+            df = df[df['trade_date'] >= start_date]
+        if end_date:
+            df = df[df['trade_date'] <= end_date]
+        return df
     
-    def daily(self, ts_code, start_date, end_date):
-        """获取日线数据"""
-        days = (datetime.datetime.strptime(end_date, '%Y%m%d') - 
-                datetime.datetime.strptime(start_date, '%Y%m%d')).days + 1
-        return generate_mock_daily_data(ts_code, min(days, 120))
+    def daily(self, ts_code=None, start_date=None, end_date=None, trade_date=None, fields=None,
+              limit=None, offset=0):
+        """获取日线数据 - 支持按 trade_date 获取全市场，fields 指定返回字段，支持分页"""
+        if trade_date:
+            panel = self._get_daily_panel()
+            df = panel[panel['trade_date'] == trade_date].reset_index(drop=True)
+        else:
+            days = (datetime.datetime.strptime(end_date, '%Y%m%d') - 
+                    datetime.datetime.strptime(start_date, '%Y%m%d')).days + 1
+            df = generate_mock_daily_data(ts_code, min(days, 120))
+        
+        if fields:
+            df = df[[f for f in fields.split(',') if f in df.columns]]
+        return _page(df, limit, offset)
     
-    def moneyflow_hsgt(self, ts_code, start_date, end_date):
-        """获取北向资金"""
-        return pd.DataFrame(generate_mock_northbound_funds(ts_code))
+    def _get_daily_panel(self) -> pd.DataFrame:
+        """全市场模拟日线 (每只股票生成一次)"""
+        if self._daily_panel is None:
+            frames = [generate_mock_daily_data(code, 120) for code in self._stock_list['ts_code']]
+            self._daily_panel = pd.concat(frames, ignore_index=True)
+        return self._daily_panel
+    
+    def trade_cal(self, exchange='SSE', start_date=None, end_date=None, is_open=None):
+        """获取交易日历 - 周一至周五视为交易日"""
+        dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        df = pd.DataFrame({
+            'exchange': exchange,
+            'cal_date': [d.strftime('%Y%m%d') for d in dates],
+            'is_open': [1 if d.weekday() < 5 else 0 for d in dates],
+        })
+        if is_open is not None:
+            df = df[df['is_open'] == int(is_open)]
+        return df.reset_index(drop=True)
     
-    def moneyflow(self, ts_code, start_date, end_date):
-        """获取主力资金"""
-        return pd.DataFrame(generate_mock_main_funds(ts_code))
+    def moneyflow_hsgt(self, ts_code=None, start_date=None, end_date=None):
+        """获取北向资金 (市场级，按日期)"""
+        df = pd.DataFrame(generate_mock_northbound_funds(ts_code or 'HSGT'))
+        if start_date:
+            df = df[df['trade_date'] >= start_date]
+        if end_date:
+            df = df[df['trade_date'] <= end_date]
+        return df.reset_index(drop=True)
+    
+    def moneyflow(self, ts_code=None, start_date=None, end_date=None, trade_date=None, fields=None,
+                  limit=None, offset=0):
+        """获取主力资金 - 支持按 trade_date 获取全市场，支持分页"""
+        if trade_date:
+            rows = []
+            for code in self._stock_list['ts_code']:
+                np.random.seed((hash(code) + int(trade_date)) % 10000)
+                rows.append({
+                    'ts_code': code,
+                    'trade_date': trade_date,
+                    'net_mf_amount': float(np.random.randint(-50000, 20000)),
+                })
+            df = pd.DataFrame(rows)
+        else:
+            df = pd.DataFrame(generate_mock_main_funds(ts_code))
+        
+        if fields:
+            df = df[[f for f in fields.split(',') if f in df.columns]]
+        return _page(df, limit, offset)
     
     def index_classify(self):
         """获取行业分类 - 使用正确的接口"""
@@ -292,9 +396,14 @@ class MockTushareClient:
         ]
         return pd.DataFrame(data)
     
-    def sw_daily(self, index_code, start_date):
-        """获取申万行业日线数据"""
-        return generate_mock_daily_data(index_code, 30)
+    def sw_daily(self, ts_code=None, trade_date=None, start_date=None, end_date=None, index_code=None):
+        """获取申万行业日线数据 - 支持按 trade_date 获取全部行业指数"""
+        if trade_date:
+            if self._sw_panel is None:
+                frames = [generate_mock_daily_data(code, 120) for code in self.index_classify()['index_code']]
+                self._sw_panel = pd.concat(frames, ignore_index=True)
+            return self._sw_panel[self._sw_panel['trade_date'] == trade_date].reset_index(drop=True)
+        return generate_mock_daily_data(ts_code or index_code, 30)
     
     def index_daily(self, ts_code, start_date, end_date):
         """获取指数日线数据 - 兼容旧接口"""
@@ -0,0 +1,174 @@
+"""
+空结果缓存 (negative cache)
+功能：
+1. 记录接口对某只股票返回空数据 (停牌、退市、新上市等)，持久化到 data_cache/negative_cache.csv
+2. 按 (接口, 原因) 设置过期时间，过期后重新请求
+3. 下次运行直接跳过已知为空的股票，不再发起网络请求
+4. 变化先记在内存，每 flush_every 条或扫描结束时批量写入；写入时在缓存写锁内与文件合并，不覆盖其他进程的记录
+"""
+
+import datetime
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from data import cache_manager
+
+COLUMNS = ['api_name', 'ts_code', 'reason', 'recorded_at', 'expires_at']
+
+TIME_FORMAT = '%Y%m%d%H%M%S'
+
+# 未配置的 (接口, 原因) 默认过期天数
+DEFAULT_EXPIRY_DAYS = 1
+
+# 默认每累计多少条变化写入一次文件
+DEFAULT_FLUSH_EVERY = 200
+
+Entry = Tuple[str, datetime.datetime, datetime.datetime]
+
+
+class NegativeCache:
+    """
+    空结果缓存 - 线程安全
+
+    Args:
+        expiry: {接口名: {原因: 过期天数}}，未列出的组合使用 DEFAULT_EXPIRY_DAYS
+        flush_every: 未写入的变化达到该数量时写入文件
+    """
+
+    def __init__(self, expiry: Optional[Dict[str, Dict[str, float]]] = None,
+                 flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.expiry = expiry or {}
+        self.flush_every = flush_every
+        self._entries: Optional[Dict[Tuple[str, str], Entry]] = None
+        # 未写入文件的变化: {(接口, 代码): 记录}，None 表示删除
+        self._dirty: Dict[Tuple[str, str], Optional[Entry]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def expiry_days(self, api_name: str, reason: str) -> float:
+        """(接口, 原因) 的过期天数"""
+        return self.expiry.get(api_name, {}).get(reason, DEFAULT_EXPIRY_DAYS)
+
+    def _load(self):
+        """首次使用时从文件加载，丢弃已过期的记录 (调用方需持有锁)"""
+        if self._entries is not None:
+            return
+        self._entries = self._parse(cache_manager.load_negative_cache())
+
+    @staticmethod
+    def _parse(df: Optional[pd.DataFrame]) -> Dict[Tuple[str, str], Entry]:
+        """文件内容转为记录，丢弃已过期的"""
+        entries = {}
+        if df is None or df.empty:
+            return entries
+        now = datetime.datetime.now()
+        for row in df.astype(str).itertuples(index=False):
+            expires_at = datetime.datetime.strptime(row.expires_at, TIME_FORMAT)
+            if expires_at > now:
+                recorded_at = datetime.datetime.strptime(row.recorded_at, TIME_FORMAT)
+                entries[(row.api_name, row.ts_code)] = (row.reason, recorded_at, expires_at)
+        return entries
+
+    @staticmethod
+    def _to_frame(entries: Dict[Tuple[str, str], Entry]) -> Optional[pd.DataFrame]:
+        rows = [
+            (api_name, ts_code, reason, recorded_at.strftime(TIME_FORMAT), expires_at.strftime(TIME_FORMAT))
+            for (api_name, ts_code), (reason, recorded_at, expires_at) in entries.items()
+        ]
+        return pd.DataFrame(rows, columns=COLUMNS) if rows else None
+
+    def _mark(self, key: Tuple[str, str], entry: Optional[Entry]):
+        """记下一条变化，达到 flush_every 时写入 (调用方需持有锁)"""
+        self._dirty[key] = entry
+        if len(self._dirty) >= self.flush_every:
+            self._flush()
+
+    def flush(self):
+        """把未写入的变化合并进文件 (扫描结束时调用)"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        """
+        在缓存写锁内重新读取文件，叠加本进程的变化后写回 (调用方需持有锁)
+
+        合并后的内容同时作为内存中的记录，其他进程写入的记录随之可见。
+        """
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+
+        def merge(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+            entries = self._parse(df)
+            for key, entry in dirty.items():
+                if entry is None:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = entry
+            self._entries = entries
+            return self._to_frame(entries)
+
+        try:
+            cache_manager.merge_cache('negative_cache', merge)
+        except Exception:
+            # 写入失败时保留变化，下次再写
+            dirty.update(self._dirty)
+            self._dirty = dirty
+            raise
+
+    def get(self, api_name: str, ts_code: str) -> Optional[str]:
+        """已知为空时返回原因，否则返回None"""
+        with self._lock:
+            self._load()
+            entry = self._entries.get((api_name, ts_code))
+            if entry is None:
+                return None
+            if entry[2] <= datetime.datetime.now():
+                del self._entries[(api_name, ts_code)]
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def add(self, api_name: str, ts_code: str, reason: str):
+        """记录一次空结果 (批量写入文件)"""
+        now = datetime.datetime.now()
+        expires_at = now + datetime.timedelta(days=self.expiry_days(api_name, reason))
+        with self._lock:
+            self._load()
+            entry = (reason, now, expires_at)
+            self._entries[(api_name, ts_code)] = entry
+            self._mark((api_name, ts_code), entry)
+
+    def discard(self, api_name: str, ts_code: str):
+        """删除记录 (如已拿到数据)"""
+        with self._lock:
+            self._load()
+            if self._entries.pop((api_name, ts_code), None) is not None:
+                self._mark((api_name, ts_code), None)
+
+    def discard_code(self, ts_code: str) -> int:
+        """删除某只股票在所有接口上的记录 (如新上市)，返回删除数量"""
+        with self._lock:
+            self._load()
+            keys = [key for key in self._entries if key[1] == ts_code]
+            for key in keys:
+                del self._entries[key]
+                self._mark(key, None)
+            return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    def summary(self) -> Dict[str, int]:
+        """按 接口/原因 统计记录数"""
+        with self._lock:
+            self._load()
+            counts: Dict[str, int] = {}
+            for (api_name, _), (reason, _, _) in self._entries.items():
+                key = f"{api_name}/{reason}"
+                counts[key] = counts.get(key, 0) + 1
+            return counts
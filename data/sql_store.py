@@ -0,0 +1,319 @@
+"""
+SQLite 缓存存储
+功能：
+1. 所有缓存存入一个 SQLite 文件 (data_cache/cache.db)，CACHE_FORMAT = 'sqlite' 时启用
+2. 日线为 (ts_code, trade_date) 主键表，另建 trade_date 索引；
+   区间查询与单日截面在数据库内完成过滤，不再整表读取后比较字符串
+3. 市值/财务/复权因子等表按 ts_code 建索引
+4. 写入均在事务内完成 (整表替换或按主键 upsert)，读取方不会看到写了一半的数据
+
+每张表的更新时间记录在 cache_meta 中，代替文件修改时间判断缓存有效期。
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BARS_TABLE = 'daily_bars'
+
+BAR_KEYS = ('ts_code', 'trade_date')
+
+# 需要按 ts_code 建索引的表
+INDEXED_TABLES = ('market_cap', 'financial_ttm', 'adj_factor', 'stock_list')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS cache_meta (
+    name TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS {BARS_TABLE} (
+    ts_code TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    PRIMARY KEY (ts_code, trade_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_{BARS_TABLE}_trade_date ON {BARS_TABLE} (trade_date);
+"""
+
+
+def _quote(name: str) -> str:
+    """SQL 标识符加引号"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    """DataFrame 列类型对应的 SQLite 类型"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _rows(df: pd.DataFrame) -> List[tuple]:
+    """转为可绑定的 Python 值 (numpy 标量转为 float/int，缺失值为 NULL)"""
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(str)
+        if pd.api.types.is_float_dtype(series.dtype):
+            series = series.astype(np.float64)
+        values = series.tolist()
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            values = [None if isinstance(v, float) and v != v else v for v in values]
+        columns.append(values)
+    return list(zip(*columns))
+
+
+class SqliteStore:
+    """
+    SQLite 缓存存储 - 每个线程使用独立连接
+
+    Args:
+        path: 数据库文件路径
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """当前线程的连接 (WAL 模式，读写互不阻塞)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # 自动提交模式，事务由 _transaction 显式开启 (DDL 也包含在事务内)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """写事务 - 异常时回滚"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    # ==========================================
+    # 表结构与元数据
+    # ==========================================
+
+    def _columns(self, conn: sqlite3.Connection, table: str) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _ensure_columns(self, conn: sqlite3.Connection, table: str, df: pd.DataFrame):
+        """为表补充 df 中新出现的列"""
+        existing = set(self._columns(conn, table))
+        for col in df.columns:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)} {_sql_type(df[col].dtype)}")
+
+    @staticmethod
+    def _mark_updated(conn: sqlite3.Connection, name: str, touch: bool = True):
+        """更新表的版本号；touch 为 True 时同时刷新更新时间"""
+        now = time.time()
+        conn.execute(
+            "INSERT INTO cache_meta (name, updated_at, version) VALUES (?, ?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1"
+            + (", updated_at = excluded.updated_at" if touch else ""),
+            (name, now),
+        )
+
+    def has_table(self, name: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        return row is not None
+
+    def tables(self) -> List[str]:
+        """已保存的缓存表 (不含日线表)"""
+        return [row[0] for row in self._conn().execute("SELECT name FROM cache_meta ORDER BY name")]
+
+    def updated_at(self, name: str) -> Optional[float]:
+        """表的更新时间 (时间戳)，不存在返回None"""
+        row = self._conn().execute("SELECT updated_at FROM cache_meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def version(self, name: str) -> Optional[int]:
+        """表的版本号 (每次写入加一)，不存在返回None"""
+        row = self._conn().execute("SELECT version FROM cache_meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, name: str, updated_at: float = None):
+        """设置表的更新时间 (默认当前时间)"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE cache_meta SET updated_at = ? WHERE name = ?",
+                         (time.time() if updated_at is None else updated_at, name))
+
+    # ==========================================
+    # 普通缓存表
+    # ==========================================
+
+    def read_table(self, name: str, columns: Iterable[str] = None) -> Optional[pd.DataFrame]:
+        """按写入顺序读取整表，columns 为只读取的列；表不存在返回None"""
+        if name == BARS_TABLE or not self.has_table(name):
+            return None
+        conn = self._conn()
+        if columns is None:
+            select = '*'
+        else:
+            existing = set(self._columns(conn, name))
+            select = ', '.join(_quote(col) for col in columns if col in existing) or 'rowid'
+        df = pd.read_sql_query(f"SELECT {select} FROM {_quote(name)} ORDER BY rowid", conn)
+        return df.drop(columns=['rowid'], errors='ignore') if select == 'rowid' else df
+
+    def write_table(self, name: str, df: pd.DataFrame, updated_at: float = None):
+        """整表替换 (单个事务)"""
+        if name in ('cache_meta', BARS_TABLE):
+            raise ValueError(f"保留的表名: {name}")
+        with self._transaction() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+            definition = ', '.join(f"{_quote(col)} {_sql_type(df[col].dtype)}" for col in df.columns)
+            conn.execute(f"CREATE TABLE {_quote(name)} ({definition})")
+            if name in INDEXED_TABLES and 'ts_code' in df.columns:
+                conn.execute(f"CREATE INDEX {_quote('idx_' + name + '_ts_code')} ON {_quote(name)} (ts_code)")
+            self._insert(conn, name, df)
+            self._mark_updated(conn, name)
+            if updated_at is not None:
+                conn.execute("UPDATE cache_meta SET updated_at = ? WHERE name = ?", (updated_at, name))
+
+    def upsert_table(self, name: str, df: pd.DataFrame, keys: Iterable[str] = ('ts_code',)):
+        """按 keys 更新或插入行 (单个事务)，表不存在时创建"""
+        if not self.has_table(name):
+            self.write_table(name, df)
+            return
+        keys = list(keys)
+        with self._transaction() as conn:
+            self._ensure_columns(conn, name, df)
+            where = ' AND '.join(f"{_quote(key)} = ?" for key in keys)
+            conn.executemany(f"DELETE FROM {_quote(name)} WHERE {where}", _rows(df[keys].drop_duplicates()))
+            self._insert(conn, name, df)
+            self._mark_updated(conn, name)
+
+    def delete_rows(self, name: str, key: str, values: Iterable) -> int:
+        """删除 key 在 values 中的行 (不刷新更新时间)，返回删除的行数"""
+        if not self.has_table(name) or key not in self._columns(self._conn(), name):
+            return 0
+        with self._transaction() as conn:
+            deleted = conn.executemany(
+                f"DELETE FROM {_quote(name)} WHERE {_quote(key)} = ?", [(v,) for v in values]
+            ).rowcount
+            if deleted:
+                self._mark_updated(conn, name, touch=False)
+        return deleted
+
+    def drop_table(self, name: str) -> bool:
+        """删除缓存表"""
+        with self._transaction() as conn:
+            existed = conn.execute("DELETE FROM cache_meta WHERE name = ?", (name,)).rowcount > 0
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+        return existed
+
+    def clear(self):
+        """删除所有缓存表并清空日线"""
+        for name in self.tables():
+            self.drop_table(name)
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM {BARS_TABLE}")
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, table: str, df: pd.DataFrame):
+        columns = ', '.join(_quote(col) for col in df.columns)
+        placeholders = ', '.join('?' * len(df.columns))
+        conn.executemany(f"INSERT INTO {_quote(table)} ({columns}) VALUES ({placeholders})", _rows(df))
+
+    # ==========================================
+    # 日线
+    # ==========================================
+
+    def upsert_bars(self, df: pd.DataFrame):
+        """按 (ts_code, trade_date) 更新或插入日线 (单个事务)"""
+        if df is None or df.empty:
+            return
+        df = df.astype({'ts_code': str, 'trade_date': str}).drop_duplicates(subset=list(BAR_KEYS), keep='last')
+        with self._transaction() as conn:
+            self._ensure_columns(conn, BARS_TABLE, df)
+            columns = ', '.join(_quote(col) for col in df.columns)
+            placeholders = ', '.join('?' * len(df.columns))
+            updates = ', '.join(f"{_quote(col)} = excluded.{_quote(col)}" for col in df.columns if col not in BAR_KEYS)
+            conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            conn.executemany(
+                f"INSERT INTO {BARS_TABLE} ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(ts_code, trade_date) {conflict}",
+                _rows(df),
+            )
+
+    def read_bars(self, ts_code: str = None, start_date: str = None, end_date: str = None,
+                  trade_date: str = None, columns: Iterable[str] = None) -> Optional[pd.DataFrame]:
+        """
+        按条件读取日线 (过滤在数据库内完成)
+
+        Args:
+            ts_code: 单只股票，按 trade_date 升序
+            start_date / end_date: 日期区间 (含两端)
+            trade_date: 单日截面，按 ts_code 升序
+            columns: 只读取的列
+
+        Returns:
+            DataFrame，没有匹配的行时返回None
+        """
+        conn = self._conn()
+        if columns is None:
+            select = '*'
+        else:
+            existing = set(self._columns(conn, BARS_TABLE))
+            select = ', '.join(_quote(col) for col in columns if col in existing) or 'ts_code'
+
+        conditions, params = [], []
+        for clause, value in (('ts_code = ?', ts_code), ('trade_date = ?', trade_date),
+                              ('trade_date >= ?', start_date), ('trade_date <= ?', end_date)):
+            if value is not None:
+                conditions.append(clause)
+                params.append(str(value))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        df = pd.read_sql_query(f"SELECT {select} FROM {BARS_TABLE}{where} ORDER BY ts_code, trade_date", conn,
+                               params=params)
+        if df.empty:
+            return None
+        if columns is not None and select == 'ts_code' and 'ts_code' not in columns:
+            df = df.drop(columns=['ts_code'])
+        return df
+
+    def delete_bars(self, ts_codes: Iterable[str]) -> int:
+        """删除股票的全部日线，返回删除的行数"""
+        with self._transaction() as conn:
+            return conn.executemany(f"DELETE FROM {BARS_TABLE} WHERE ts_code = ?",
+                                    [(code,) for code in ts_codes]).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """缓存表数与日线行数"""
+        bars = self._conn().execute(f"SELECT COUNT(*) FROM {BARS_TABLE}").fetchone()[0]
+        return {'tables': len(self.tables()), 'bars': bars}
@@ -0,0 +1,97 @@
+"""
+股票列表差异
+功能：
+1. 对比新旧股票列表，得到新上市、退市、更名、行业调整四类变化
+2. 变化记录转为流水 (stock_list_changes.csv)，便于追溯
+3. 刷新股票列表时只让受影响股票的缓存失效，其余缓存继续有效
+"""
+
+from typing import Dict
+
+import pandas as pd
+
+# 变化类型
+CHANGE_TYPES = ('listed', 'delisted', 'renamed', 'reclassified')
+
+CHANGE_LABELS = {
+    'listed': '新上市',
+    'delisted': '退市',
+    'renamed': '更名',
+    'reclassified': '行业调整',
+}
+
+CHANGE_COLUMNS = ['change_date', 'change', 'ts_code', 'old_value', 'new_value']
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """按 ts_code 去重建立索引，名称和行业统一为字符串 (缺失为空串)"""
+    df = df.drop_duplicates(subset=['ts_code']).set_index('ts_code')
+    for col in ('name', 'industry'):
+        if col not in df.columns:
+            df[col] = ''
+        df[col] = df[col].fillna('').astype(str)
+    return df
+
+
+def diff_stock_lists(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    对比新旧股票列表
+
+    Args:
+        old: 缓存中的股票列表
+        new: 接口返回的股票列表
+
+    Returns:
+        {'listed': 新列表中的新增行, 'delisted': 旧列表中被移除的行,
+         'renamed': [ts_code, old_name, name], 'reclassified': [ts_code, old_industry, industry]}
+    """
+    old = _normalize(old)
+    new = _normalize(new)
+
+    listed = new.index.difference(old.index, sort=False)
+    delisted = old.index.difference(new.index, sort=False)
+    common = new.index.intersection(old.index, sort=False)
+
+    old_common = old.loc[common]
+    new_common = new.loc[common]
+    renamed = common[(old_common['name'] != new_common['name']).to_numpy()]
+    reclassified = common[(old_common['industry'] != new_common['industry']).to_numpy()]
+
+    return {
+        'listed': new.loc[listed].reset_index(),
+        'delisted': old.loc[delisted].reset_index(),
+        'renamed': pd.DataFrame({
+            'ts_code': renamed,
+            'old_name': old.loc[renamed, 'name'].to_numpy(),
+            'name': new.loc[renamed, 'name'].to_numpy(),
+        }),
+        'reclassified': pd.DataFrame({
+            'ts_code': reclassified,
+            'old_industry': old.loc[reclassified, 'industry'].to_numpy(),
+            'industry': new.loc[reclassified, 'industry'].to_numpy(),
+        }),
+    }
+
+
+def is_empty_diff(diff: Dict[str, pd.DataFrame]) -> bool:
+    """是否没有任何变化"""
+    return all(diff[change].empty for change in CHANGE_TYPES)
+
+
+def format_diff(diff: Dict[str, pd.DataFrame]) -> str:
+    """变化摘要 (如 '新上市 2, 退市 1, 更名 0, 行业调整 3')"""
+    return ', '.join(f"{CHANGE_LABELS[change]} {len(diff[change])}" for change in CHANGE_TYPES)
+
+
+def diff_to_changes(diff: Dict[str, pd.DataFrame], change_date: str) -> pd.DataFrame:
+    """变化转为流水记录 (每只股票每类变化一行)"""
+    rows = []
+    for row in diff['listed'].itertuples(index=False):
+        rows.append((change_date, 'listed', row.ts_code, '', row.name))
+    for row in diff['delisted'].itertuples(index=False):
+        rows.append((change_date, 'delisted', row.ts_code, row.name, ''))
+    for row in diff['renamed'].itertuples(index=False):
+        rows.append((change_date, 'renamed', row.ts_code, row.old_name, row.name))
+    for row in diff['reclassified'].itertuples(index=False):
+        rows.append((change_date, 'reclassified', row.ts_code, row.old_industry, row.industry))
+    return pd.DataFrame(rows, columns=CHANGE_COLUMNS)
@@ -0,0 +1,131 @@
+"""
+缓存存储格式
+功能：
+1. 可替换的存储后端: parquet (默认) / feather / csv，读写接口一致
+2. 列式格式按列读取，只加载需要的字段，不再解析文本
+3. 未安装 pyarrow 时回退到 csv
+
+后端只负责单个文件的读写，路径、有效期和并发控制由 cache_manager 负责。
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+
+class CsvBackend:
+    """CSV 文本格式 (utf-8-sig，可直接用Excel打开)"""
+
+    name = 'csv'
+    suffix = '.csv'
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def read(self, path: Path, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        usecols = None
+        if columns is not None:
+            wanted = set(columns)
+            usecols = lambda col: col in wanted
+        return pd.read_csv(path, encoding='utf-8-sig', usecols=usecols)
+
+    def write(self, path: Path, df: pd.DataFrame):
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+
+
+class ParquetBackend:
+    """Parquet 列式格式 (需要 pyarrow)"""
+
+    name = 'parquet'
+    suffix = '.parquet'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def _existing_columns(path: Path, columns: Optional[Iterable[str]]) -> Optional[List[str]]:
+        """文件中存在的请求列 (与 CSV 的 usecols 一致，缺失的列忽略)"""
+        if columns is None:
+            return None
+        import pyarrow.parquet as pq
+        names = set(pq.read_schema(path).names)
+        return [col for col in columns if col in names]
+
+    def read(self, path: Path, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return pd.read_parquet(path, columns=self._existing_columns(path, columns))
+
+    def write(self, path: Path, df: pd.DataFrame):
+        _normalize_objects(df).to_parquet(path, index=False)
+
+
+class FeatherBackend(ParquetBackend):
+    """Feather (Arrow IPC) 格式 - 不压缩，读取最快 (需要 pyarrow)"""
+
+    name = 'feather'
+    suffix = '.feather'
+
+    @staticmethod
+    def _existing_columns(path: Path, columns: Optional[Iterable[str]]) -> Optional[List[str]]:
+        if columns is None:
+            return None
+        import pyarrow as pa
+        with pa.memory_map(str(path)) as source:
+            names = set(pa.ipc.open_file(source).schema.names)
+        return [col for col in columns if col in names]
+
+    def read(self, path: Path, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        return pd.read_feather(path, columns=self._existing_columns(path, columns))
+
+    def write(self, path: Path, df: pd.DataFrame):
+        _normalize_objects(df).reset_index(drop=True).to_feather(path)
+
+
+BACKENDS: Dict[str, type] = {
+    backend.name: backend for backend in (ParquetBackend, FeatherBackend, CsvBackend)
+}
+
+StorageBackend = Union[CsvBackend, ParquetBackend, FeatherBackend]
+
+SUFFIXES = tuple(backend.suffix for backend in BACKENDS.values())
+
+
+def _normalize_objects(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    object 列统一为字符串 (缺失值保留)
+
+    CSV 读回的日期为整数，与接口返回的字符串合并后同一列类型混杂，列式格式无法写入。
+    """
+    object_cols = [col for col in df.columns if df[col].dtype == object]
+    if not object_cols:
+        return df
+    df = df.copy()
+    for col in object_cols:
+        values = df[col]
+        df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def get_backend(name: str = 'parquet') -> StorageBackend:
+    """
+    按名称创建存储后端
+
+    Args:
+        name: parquet / feather / csv
+
+    Returns:
+        后端实例，依赖未安装时回退到 CsvBackend
+    """
+    backend_cls = BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"未知的缓存格式: {name} (可选: {', '.join(BACKENDS)})")
+    if not backend_cls.available():
+        print(f"    [缓存] 未安装 pyarrow，{name} 格式不可用，使用 csv")
+        return CsvBackend()
+    return backend_cls()
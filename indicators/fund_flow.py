@@ -0,0 +1,52 @@
+"""
+资金流向因子计算模块
+功能：
+1. N日净流入合计
+2. 最近连续净买入天数
+3. 全市场面板一次向量化计算 (无需逐只股票遍历)
+"""
+
+import pandas as pd
+import numpy as np
+
+# 导入配置
+from config import config
+
+
+def calculate_flow_factors(df: pd.DataFrame, value_col: str, window: int = None,
+                           key: str = 'ts_code') -> pd.DataFrame:
+    """
+    计算资金流向因子
+
+    Args:
+        df: 资金流向面板 (key, trade_date, value_col)
+        value_col: 净流入字段 (moneyflow 为 net_mf_amount，moneyflow_hsgt 为 north_money)
+        window: 统计窗口 (交易日)，默认 FUND_FLOW_WINDOW
+        key: 分组字段
+
+    Returns:
+        以 key 为索引的 DataFrame:
+        - net_inflow: 最近 window 个交易日净流入合计
+        - consecutive_days: 从最新交易日往前连续净流入 (>0) 的天数，不超过 window
+    """
+    window = window or config.FUND_FLOW_WINDOW
+
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['net_inflow', 'consecutive_days'])
+
+    recent = df[[key, 'trade_date', value_col]].sort_values([key, 'trade_date'])
+    recent = recent.groupby(key, sort=False).tail(window)
+
+    # 每只股票最近 window 个交易日排成一行，第0列为最新交易日
+    recent = recent.assign(_pos=recent.groupby(key, sort=False).cumcount(ascending=False))
+    matrix = recent.pivot(index=key, columns='_pos', values=value_col)
+    matrix = matrix.reindex(columns=range(window))
+    values = matrix.to_numpy(dtype=float)
+
+    positive = np.nan_to_num(values, nan=0.0) > 0
+    consecutive = np.cumprod(positive, axis=1).sum(axis=1)
+
+    return pd.DataFrame({
+        'net_inflow': np.nansum(values, axis=1),
+        'consecutive_days': consecutive.astype(int),
+    }, index=matrix.index)
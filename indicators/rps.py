@@ -0,0 +1,73 @@
+"""
+行业强度 (RPS) 计算模块
+功能：
+1. 多周期涨幅 (全部行业指数一次计算)
+2. 百分位RPS: 涨幅在所有行业中的百分位 (0~100)，RPS=85 表示强于85%的行业
+"""
+
+import pandas as pd
+import numpy as np
+from typing import List
+
+# 导入配置
+from config import config
+
+
+def calculate_period_returns(panel: pd.DataFrame, windows: List[int] = None,
+                             key: str = 'ts_code') -> pd.DataFrame:
+    """
+    计算多周期涨幅
+
+    Args:
+        panel: 指数日线面板 (key, trade_date, close)
+        windows: 周期列表 (交易日)，默认 RPS_WINDOWS
+        key: 指数代码字段
+
+    Returns:
+        以 key 为索引的 DataFrame，列 ret_{N} 为最近N个交易日涨幅 (%)，
+        历史不足N个交易日的为NaN
+    """
+    windows = windows or config.RPS_WINDOWS
+
+    if panel is None or panel.empty:
+        return pd.DataFrame(columns=[f'ret_{w}' for w in windows])
+
+    # 交易日 x 指数 的收盘价矩阵，停牌/缺失沿用前值
+    closes = panel.pivot_table(index='trade_date', columns=key, values='close', aggfunc='last')
+    closes = closes.sort_index().ffill()
+    values = closes.to_numpy(dtype=float)
+    last = values[-1]
+
+    returns = {}
+    for w in windows:
+        if len(values) > w:
+            base = values[-1 - w]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[f'ret_{w}'] = (last / base - 1) * 100
+        else:
+            returns[f'ret_{w}'] = np.full(len(last), np.nan)
+
+    return pd.DataFrame(returns, index=closes.columns)
+
+
+def calculate_rps(returns: pd.DataFrame, windows: List[int] = None,
+                  main_window: int = None) -> pd.DataFrame:
+    """
+    按涨幅计算百分位RPS
+
+    Args:
+        returns: 含 ret_{N} 列的涨幅表
+        windows: 周期列表，默认 RPS_WINDOWS
+        main_window: 作为 rps 列的主周期，默认 RPS_DAYS
+
+    Returns:
+        新增 rps_{N} 列 (各周期百分位) 和 rps 列 (主周期百分位)
+    """
+    windows = windows or config.RPS_WINDOWS
+    main_window = main_window or config.RPS_DAYS
+
+    df = returns.copy()
+    for w in windows:
+        df[f'rps_{w}'] = df[f'ret_{w}'].rank(pct=True) * 100
+    df['rps'] = df[f'rps_{main_window}']
+    return df
@@ -26,7 +26,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import config
 
 # 导入缓存管理
-from data.cache_manager import print_cache_status
+from data.cache_manager import print_cache_status, migrate_cache
 
 # 导入API客户端
 from api.tushare_client import get_client, reset_client
@@ -42,6 +42,10 @@ def main():
     """运行完整选股流程"""
     start_time = time.time()
     
+    # 把旧的CSV缓存转换为 CACHE_FORMAT 格式 (一次性)
+    if '--migrate-cache' in sys.argv:
+        migrate_cache()
+    
     # 打印缓存状态
     print_cache_status()
     
@@ -53,6 +57,19 @@ def main():
     # 检查是否使用Mock模式
     use_mock = '--mock' in sys.argv or config.USE_MOCK_DATA
     
+    # 指定接口地址 (如本地替身服务) / 录制接口响应
+    api_url = get_arg_value('--api-url')
+    if api_url:
+        config.TUSHARE_API_URL = api_url
+        print(f"\n🔗 接口地址: {api_url}")
+    record_dir = get_arg_value('--record')
+    if record_dir:
+        config.API_RECORD_DIR = record_dir
+        print(f"\n💾 录制接口响应到: {record_dir}")
+    if '--hedge' in sys.argv:
+        config.API_HEDGING = True
+        print("\n🔀 启用对冲请求 (超过p95延迟时重发)")
+    
     if use_mock:
         print("\n🔧 模式: Mock数据")
     else:
@@ -87,6 +104,10 @@ def main():
     else:
         print("\n未找到符合所有条件的股票")
     
+    # 数据源降级时明确提示 (部分接口失败/熔断，结果可能不完整)
+    if filter_obj.api_status['status'] == 'degraded':
+        print("\n⚠️ 数据源状态: 降级 (degraded)，部分股票数据缺失，请稍后重跑")
+    
     # 保存结果
     if results:
         save_results(results)
@@ -95,6 +116,34 @@ def main():
     # 打印耗时
     elapsed = time.time() - start_time
     print(f"\n⏱️ 总耗时: {elapsed:.1f}秒")
+    
+    # 接口吞吐
+    endpoints = filter_obj.api_status['endpoints']
+    total_calls = sum(stats['calls'] for stats in endpoints.values())
+    if total_calls:
+        print(f"📡 接口调用: {total_calls} 次, {total_calls / elapsed:.1f} 次/秒")
+    
+    # 运行时缓存命中率
+    cache_stats = filter_obj.api_status.get('runtime_cache')
+    if cache_stats and cache_stats['hits'] + cache_stats['misses']:
+        print(f"🗃️ 运行时缓存: 命中率 {cache_stats['hit_rate']:.0%}, "
+              f"{cache_stats['items']} 条 / {cache_stats['bytes'] / 1024 / 1024:.1f}MB, "
+              f"淘汰 {cache_stats['evictions']} 条")
+    
+    # 对冲请求
+    hedge_stats = filter_obj.api_status.get('hedging')
+    if hedge_stats and hedge_stats['hedged']:
+        print(f"🔀 对冲请求: {hedge_stats['hedged']} 次 (先返回 {hedge_stats['hedge_wins']} 次), "
+              f"预算不足 {hedge_stats['budget_denied']} 次")
+
+
+def get_arg_value(name: str):
+    """读取命令行参数值 (如 --api-url http://...)，未指定返回None"""
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
 
 
 def save_results(results: list):
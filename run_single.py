@@ -93,6 +93,7 @@ def main():
     
     # 分析单只股票
     result = filter_obj.analyze_single_stock(ts_code)
+    client.flush()
     
     if result:
         print("\n" + "="*60)
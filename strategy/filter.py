@@ -7,16 +7,20 @@
 4. 技术面筛选
 """
 
+import asyncio
+import queue
+import threading
 import pandas as pd
 import numpy as np
 import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
 # 导入配置
 from config import config
 
 # 导入API客户端
 from api.tushare_client import TushareClient
+from api.async_client import AsyncTushareClient
 
 # 导入技术指标
 from indicators.technical import (
@@ -41,6 +45,7 @@ class StockFilter:
     def __init__(self, client: TushareClient):
         self.client = client
         self.results: List[Dict[str, Any]] = []
+        self.api_status: Dict[str, Any] = {'status': 'ok', 'endpoints': {}}
     
     def step1_clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -92,15 +97,19 @@ class StockFilter:
             print(f"    备用方案: 使用股票数量最多的{len(top_industries)}个行业")
             return top_industries
         
-        # 取前20%的行业
-        top_count = max(int(len(df_rps) * 0.2), config.TOP_N_INDUSTRIES)
-        top_industries = df_rps.head(top_count)['industry'].tolist()
+        # RPS为百分位 (强于N%的行业)
+        strong = df_rps[df_rps['rps'] > config.RPS_THRESHOLD]
+        if strong.empty:
+            strong = df_rps.head(config.TOP_N_INDUSTRIES)
+            print(f"    无行业 RPS > {config.RPS_THRESHOLD}，使用RPS最高的{len(strong)}个行业")
+        top_industries = strong['industry'].tolist()
         
-        print(f"    RPS筛选: {len(top_industries)} 个强势行业")
+        print(f"    RPS筛选: {len(top_industries)} 个强势行业 (RPS > {config.RPS_THRESHOLD})")
         
         # 显示前5个行业
-        for i, row in df_rps.head(5).iterrows():
-            print(f"      - {row['industry']}: {row['rps']:.1f}%")
+        ret_col = f'ret_{config.RPS_DAYS}'
+        for industry, rps, ret in zip(strong['industry'].head(5), strong['rps'].head(5), strong[ret_col].head(5)):
+            print(f"      - {industry}: RPS {rps:.0f} ({config.RPS_DAYS}日涨幅 {ret:.1f}%)")
         
         return top_industries
     
@@ -111,6 +120,10 @@ class StockFilter:
         - ROE(TTM) > 5%
         - 扣非净利润(TTM) > 0
         """
+        return list(self.iter_leaders(stocks, industries))
+    
+    def iter_leaders(self, stocks: pd.DataFrame, industries: List[str]) -> Iterator[Dict[str, Any]]:
+        """Step 3 (逐行业): 每个行业筛选完成后立即产出该行业的龙头股"""
         print("\n  Step 3: 筛选行业龙头")
         
         # 预先加载市值数据
@@ -121,8 +134,6 @@ class StockFilter:
         print("    预加载财务数据...")
         self.client.get_all_financial_ttm()
         
-        results = []
-        
         for industry in industries:
             # 获取该行业股票
             ind_stocks = stocks[stocks['industry'] == industry]
@@ -153,6 +164,10 @@ class StockFilter:
             for stock in stock_candidates:
                 ts_code = stock['ts_code']
                 
+                # 已知无财务数据 (新上市/退市)，不发起请求
+                if self.client.is_known_empty('fina_indicator', ts_code):
+                    continue
+                
                 # 获取财务数据
                 fin_data = self.client.get_financial_ttm(ts_code)
                 
@@ -175,9 +190,7 @@ class StockFilter:
             
             print(f"      ROE≥5%: {len(top_stocks)} 只")
             
-            results.extend(top_stocks)
-        
-        return results
+            yield from top_stocks
     
     def step4_technical_filter(self, stocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -190,119 +203,154 @@ class StockFilter:
         
         results = []
         
-        # 计算日期范围
-        end_date = datetime.datetime.now().strftime('%Y%m%d')
-        start_date = (datetime.datetime.now() - datetime.timedelta(days=120)).strftime('%Y%m%d')
-        
+        start_date, end_date = self._step4_date_range()
         total = len(stocks)
         
+        if stocks:
+            self._prepare_step4(start_date, end_date)
+        
         for i, stock in enumerate(stocks):
-            ts_code = stock['ts_code']
-            
             if (i + 1) % 5 == 0:
                 print(f"    进度: {i + 1}/{total}")
             
-            # 获取日线数据
-            df_daily = self.client.get_daily_data(ts_code, start_date, end_date)
-            
-            if df_daily is None or len(df_daily) < 60:
+            data = self._fetch_stock_data(stock, start_date, end_date)
+            if data is None:
                 continue
             
-            # 排序
-            df_daily = df_daily.sort_values('trade_date')
-            
-            # 应用前复权
-            adj_factor = self.client.get_adj_factor(ts_code)
-            df_daily = self._apply_adjustment(df_daily, adj_factor)
-            
-            # 计算技术指标
-            df_daily = calculate_kdj(df_daily)
-            df_daily = calculate_macd(df_daily)
-            df_daily = calculate_ma(df_daily)
-            df_daily = calculate_bollinger_bands(df_daily)
-            
-            # 获取最新指标
-            indicators = get_latest_indicators(df_daily)
-            
-            # 筹码分析
-            chips = analyze_chips(df_daily)
-            
-            # 北向资金
-            northbound = self.client.get_northbound_funds(ts_code)
-            
-            # 主力资金
-            main_funds = self.client.get_main_funds(ts_code)
-            
-            # 技术面筛选条件
-            ma_bias = indicators.get('ma_bias', 0)
-            vol_ratio = indicators.get('volume_ratio', 1)
-            kdj_golden = indicators.get('kdj_golden_cross', False)
-            
-            # 打印调试信息
-            print(f"\n    [调试] {stock['symbol']} {stock['name']}")
-            print(f"      乖离率: {ma_bias:.1f}% (范围: {config.MA_BIAS_MIN}~{config.MA_BIAS_MAX}%)")
-            print(f"      KDJ金叉: {'是' if kdj_golden else '否'}")
-            print(f"      量比: {vol_ratio:.2f} (范围: {config.VOLUME_RATIO_MIN}~{config.VOLUME_RATIO_MAX})")
-            print(f"      获利盘: {chips['profit_ratio']:.1f}%")
-            print(f"      集中度: {chips['concentration']:.1f}%")
-            
-            # 筛选条件
-            if (config.MA_BIAS_MIN <= ma_bias <= config.MA_BIAS_MAX and
-                config.VOLUME_RATIO_MIN <= vol_ratio <= config.VOLUME_RATIO_MAX and
-                chips['profit_ratio'] <= config.MAX_PROFIT_RATIO and
-                chips['concentration'] <= config.MAX_CHIP_CONCENTRATION):
-                
-                result = {
-                    'code': stock['symbol'],
-                    'name': stock['name'],
-                    'industry': stock['industry'],
-                    'price': indicators.get('close', 0),
-                    'market_cap': stock['market_cap'],
-                    'roe': stock.get('roe_ttm', 0),
-                    'net_profit': stock.get('net_profit_ttm', 0),
-                    'revenue': stock.get('revenue_ttm', 0),
-                    
-                    # 技术指标
-                    'ma_bias': ma_bias,
-                    'kdj': '金叉' if kdj_golden else '死叉',
-                    'volume_ratio': vol_ratio,
-                    
-                    # MACD
-                    'macd_divergence': '底背离' if indicators.get('macd_divergence', {}).get('bullish') else '无',
-                    
-                    # 筹码
-                    'profit_ratio': chips['profit_ratio'],
-                    'concentration': chips['concentration'],
-                    'single_peak': chips['single_peak'],
-                    
-                    # 资金
-                    'northbound': northbound.get('total_net_inflow', 0),
-                    'northbound_days': northbound.get('consecutive_days', 0),
-                    'main_funds': main_funds.get('net_inflow_5d', 0),
-                    
-                    # 布林带
-                    'bb_position': self._calculate_bb_position(indicators),
-                }
-                
-                # 计算评分
-                result['score'] = self._calculate_score(result)
-                
+            result = self._evaluate_stock(stock, *data)
+            if result is not None:
                 results.append(result)
-                print(f"      ✅ 符合条件! 评分: {result['score']}")
         
         return results
     
-    def _apply_adjustment(self, df: pd.DataFrame, adj_factor: float) -> pd.DataFrame:
-        """应用前复权"""
-        if adj_factor == 1.0 or adj_factor is None:
-            return df
+    @staticmethod
+    def _step4_date_range() -> tuple:
+        """Step 4 日线区间 (最近120天)"""
+        end_date = datetime.datetime.now().strftime('%Y%m%d')
+        start_date = (datetime.datetime.now() - datetime.timedelta(days=120)).strftime('%Y%m%d')
+        return start_date, end_date
+    
+    def _prepare_step4(self, start_date: str, end_date: str):
+        """Step 4 批量数据准备: 全市场日线、复权因子面板与资金因子 (每个交易日一次API调用)"""
+        if config.DAILY_BULK_MODE:
+            self.client.sync_daily_panel(start_date, end_date)
+            self.client.sync_adj_factor_panel(start_date, end_date)
+        
+        # 资金因子一次算出全市场结果
+        if config.FUND_FLOW_BULK_MODE:
+            self.client.sync_fund_flows()
+    
+    def _fetch_stock_data(self, stock: Dict[str, Any], start_date: str, end_date: str) -> Optional[tuple]:
+        """
+        获取单只股票 Step 4 所需数据
         
-        df = df.copy()
-        df['close'] = df['close'] * adj_factor
-        df['high'] = df['high'] * adj_factor
-        df['low'] = df['low'] * adj_factor
-        df['open'] = df['open'] * adj_factor
-        return df
+        Returns:
+            (前复权日线, 北向资金, 主力资金)，日线不足60根时返回None
+        """
+        ts_code = stock['ts_code']
+        
+        # 已知无日线 (停牌/退市/未上市)，不发起请求
+        if self.client.is_known_empty('daily', ts_code):
+            return None
+        
+        # 获取前复权日线 (按每根K线当日的复权因子)
+        df_daily = self.client.get_daily_data(ts_code, start_date, end_date, adj='qfq')
+        
+        if df_daily is None or len(df_daily) < 60:
+            return None
+        
+        # 北向资金
+        northbound = self.client.get_northbound_funds(ts_code)
+        
+        # 主力资金
+        main_funds = self.client.get_main_funds(ts_code)
+        
+        return df_daily, northbound, main_funds
+    
+    def _evaluate_stock(self, stock: Dict[str, Any], df_daily: pd.DataFrame,
+                        northbound: Dict[str, Any], main_funds: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        计算技术指标并判断单只股票是否符合条件
+        
+        Args:
+            df_daily: 前复权日线
+        
+        Returns:
+            符合条件时返回结果字典 (含评分)，否则返回None
+        """
+        # 排序
+        df_daily = df_daily.sort_values('trade_date')
+        
+        # 计算技术指标
+        df_daily = calculate_kdj(df_daily)
+        df_daily = calculate_macd(df_daily)
+        df_daily = calculate_ma(df_daily)
+        df_daily = calculate_bollinger_bands(df_daily)
+        
+        # 获取最新指标
+        indicators = get_latest_indicators(df_daily)
+        
+        # 筹码分析
+        chips = analyze_chips(df_daily)
+        
+        # 技术面筛选条件
+        ma_bias = indicators.get('ma_bias', 0)
+        vol_ratio = indicators.get('volume_ratio', 1)
+        kdj_golden = indicators.get('kdj_golden_cross', False)
+        
+        # 打印调试信息
+        print(f"\n    [调试] {stock['symbol']} {stock['name']}")
+        print(f"      乖离率: {ma_bias:.1f}% (范围: {config.MA_BIAS_MIN}~{config.MA_BIAS_MAX}%)")
+        print(f"      KDJ金叉: {'是' if kdj_golden else '否'}")
+        print(f"      量比: {vol_ratio:.2f} (范围: {config.VOLUME_RATIO_MIN}~{config.VOLUME_RATIO_MAX})")
+        print(f"      获利盘: {chips['profit_ratio']:.1f}%")
+        print(f"      集中度: {chips['concentration']:.1f}%")
+        
+        # 筛选条件
+        if (config.MA_BIAS_MIN <= ma_bias <= config.MA_BIAS_MAX and
+            config.VOLUME_RATIO_MIN <= vol_ratio <= config.VOLUME_RATIO_MAX and
+            chips['profit_ratio'] <= config.MAX_PROFIT_RATIO and
+            chips['concentration'] <= config.MAX_CHIP_CONCENTRATION):
+            
+            result = {
+                'code': stock['symbol'],
+                'name': stock['name'],
+                'industry': stock['industry'],
+                'price': indicators.get('close', 0),
+                'market_cap': stock['market_cap'],
+                'roe': stock.get('roe_ttm', 0),
+                'net_profit': stock.get('net_profit_ttm', 0),
+                'revenue': stock.get('revenue_ttm', 0),
+                
+                # 技术指标
+                'ma_bias': ma_bias,
+                'kdj': '金叉' if kdj_golden else '死叉',
+                'volume_ratio': vol_ratio,
+                
+                # MACD
+                'macd_divergence': '底背离' if indicators.get('macd_divergence', {}).get('bullish') else '无',
+                
+                # 筹码
+                'profit_ratio': chips['profit_ratio'],
+                'concentration': chips['concentration'],
+                'single_peak': chips['single_peak'],
+                
+                # 资金
+                'northbound': northbound.get('total_net_inflow', 0),
+                'northbound_days': northbound.get('consecutive_days', 0),
+                'main_funds': main_funds.get('net_inflow_5d', 0),
+                
+                # 布林带
+                'bb_position': self._calculate_bb_position(indicators),
+            }
+            
+            # 计算评分
+            result['score'] = self._calculate_score(result)
+            
+            print(f"      ✅ 符合条件! 评分: {result['score']}")
+            return result
+        
+        return None
     
     def _calculate_bb_position(self, indicators: Dict[str, Any]) -> str:
         """计算布林带位置"""
@@ -361,7 +409,54 @@ class StockFilter:
         return score
     
     def run_full_filter(self) -> List[Dict[str, Any]]:
-        """运行完整筛选流程"""
+        """
+        运行完整筛选流程
+        
+        PIPELINE_MODE 开启时 Step 3 与 Step 4 流水线执行，否则逐步执行
+        """
+        universe = self._select_universe()
+        if universe is None:
+            self._check_api_status()
+            return []
+        
+        if config.PIPELINE_MODE:
+            results = self.run_pipeline(*universe)
+        else:
+            # Step 3: 龙头筛选 / Step 4: 技术面筛选
+            leaders = self.step3_leader_filter(*universe)
+            results = self.step4_technical_filter(leaders)
+        
+        # 按评分排序
+        results.sort(key=lambda x: x['score'], reverse=True)
+        
+        self._check_api_status()
+        return results
+    
+    def _check_api_status(self) -> Dict[str, Any]:
+        """扫描结束: 写入批量缓存，记录并打印本次扫描的接口状态，有失败或熔断时标记为降级"""
+        self.client.flush()
+        self.api_status = self.client.get_api_status()
+        
+        if self.api_status['status'] == 'degraded':
+            print("\n⚠️ 数据源降级: 部分接口调用失败，本次结果可能不完整")
+            for name, stats in self.api_status['endpoints'].items():
+                if stats['failures'] or stats['rejected']:
+                    print(f"    {name}: 失败 {stats['failures']} 次, 熔断拒绝 {stats['rejected']} 次, "
+                          f"限流 {stats['throttled']} 次 - {stats['last_error']}")
+        
+        return self.api_status
+    
+    def _select_leaders(self) -> Optional[List[Dict[str, Any]]]:
+        """Step 1-3: 清洗、行业筛选、龙头筛选，无法获取股票列表时返回None"""
+        universe = self._select_universe()
+        if universe is None:
+            return None
+        
+        # Step 3: 龙头筛选
+        return self.step3_leader_filter(*universe)
+    
+    def _select_universe(self) -> Optional[tuple]:
+        """Step 1-2: 清洗、行业筛选，返回 (股票列表, 强势行业)，无法获取股票列表时返回None"""
         print("\n" + "="*60)
         print("🚀 开始选股筛选流程")
         print("="*60)
@@ -370,7 +465,7 @@ class StockFilter:
         stocks = self.client.get_stock_list()
         if stocks is None or stocks.empty:
             print("❌ 无法获取股票列表")
-            return []
+            return None
         
         stocks = self.step1_clean_data(stocks)
         print(f"✅ 清洗后剩余: {len(stocks)} 只")
@@ -378,15 +473,207 @@ class StockFilter:
         # Step 2: 行业RPS筛选
         top_industries = self.step2_industry_filter(stocks)
         
-        # Step 3: 龙头筛选
-        leaders = self.step3_leader_filter(stocks, top_industries)
+        return stocks, top_industries
+    
+    # ==========================================
+    # 流水线 (Step 3 与 Step 4 重叠执行)
+    # ==========================================
+    
+    def run_pipeline(self, stocks: pd.DataFrame, industries: List[str],
+                     workers: int = None) -> List[Dict[str, Any]]:
+        """
+        Step 3/4 流水线
+        
+        - 生产者线程: 逐个行业筛选龙头，每个行业完成即放入有界队列
+        - 预取线程: 从队列取出龙头，获取前复权日线与资金数据
+        - 当前线程: 对预取完成的股票计算指标并判断
+        
+        全市场面板同步与 Step 3 同时进行，预取与指标计算重叠。
+        批量模式 (DAILY_BULK_MODE / FUND_FLOW_BULK_MODE) 下逐只预取要等面板同步完成后才开始
+        (同步前无法知道哪些股票已在面板中)，此时与 Step 3 重叠的只有面板同步；
+        关闭批量模式时预取在第一个龙头产出后立即开始。
+        结果顺序与逐步执行一致 (按龙头产出顺序)。
+        当前线程出错时通知生产者与预取线程停止，不再获取剩余龙头的数据。
+        
+        Args:
+            workers: 预取线程数，默认 API_MAX_WORKERS
+        """
+        workers = workers or config.API_MAX_WORKERS
+        start_date, end_date = self._step4_date_range()
+        wait_panel = config.DAILY_BULK_MODE or config.FUND_FLOW_BULK_MODE
+        
+        leaders = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        fetched = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        prepared = threading.Event()
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        
+        def _put(q: queue.Queue, item) -> bool:
+            """放入有界队列，流水线停止时放弃 (不会永久阻塞)"""
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def _prepare():
+            try:
+                self._prepare_step4(start_date, end_date)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                prepared.set()
+        
+        def _produce():
+            try:
+                for index, stock in enumerate(self.iter_leaders(stocks, industries)):
+                    if not _put(leaders, (index, stock)):
+                        return
+            except Exception as e:
+                errors.append(e)
+            finally:
+                for _ in range(workers):
+                    _put(leaders, None)
+        
+        def _prefetch():
+            # 批量模式下等待面板同步完成，避免逐只请求已在面板中的数据
+            if wait_panel:
+                while not prepared.wait(0.1):
+                    if stop.is_set():
+                        return
+            while not stop.is_set():
+                try:
+                    item = leaders.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                index, stock = item
+                try:
+                    data = self._fetch_stock_data(stock, start_date, end_date)
+                except Exception as e:
+                    errors.append(e)
+                    data = None
+                if not _put(fetched, (index, stock, data)):
+                    return
+            _put(fetched, None)
+        
+        preparer = threading.Thread(target=_prepare, daemon=True)
+        threads = [threading.Thread(target=_produce, daemon=True)]
+        threads += [threading.Thread(target=_prefetch, daemon=True) for _ in range(workers)]
+        for t in [preparer] + threads:
+            t.start()
+        
+        print(f"\n  Step 4: 技术面筛选 (流水线, {workers} 线程预取)")
+        
+        results = []
+        done = 0
+        evaluated = 0
+        try:
+            while done < workers:
+                item = fetched.get()
+                if item is None:
+                    done += 1
+                    continue
+                
+                index, stock, data = item
+                evaluated += 1
+                if evaluated % 5 == 0:
+                    print(f"    进度: {evaluated}")
+                if data is None:
+                    continue
+                
+                result = self._evaluate_stock(stock, *data)
+                if result is not None:
+                    results.append((index, result))
+            preparer.join()
+        finally:
+            # 正常结束时各线程已退出；出错时通知停止 (面板同步线程不等待，由其自行结束)
+            stop.set()
+            for t in threads:
+                t.join()
+            if prepared.is_set():
+                preparer.join()
+        
+        if errors:
+            raise errors[0]
+        
+        results.sort(key=lambda x: x[0])
+        return [result for _, result in results]
+    
+    # ==========================================
+    # 异步流程 (配合 AsyncTushareClient)
+    # ==========================================
+    
+    async def step4_technical_filter_async(self, stocks: List[Dict[str, Any]],
+                                           client: AsyncTushareClient) -> List[Dict[str, Any]]:
+        """
+        Step 4 (异步): 技术面筛选
+        所有候选股的前复权日线、资金流向并发获取，筛选条件与同步版本一致
+        """
+        print("\n  Step 4: 技术面筛选 (异步)")
+        
+        start_date, end_date = self._step4_date_range()
+        
+        # 批量同步全市场日线与复权因子面板
+        if config.DAILY_BULK_MODE and stocks:
+            await client.sync_daily_panel(start_date, end_date)
+            await client.sync_adj_factor_panel(start_date, end_date)
+        
+        if config.FUND_FLOW_BULK_MODE and stocks:
+            await client.sync_fund_flows()
+        
+        async def _fetch(stock):
+            ts_code = stock['ts_code']
+            if client.sync_client.is_known_empty('daily', ts_code):
+                return None
+            df_daily = await client.get_daily_data(ts_code, start_date, end_date, adj='qfq')
+            if df_daily is None or len(df_daily) < 60:
+                return None
+            
+            northbound, main_funds = await asyncio.gather(
+                client.get_northbound_funds(ts_code),
+                client.get_main_funds(ts_code),
+            )
+            return df_daily, northbound, main_funds
+        
+        fetched = await asyncio.gather(*(_fetch(stock) for stock in stocks))
+        print(f"    并发获取完成: {len(stocks)} 只")
+        
+        results = []
+        for stock, data in zip(stocks, fetched):
+            if data is None:
+                continue
+            result = self._evaluate_stock(stock, *data)
+            if result is not None:
+                results.append(result)
+        
+        return results
+    
+    async def run_full_filter_async(self, client: Optional[AsyncTushareClient] = None) -> List[Dict[str, Any]]:
+        """
+        运行完整筛选流程 - 异步版本
+        Step 1-3 在线程中执行，Step 4 并发获取行情与资金数据
+        
+        Args:
+            client: 异步客户端，默认包装 self.client
+        """
+        if client is None:
+            client = AsyncTushareClient(self.client)
+        
+        leaders = await asyncio.to_thread(self._select_leaders)
+        if leaders is None:
+            self._check_api_status()
+            return []
         
-        # Step 4: 技术面筛选
-        results = self.step4_technical_filter(leaders)
+        results = await self.step4_technical_filter_async(leaders, client)
         
         # 按评分排序
         results.sort(key=lambda x: x['score'], reverse=True)
         
+        self._check_api_status()
         return results
     
     def analyze_single_stock(self, ts_code: str) -> Optional[Dict[str, Any]]:
@@ -421,16 +708,14 @@ class StockFilter:
         end_date = datetime.datetime.now().strftime('%Y%m%d')
         start_date = (datetime.datetime.now() - datetime.timedelta(days=120)).strftime('%Y%m%d')
         
-        df_daily = self.client.get_daily_data(ts_code, start_date, end_date)
+        df_daily = self.client.get_daily_data(ts_code, start_date, end_date, adj='qfq')
         
         if df_daily is None or len(df_daily) < 60:
             print(f"❌ 日线数据不足")
             return None
         
-        # 排序和应用复权
+        # 排序
         df_daily = df_daily.sort_values('trade_date')
-        adj_factor = self.client.get_adj_factor(ts_code)
-        df_daily = self._apply_adjustment(df_daily, adj_factor)
         
         # 计算技术指标
         df_daily = calculate_kdj(df_daily)
@@ -0,0 +1,45 @@
+"""
+测试共用的辅助函数 (临时缓存目录、数据构造)
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+import data.cache_manager as cache_mgr
+
+
+def use_temp_cache_dir(test: unittest.TestCase) -> Path:
+    """把缓存目录切换到临时目录，测试结束后恢复并删除 (不写入仓库中的 data_cache/)"""
+    directory = Path(tempfile.mkdtemp())
+    original = cache_mgr.CACHE_DIR
+    cache_mgr.CACHE_DIR = directory
+    # 后注册的先执行: 先恢复目录再删除
+    test.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    test.addCleanup(setattr, cache_mgr, 'CACHE_DIR', original)
+    return directory
+
+
+def make_bars(ts_code: str, dates: List, close: float = 1.0, step: float = 0.0,
+              vol: Optional[float] = None) -> pd.DataFrame:
+    """
+    构造单只股票的日线
+
+    Args:
+        ts_code: 股票代码
+        dates: 交易日列表 (按给定顺序，不排序)
+        close: 首根K线收盘价
+        step: 每根K线收盘价的增量
+        vol: 成交量，为None时不含 vol 列
+    """
+    df = pd.DataFrame({
+        'ts_code': ts_code,
+        'trade_date': dates,
+        'close': [close + step * i for i in range(len(dates))],
+    })
+    if vol is not None:
+        df['vol'] = vol
+    return df
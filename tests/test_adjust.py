@@ -0,0 +1,101 @@
+"""
+复权计算单元测试
+"""
+
+import unittest
+import pandas as pd
+import numpy as np
+
+# 添加项目根目录到路径
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.adjust import adj_ratio, adjust_prices, align_adj_factors
+
+
+class TestAdjustPrices(unittest.TestCase):
+    """前/后复权测试"""
+    
+    def setUp(self):
+        # 20260105 除权，因子由 1.0 变为 2.0
+        self.daily = pd.DataFrame({
+            'ts_code': '300274.SZ',
+            'trade_date': ['20260101', '20260102', '20260105', '20260106'],
+            'open': [20.0, 20.0, 10.0, 10.0],
+            'high': [21.0, 21.0, 11.0, 11.0],
+            'low': [19.0, 19.0, 9.0, 9.0],
+            'close': [20.0, 20.0, 10.0, 10.0],
+            'vol': [100.0, 100.0, 200.0, 200.0],
+        })
+        self.adj = pd.DataFrame({
+            'ts_code': '300274.SZ',
+            'trade_date': ['20260101', '20260102', '20260105', '20260106'],
+            'adj_factor': [1.0, 1.0, 2.0, 2.0],
+        })
+    
+    def test_qfq_keeps_latest_price(self):
+        """测试前复权: 最新价不变，除权前价格按因子比例缩放"""
+        df = adjust_prices(self.daily, self.adj, how='qfq')
+        
+        self.assertEqual(df['close'].tolist(), [10.0, 10.0, 10.0, 10.0])
+        self.assertEqual(df['high'].tolist(), [10.5, 10.5, 11.0, 11.0])
+        # 成交量不复权
+        self.assertEqual(df['vol'].tolist(), self.daily['vol'].tolist())
+    
+    def test_hfq(self):
+        """测试后复权: 价格乘以当日因子"""
+        df = adjust_prices(self.daily, self.adj, how='hfq')
+        self.assertEqual(df['close'].tolist(), [20.0, 20.0, 20.0, 20.0])
+    
+    def test_sparse_factors(self):
+        """测试只含除权日的稀疏因子序列按最近一期对齐"""
+        sparse = self.adj.iloc[[0, 2]]
+        factors = align_adj_factors(self.daily, sparse)
+        self.assertEqual(factors.tolist(), [1.0, 1.0, 2.0, 2.0])
+    
+    def test_bars_before_first_factor(self):
+        """测试早于首个因子的K线使用首个因子"""
+        factors = align_adj_factors(self.daily, self.adj.iloc[[2]])
+        self.assertEqual(factors.tolist(), [2.0, 2.0, 2.0, 2.0])
+    
+    def test_panel_keeps_row_order(self):
+        """测试全市场面板一次复权，行顺序与输入一致"""
+        other = self.daily.assign(ts_code='600519.SH')
+        panel = pd.concat([self.daily, other], ignore_index=True).iloc[::-1].reset_index(drop=True)
+        adj = pd.concat([
+            self.adj,
+            pd.DataFrame({'ts_code': '600519.SH', 'trade_date': ['20260101'], 'adj_factor': [3.0]}),
+        ], ignore_index=True)
+        
+        df = adjust_prices(panel, adj, how='qfq')
+        
+        self.assertEqual(df['trade_date'].tolist(), panel['trade_date'].tolist())
+        other_close = df[df['ts_code'] == '600519.SH']['close']
+        np.testing.assert_allclose(other_close, panel[panel['ts_code'] == '600519.SH']['close'])
+        own_close = df[df['ts_code'] == '300274.SZ']['close']
+        self.assertTrue((own_close == 10.0).all())
+    
+    def test_adj_ratio_matches_adjust_prices(self):
+        """测试单只股票数组复权系数与 adjust_prices 一致 (含稀疏因子与早于首个因子的K线)"""
+        dates = self.daily['trade_date'].astype(int).to_numpy()
+        for adj in (self.adj, self.adj.iloc[[2, 0]], self.adj.iloc[[2]]):
+            for how in ('qfq', 'hfq'):
+                expected = adjust_prices(self.daily, adj, how=how)['close'].to_numpy()
+                ratio = adj_ratio(dates, adj['trade_date'].astype(int).to_numpy(), adj['adj_factor'].to_numpy(), how)
+                np.testing.assert_allclose(self.daily['close'].to_numpy() * ratio, expected)
+        self.assertEqual(adj_ratio(dates, np.array([]), np.array([])).tolist(), [1.0] * 4)
+    
+    def test_missing_factors_returns_input(self):
+        """测试没有复权因子时原样返回"""
+        df = adjust_prices(self.daily, pd.DataFrame(), how='qfq')
+        pd.testing.assert_frame_equal(df, self.daily)
+    
+    def test_invalid_method(self):
+        """测试不支持的复权方式"""
+        with self.assertRaises(ValueError):
+            adjust_prices(self.daily, self.adj, how='xyz')
+
+
+if __name__ == '__main__':
+    unittest.main()
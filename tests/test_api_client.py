@@ -2,15 +2,25 @@
 API客户端和数据准确性测试
 """
 import unittest
+import asyncio
+import time
+from unittest import mock
 import pandas as pd
 import numpy as np
 import datetime
 import sys
 import os
+import tempfile
+import shutil
+from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from api.tushare_client import TushareClient
+import data.cache_manager as cache_mgr
+from config import config
+from api.tushare_client import TushareClient, DAILY_FIELDS
+from api.async_client import AsyncTushareClient
+from api.concurrency import TokenBucket
 from data.mock_data import (
     MockTushareClient,
     generate_mock_stock_list,
@@ -19,6 +29,7 @@ from data.mock_data import (
     generate_mock_adj_factor,
     generate_mock_daily_data,
 )
+from tests.helpers import use_temp_cache_dir
 
 
 class TestTushareClientMock(unittest.TestCase):
@@ -26,6 +37,7 @@ class TestTushareClientMock(unittest.TestCase):
     
     def setUp(self):
         """设置测试"""
+        use_temp_cache_dir(self)
         self.client = TushareClient(use_mock=True)
     
     def test_client_initialization(self):
@@ -244,9 +256,846 @@ class TestMockClient(unittest.TestCase):
         self.assertFalse(df.empty)
 
 
+class TestDailyPanel(unittest.TestCase):
+    """全市场日线面板测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        self.client = TushareClient(use_mock=True)
+        self.calls = []
+        original_daily = self.client._mock_client.daily
+        
+        def counting_daily(**kwargs):
+            self.calls.append(kwargs)
+            return original_daily(**kwargs)
+        
+        self.client._mock_client.daily = counting_daily
+        self.end_date = datetime.datetime.now().strftime('%Y%m%d')
+        self.start_date = (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y%m%d')
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_one_call_per_trade_date(self):
+        """测试每个交易日只调用一次"""
+        trade_dates = self.client.get_trade_dates(self.start_date, self.end_date)
+        panel = self.client.sync_daily_panel(self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.calls), len(trade_dates))
+        self.assertTrue(all('trade_date' in c for c in self.calls))
+        self.assertEqual(panel['ts_code'].nunique(), 8)
+    
+    def test_incremental_sync(self):
+        """测试再次同步只拉取缺失的交易日"""
+        self.client.sync_daily_panel(self.start_date, self.end_date)
+        
+        # 新客户端从磁盘面板恢复，不再发起调用
+        client = TushareClient(use_mock=True)
+        client._mock_client.daily = self.client._mock_client.daily
+        self.calls.clear()
+        client.sync_daily_panel(self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.calls), 0)
+    
+    def test_panel_compact_dtypes(self):
+        """测试面板只含投影字段并压缩数据类型"""
+        self.client.sync_daily_panel(self.start_date, self.end_date)
+        panel = self.client._daily_panel
+        
+        self.assertTrue(all(c['fields'] == DAILY_FIELDS for c in self.calls))
+        self.assertEqual(list(panel.columns), DAILY_FIELDS.split(','))
+        self.assertIsInstance(panel['ts_code'].dtype, pd.CategoricalDtype)
+        self.assertEqual(panel['trade_date'].dtype, np.int32)
+        self.assertEqual(panel['close'].dtype, np.float32)
+        
+        # 切出的单只股票数据还原为字符串日期
+        df = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date)
+        self.assertIsInstance(df['trade_date'].iloc[0], str)
+        self.assertEqual(df['ts_code'].iloc[0], '300274.SZ')
+    
+    def test_daily_data_served_from_panel(self):
+        """测试单只股票日线从面板读取"""
+        self.client.sync_daily_panel(self.start_date, self.end_date)
+        self.calls.clear()
+        
+        df = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.calls), 0)
+        self.assertFalse(df.empty)
+        self.assertTrue((df['ts_code'] == '300274.SZ').all())
+        self.assertTrue(df['trade_date'].is_monotonic_increasing)
+    
+    def test_bar_arrays_written(self):
+        """测试同步面板后写入内存映射数组，与面板切片一致"""
+        self.client.sync_daily_panel(self.start_date, self.end_date)
+        df = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        arrays = cache_mgr.bar_arrays()
+        self.assertEqual(len(arrays.codes()), 8)
+        bars = arrays.frame('300274.SZ')
+        self.assertListEqual(bars['trade_date'].astype(str).tolist(), df['trade_date'].tolist())
+        np.testing.assert_allclose(bars['close'], df['close'].astype(np.float32))
+
+
+class TestAdjFactorPanel(unittest.TestCase):
+    """全市场复权因子面板测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        self.client = TushareClient(use_mock=True)
+        self.end_date = datetime.datetime.now().strftime('%Y%m%d')
+        self.start_date = (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y%m%d')
+        
+        # 区间中间的交易日除权，因子变为 2.469
+        trade_dates = self.client.get_trade_dates(self.start_date, self.end_date)
+        self.ex_date = trade_dates[len(trade_dates) // 2]
+        mock = self.client._mock_client
+        mock._adj_factor = pd.concat([
+            mock._adj_factor,
+            pd.DataFrame({'ts_code': ['300274.SZ'], 'trade_date': [self.ex_date], 'adj_factor': [2.469]}),
+        ], ignore_index=True)
+        
+        self.calls = []
+        original_adj = mock.adj_factor
+        
+        def counting_adj(**kwargs):
+            self.calls.append(kwargs)
+            return original_adj(**kwargs)
+        
+        mock.adj_factor = counting_adj
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_one_call_per_trade_date(self):
+        """测试每个交易日只调用一次"""
+        trade_dates = self.client.get_trade_dates(self.start_date, self.end_date)
+        panel = self.client.sync_adj_factor_panel(self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.calls), len(trade_dates))
+        self.assertTrue(all('trade_date' in c for c in self.calls))
+        self.assertEqual(panel['ts_code'].nunique(), 8)
+    
+    def test_qfq_from_panel(self):
+        """测试前复权日线按每根K线当日的因子计算"""
+        self.client.sync_daily_panel(self.start_date, self.end_date)
+        self.client.sync_adj_factor_panel(self.start_date, self.end_date)
+        self.calls.clear()
+        
+        raw = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date)
+        qfq = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date, adj='qfq')
+        
+        self.assertEqual(len(self.calls), 0)
+        before = (raw['trade_date'] < self.ex_date).to_numpy()
+        np.testing.assert_allclose(qfq['close'][~before], raw['close'][~before])
+        np.testing.assert_allclose(qfq['close'][before], raw['close'][before] * 1.2345 / 2.469)
+    
+    def test_qfq_without_panel_matches_panel(self):
+        """测试未同步面板时按完整因子历史复权，结果与面板一致"""
+        self.client.sync_daily_panel(self.start_date, self.end_date)
+        per_stock = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date, adj='qfq')
+        self.assertEqual(self.calls, [{'ts_code': '300274.SZ'}])
+        
+        self.client.sync_adj_factor_panel(self.start_date, self.end_date)
+        from_panel = self.client.get_daily_data('300274.SZ', self.start_date, self.end_date, adj='qfq')
+        
+        np.testing.assert_allclose(per_stock['close'], from_panel['close'])
+
+
+class TestFundFlowPanel(unittest.TestCase):
+    """全市场资金流向面板测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        self.client = TushareClient(use_mock=True)
+        self.calls = []
+        mock = self.client._mock_client
+        
+        for name in ('moneyflow', 'moneyflow_hsgt'):
+            original = getattr(mock, name)
+            
+            def counting(original=original, name=name, **kwargs):
+                self.calls.append((name, kwargs))
+                return original(**kwargs)
+            
+            setattr(mock, name, counting)
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_bulk_calls(self):
+        """测试个股资金每个交易日一次调用，北向资金整个区间一次调用"""
+        date_range = self.client._recent_date_range(config.FUND_FLOW_SYNC_DAYS)
+        trade_dates = self.client.get_trade_dates(date_range['start_date'], date_range['end_date'])
+        
+        self.assertTrue(self.client.sync_fund_flows())
+        
+        names = [name for name, _ in self.calls]
+        self.assertEqual(names.count('moneyflow'), len(trade_dates))
+        self.assertEqual(names.count('moneyflow_hsgt'), 1)
+    
+    def test_no_per_stock_calls_after_sync(self):
+        """测试同步后资金因子不再逐只请求"""
+        self.client.sync_fund_flows()
+        self.calls.clear()
+        
+        main_funds = self.client.get_main_funds('300274.SZ')
+        northbound = self.client.get_northbound_funds('300274.SZ')
+        
+        self.assertEqual(self.calls, [])
+        self.assertIn('net_inflow_5d', main_funds)
+        self.assertIn('consecutive_days', northbound)
+        self.assertGreater(northbound['total_net_inflow'], 0)
+    
+    def test_matches_panel(self):
+        """测试5日净流入与面板最近5个交易日合计一致"""
+        self.client.sync_fund_flows()
+        panel = self.client._moneyflow_panel
+        rows = panel[panel['ts_code'] == '300274.SZ'].sort_values('trade_date').tail(5)
+        
+        main_funds = self.client.get_main_funds('300274.SZ')
+        
+        self.assertAlmostEqual(main_funds['net_inflow_5d'], rows['net_mf_amount'].sum())
+    
+    def test_unknown_stock(self):
+        """测试面板中没有的股票返回0"""
+        self.client.sync_fund_flows()
+        self.assertEqual(self.client.get_main_funds('999999.SZ'), {'net_inflow_5d': 0})
+
+
+class TestIndustryRpsPanel(unittest.TestCase):
+    """行业指数面板与百分位RPS测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        self.client = TushareClient(use_mock=True)
+        self.client.use_mock = False
+        self.client._pro = self.client._mock_client
+        self.calls = []
+        original = self.client._mock_client.sw_daily
+        
+        def counting_sw_daily(**kwargs):
+            self.calls.append(kwargs)
+            return original(**kwargs)
+        
+        self.client._mock_client.sw_daily = counting_sw_daily
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_one_call_per_trade_date(self):
+        """测试每个交易日一次 sw_daily 调用，覆盖所有一级行业"""
+        df = self.client.get_industry_rps()
+        
+        self.assertTrue(all(set(c) == {'trade_date'} for c in self.calls))
+        self.assertEqual(len(self.calls), len(set(c['trade_date'] for c in self.calls)))
+        self.assertEqual(len(df), 10)
+        for w in config.RPS_WINDOWS:
+            self.assertIn(f'ret_{w}', df.columns)
+    
+    def test_percentile_rps(self):
+        """测试RPS为百分位且按RPS降序"""
+        df = self.client.get_industry_rps()
+        
+        self.assertEqual(df['rps'].iloc[0], 100.0)
+        self.assertTrue(df['rps'].is_monotonic_decreasing)
+        self.assertTrue(((df['rps'] > 0) & (df['rps'] <= 100)).all())
+        # 主周期涨幅最高的行业RPS最高
+        self.assertEqual(df['industry'].iloc[0],
+                         df.loc[df[f'ret_{config.RPS_DAYS}'].idxmax(), 'industry'])
+    
+    def test_incremental_panel(self):
+        """测试再次计算时不重复拉取已有交易日"""
+        self.client.get_industry_rps()
+        cache_mgr.clear_cache_by_name('industry_rps')
+        self.calls.clear()
+        
+        self.client.get_industry_rps()
+        
+        self.assertEqual(self.calls, [])
+
+
+class TestIncrementalDailySync(unittest.TestCase):
+    """单只股票日线增量同步测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        self.end_date = datetime.datetime.now().strftime('%Y%m%d')
+        self.start_date = (datetime.datetime.now() - datetime.timedelta(days=120)).strftime('%Y%m%d')
+        
+        mock = MockTushareClient()
+        self.trade_dates = mock.trade_cal(start_date=self.start_date, end_date=self.end_date, is_open='1')['cal_date'].tolist()
+        self.requests = []
+        self.fields = []
+        test = self
+        
+        class FakeApi:
+            available = self.trade_dates[:-3]
+            
+            def trade_cal(self, **kwargs):
+                return mock.trade_cal(**kwargs)
+            
+            def daily(self, ts_code, start_date, end_date, fields=None):
+                test.requests.append((start_date, end_date))
+                test.fields.append(fields)
+                dates = [d for d in self.available if start_date <= d <= end_date]
+                return pd.DataFrame({
+                    'ts_code': ts_code,
+                    'trade_date': dates[::-1],  # 接口按日期倒序返回
+                    'open': 10.0, 'high': 11.0, 'low': 9.0, 'close': 10.5, 'vol': 1000.0,
+                })
+        
+        self.api = FakeApi()
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def _new_client(self):
+        client = TushareClient(use_mock=True)
+        client.use_mock = False
+        client._pro = self.api
+        return client
+    
+    def test_fetch_only_missing_sessions(self):
+        """测试只拉取缓存最后交易日之后的数据"""
+        df = self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        self.assertEqual(self.requests, [(self.start_date, self.end_date)])
+        self.assertEqual(len(df), len(self.trade_dates) - 3)
+        
+        # 新增3个交易日
+        self.api.available = self.trade_dates
+        df = self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.requests), 2)
+        self.assertGreater(self.requests[1][0], self.trade_dates[-4])
+        self.assertEqual(df['trade_date'].tolist(), self.trade_dates)
+        self.assertFalse(df['trade_date'].duplicated().any())
+    
+    def test_projected_fields_and_compact_dtypes(self):
+        """测试只请求指标需要的字段，价格压缩为 float32"""
+        df = self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(self.fields, [DAILY_FIELDS])
+        for col in ('open', 'high', 'low', 'close', 'vol'):
+            self.assertEqual(df[col].dtype, np.float32)
+        self.assertIsInstance(df['trade_date'].iloc[0], str)
+    
+    def test_up_to_date_cache_skips_api(self):
+        """测试缓存已是最新时不调用接口"""
+        self.api.available = self.trade_dates
+        self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.requests), 1)
+    
+    def test_short_history_refetches_window(self):
+        """测试缓存未覆盖区间起点时整段拉取"""
+        self.api.available = self.trade_dates
+        self._new_client().get_daily_data('300274.SZ', self.trade_dates[-10], self.end_date)
+        df = self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(self.requests[-1][0], self.start_date)
+        self.assertGreaterEqual(len(df), TushareClient._min_daily_bars())
+    
+    def test_listed_inside_window_syncs_incrementally(self):
+        """测试区间内上市的股票缓存从上市首日开始即视为覆盖起点，只拉取新交易日"""
+        cache_mgr.save_stock_list_cache(pd.DataFrame({
+            'ts_code': ['300274.SZ'], 'name': ['阳光电源'], 'list_date': [self.trade_dates[5]], 'list_status': ['L'],
+        }))
+        self.api.available = self.trade_dates[5:-3]
+        self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        self.api.available = self.trade_dates[5:]
+        df = self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.requests), 2)
+        self.assertGreater(self.requests[1][0], self.trade_dates[-4])
+        self.assertEqual(df['trade_date'].tolist(), self.trade_dates[5:])
+        self.assertIsNone(cache_mgr.load_cache('daily_heads'))
+    
+    def test_suspended_at_window_start_syncs_incrementally(self):
+        """测试区间起点停牌的股票记下第一根K线后，只拉取新交易日"""
+        self.api.available = self.trade_dates[2:-3]
+        self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        self.api.available = self.trade_dates[2:]
+        df = self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual(len(self.requests), 2)
+        self.assertGreater(self.requests[1][0], self.trade_dates[-4])
+        self.assertEqual(df['trade_date'].tolist(), self.trade_dates[2:])
+        heads = cache_mgr.load_cache_index('daily_heads')
+        self.assertEqual(str(heads['300274.SZ']['first_date']), self.trade_dates[2])
+    
+    def test_async_suspended_at_window_start_syncs_incrementally(self):
+        """测试异步客户端同样记下第一根K线，下次只拉取新交易日"""
+        def fetch():
+            client = AsyncTushareClient(self._new_client())
+            return asyncio.run(client.get_daily_data('300274.SZ', self.start_date, self.end_date))
+        
+        self.api.available = self.trade_dates[2:-3]
+        fetch()
+        self.api.available = self.trade_dates[2:]
+        df = fetch()
+        
+        self.assertEqual(len(self.requests), 2)
+        self.assertGreater(self.requests[1][0], self.trade_dates[-4])
+        self.assertEqual(df['trade_date'].tolist(), self.trade_dates[2:])
+
+
+class TestIncrementalDailySyncSqlite(TestIncrementalDailySync):
+    """单只股票日线增量同步测试 - SQLite 缓存"""
+    
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(config, 'CACHE_FORMAT', 'sqlite')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_bars_stored_in_database(self):
+        """测试日线写入数据库而非文件"""
+        self._new_client().get_daily_data('300274.SZ', self.start_date, self.end_date)
+        
+        self.assertEqual([p.name for p in self.test_cache_dir.glob('*') if not p.name.startswith(('cache.db', '.locks'))], [])
+        bars = cache_mgr.sql_store().read_bars('300274.SZ')
+        self.assertEqual(len(bars), len(self.trade_dates) - 3)
+
+
+class TestConcurrentFinancialFetch(unittest.TestCase):
+    """并发财务数据下载测试 - 以Mock客户端充当真实接口"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        self.client = TushareClient(use_mock=True)
+        self.client.use_mock = False
+        self.client._pro = self.client._mock_client
+        self.original_bulk_mode = config.FINA_BULK_MODE
+        config.FINA_BULK_MODE = False
+    
+    def tearDown(self):
+        config.FINA_BULK_MODE = self.original_bulk_mode
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_thread_pool_matches_serial(self):
+        """测试线程池结果与串行一致"""
+        self.client._rate_limiters['fina_indicator'] = TokenBucket(60000)
+        df_parallel = self.client.get_all_financial_ttm(max_workers=4)
+        cache_mgr.clear_cache_by_name('financial_ttm')
+        df_serial = self.client.get_all_financial_ttm(max_workers=1)
+        
+        self.assertEqual(len(df_parallel), 8)
+        self.assertEqual(sorted(df_parallel['ts_code']), sorted(df_serial['ts_code']))
+    
+    def test_rate_limiter_shared_per_endpoint(self):
+        """测试同一接口共享一个令牌桶"""
+        limiter = self.client._get_rate_limiter('fina_indicator')
+        
+        self.assertIs(limiter, self.client._get_rate_limiter('fina_indicator'))
+        self.assertEqual(limiter.rate_per_minute, 200)
+
+
+class TestFinancialByPeriod(unittest.TestCase):
+    """按报告期批量拉取财务指标测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        self.original_page_size = config.FINA_PAGE_SIZE
+        config.FINA_PAGE_SIZE = 3
+        
+        self.client = TushareClient(use_mock=True)
+        self.client.use_mock = False
+        self.client._pro = self.client._mock_client
+        self.calls = []
+        original = self.client._mock_client.fina_indicator_vip
+        
+        def counting(**kwargs):
+            self.calls.append(kwargs)
+            return original(**kwargs)
+        
+        self.client._mock_client.fina_indicator_vip = counting
+    
+    def tearDown(self):
+        config.FINA_PAGE_SIZE = self.original_page_size
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_pagination(self):
+        """测试按页拉取直到返回不足一页"""
+        df = self.client.get_financial_by_period('20250930')
+        
+        # 8条记录，每页3条 -> 3页
+        self.assertEqual(len(df), 8)
+        self.assertEqual(sorted(c['offset'] for c in self.calls), [0, 3, 6])
+    
+    def test_merge_into_financial_cache(self):
+        """测试合并后每只股票首行为最新报告期"""
+        self.client.sync_financial_periods(['20250930', '20250630'])
+        
+        self.assertAlmostEqual(self.client.get_financial_ttm('300274.SZ')['roe_ttm'], 29.05)
+        df = cache_mgr.load_financial_ttm_cache()
+        self.assertEqual(len(df[df['ts_code'] == '300274.SZ']), 2)
+    
+    def test_closed_period_not_refetched(self):
+        """测试披露截止后已拉取的报告期不再请求"""
+        self.client.sync_financial_periods(['20250630'])
+        
+        # 模拟上次拉取发生在披露截止日之前
+        meta = cache_mgr.load_financial_periods_cache()
+        meta['fetched_at'] = '20250820'
+        cache_mgr.save_financial_periods_cache(meta)
+        self.calls.clear()
+        self.client.sync_financial_periods(['20250630'])
+        # 截止前拉取过 -> 仅增量拉取新公告
+        self.assertEqual(self.calls[0]['start_date'], '20250829')
+        
+        self.calls.clear()
+        meta = cache_mgr.load_financial_periods_cache()
+        meta['fetched_at'] = '20250905'
+        cache_mgr.save_financial_periods_cache(meta)
+        self.client.sync_financial_periods(['20250630'])
+        self.assertEqual(self.calls, [])
+    
+    def test_recent_report_periods(self):
+        """测试最近报告期计算"""
+        periods = TushareClient._recent_report_periods(4, datetime.date(2026, 2, 18))
+        
+        self.assertEqual(periods, ['20251231', '20250930', '20250630', '20250331'])
+        self.assertEqual(TushareClient._report_deadline('20251231'), '20260430')
+
+
+class TestPagination(unittest.TestCase):
+    """行数受限接口的分页拉取测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        self.original_limits = config.API_ROW_LIMITS
+        config.API_ROW_LIMITS = {'default': 5000, 'daily_basic': 4, 'daily': 4}
+        
+        # 10只股票 x 6个交易日
+        self.codes = [f"{i:06d}.SZ" for i in range(10)]
+        self.dates = ['20260202', '20260203', '20260204', '20260205', '20260206', '20260209']
+        self.rows = pd.DataFrame(
+            [(c, d, float(i)) for i, c in enumerate(self.codes) for d in self.dates],
+            columns=['ts_code', 'trade_date', 'total_mv'],
+        )
+        self.calls = []
+        test = self
+        
+        class FakeApi:
+            def daily_basic(self, ts_code=None, trade_date=None, start_date=None, end_date=None,
+                            fields=None, limit=None, offset=0):
+                test.calls.append(dict(ts_code=ts_code, trade_date=trade_date, start_date=start_date,
+                                       end_date=end_date, offset=offset))
+                df = test.rows
+                if ts_code:
+                    df = df[df['ts_code'].isin(ts_code.split(','))]
+                if trade_date:
+                    df = df[df['trade_date'] == trade_date]
+                if start_date:
+                    df = df[(df['trade_date'] >= start_date) & (df['trade_date'] <= end_date)]
+                df = df.iloc[offset:]
+                # 服务端截断
+                return df.head(limit or config.API_ROW_LIMITS['daily_basic']).reset_index(drop=True)
+            
+            def daily(self, trade_date=None, fields=None, limit=None, offset=0):
+                test.calls.append(dict(trade_date=trade_date, offset=offset))
+                df = test.rows[test.rows['trade_date'] == trade_date].rename(columns={'total_mv': 'close'})
+                return df.iloc[offset:].head(limit or config.API_ROW_LIMITS['daily']).reset_index(drop=True)
+        
+        self.client = TushareClient(use_mock=True)
+        self.client.use_mock = False
+        self.client._pro = FakeApi()
+    
+    def tearDown(self):
+        config.API_ROW_LIMITS = self.original_limits
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_offset_pages(self):
+        """测试按 offset 翻页直到不足一页"""
+        df = self.client.query_all('daily_basic', trade_date='20260209')
+        
+        self.assertEqual(sorted(df['ts_code']), self.codes)
+        self.assertEqual(df['ts_code'].tolist(), self.codes)  # 按页顺序合并
+        self.assertEqual(sorted(c['offset'] for c in self.calls), [0, 4, 8])
+    
+    def test_split_by_codes(self):
+        """测试截断的代码批次对半拆分"""
+        df = self.client.query_all('daily_basic', split_by='codes', codes=self.codes, batch_size=5,
+                                   start_date='20260205', end_date='20260209')
+        
+        self.assertEqual(len(df), 10 * 3)
+        self.assertFalse(df.duplicated(['ts_code', 'trade_date']).any())
+        self.assertTrue(all(len(c['ts_code'].split(',')) <= 5 for c in self.calls))
+    
+    def test_split_by_date(self):
+        """测试截断的日期区间对半拆分"""
+        df = self.client.query_all('daily_basic', split_by='date', ts_code=','.join(self.codes[:2]),
+                                   start_date='20260202', end_date='20260209')
+        
+        self.assertEqual(len(df), 12)
+        self.assertFalse(df.duplicated(['ts_code', 'trade_date']).any())
+    
+    def test_failure_returns_none(self):
+        """测试任一页失败时返回None"""
+        with mock.patch.object(self.client, '_query', side_effect=[self.rows.head(4), None, None]):
+            self.assertIsNone(self.client.query_all('daily_basic', trade_date='20260209'))
+    
+    def test_invalid_split(self):
+        """测试不支持的拆分方式"""
+        with self.assertRaises(ValueError):
+            self.client.query_all('daily_basic', split_by='month')
+    
+    def test_market_caps_by_trade_date(self):
+        """测试全市场市值按交易日分页拉取，每只股票一条"""
+        with mock.patch.object(self.client, 'get_trade_dates', return_value=self.dates):
+            df = self.client.get_all_market_caps()
+        
+        self.assertEqual(sorted(df['ts_code']), self.codes)
+        self.assertTrue(all(c['trade_date'] == '20260209' for c in self.calls))
+        self.assertAlmostEqual(self.client.get_market_cap('000003.SZ'), 3.0 / 100000)
+    
+    def test_daily_by_trade_date_pages(self):
+        """测试全市场单日日线达到行数上限时翻页，不丢失股票"""
+        df = self.client.get_daily_by_trade_date('20260209')
+        
+        self.assertEqual(df['ts_code'].tolist(), self.codes)
+        self.assertEqual(sorted(c['offset'] for c in self.calls), [0, 4, 8])
+
+
+class TestIndexedCacheLookup(unittest.TestCase):
+    """缓存索引查询测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        cache_mgr.save_market_cap_cache(generate_mock_market_cap())
+        cache_mgr.save_financial_ttm_cache(generate_mock_financial_ttm())
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_csv_parsed_once_for_many_lookups(self):
+        """测试逐只查询时每个缓存文件只解析一次"""
+        original_load_cache = cache_mgr.load_cache
+        loads = []
+        
+        def counting_load_cache(cache_name, *args, **kwargs):
+            loads.append(cache_name)
+            return original_load_cache(cache_name, *args, **kwargs)
+        
+        cache_mgr.load_cache = counting_load_cache
+        try:
+            client = TushareClient(use_mock=True)
+            for code in generate_mock_stock_list()['ts_code']:
+                client.get_market_cap(code)
+                client.get_financial_ttm(code)
+        finally:
+            cache_mgr.load_cache = original_load_cache
+        
+        self.assertEqual(loads.count('market_cap'), 1)
+        self.assertEqual(loads.count('financial_ttm'), 1)
+    
+    def test_lookup_values(self):
+        """测试索引查询结果与缓存一致"""
+        client = TushareClient(use_mock=True)
+        
+        self.assertAlmostEqual(client.get_market_cap('300274.SZ'), 32236364.43 / 100000)
+        self.assertAlmostEqual(client.get_financial_ttm('300274.SZ')['roe_ttm'], 29.05)
+
+
+class TestRequestCoalescing(unittest.TestCase):
+    """相同请求单飞合并测试"""
+    
+    def setUp(self):
+        use_temp_cache_dir(self)
+    
+    def test_concurrent_identical_queries(self):
+        """测试并发的相同请求只访问一次接口"""
+        import threading
+        import time
+        
+        client = TushareClient(use_mock=True)
+        client.use_mock = False
+        calls = []
+        
+        class SlowApi:
+            def stock_basic(self, **kwargs):
+                calls.append(kwargs)
+                time.sleep(0.1)
+                return generate_mock_stock_list()
+        
+        client._pro = SlowApi()
+        results = []
+        barrier = threading.Barrier(3)
+        
+        def worker():
+            barrier.wait()
+            results.append(client._query('stock_basic', exchange='', list_status='L'))
+        
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 3)
+        # 等待方拿到的是副本
+        self.assertEqual(len({id(r) for r in results}), 3)
+
+
+class TestRetryAndCircuitBreaker(unittest.TestCase):
+    """重试、限流与熔断测试"""
+    
+    def setUp(self):
+        self.saved = {name: getattr(config, name) for name in
+                      ('API_RETRY_TIMES', 'API_BREAKER_THRESHOLD', 'API_THROTTLE_WAIT')}
+        config.API_RETRY_TIMES = 3
+        config.API_BREAKER_THRESHOLD = 4
+        config.API_THROTTLE_WAIT = 0.05
+        
+        use_temp_cache_dir(self)
+        self.client = TushareClient(use_mock=True)
+        self.client.use_mock = False
+        self.patcher = mock.patch('api.tushare_client.backoff_delay', return_value=0)
+        self.patcher.start()
+    
+    def tearDown(self):
+        self.patcher.stop()
+        for name, value in self.saved.items():
+            setattr(config, name, value)
+    
+    def _set_api(self, errors):
+        """依次抛出 errors 中的异常，用尽后返回数据"""
+        calls = []
+        
+        class FlakyApi:
+            def daily(self, **kwargs):
+                calls.append(kwargs)
+                if errors:
+                    raise errors.pop(0)
+                return pd.DataFrame({'trade_date': ['20260213']})
+        
+        self.client._pro = FlakyApi()
+        return calls
+    
+    def test_recovers_after_retry(self):
+        """测试重试成功后状态正常"""
+        calls = self._set_api([TimeoutError('timeout')])
+        df = self.client._query('daily', trade_date='20260213')
+        
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(df.empty)
+        self.assertEqual(self.client.get_api_status()['status'], 'ok')
+    
+    def test_exhausted_retries_degraded(self):
+        """测试重试用尽后报告降级而不是静默返回None"""
+        calls = self._set_api([TimeoutError('timeout')] * 5)
+        result = self.client._query('daily', trade_date='20260213')
+        
+        self.assertIsNone(result)
+        self.assertEqual(len(calls), 3)
+        status = self.client.get_api_status()
+        self.assertEqual(status['status'], 'degraded')
+        self.assertEqual(status['endpoints']['daily']['failures'], 1)
+    
+    def test_circuit_breaker_fails_fast(self):
+        """测试熔断后不再访问接口"""
+        calls = self._set_api([TimeoutError('timeout')] * 10)
+        self.client._query('daily', trade_date='20260212')
+        self.client._query('daily', trade_date='20260213')  # 第4次失败触发熔断
+        n_calls = len(calls)
+        
+        self.assertIsNone(self.client._query('daily', trade_date='20260216'))
+        self.assertEqual(len(calls), n_calls)
+        self.assertEqual(self.client.get_api_status()['endpoints']['daily']['rejected'], 1)
+    
+    def test_throttle_pauses_and_retries(self):
+        """测试服务端限流时暂停令牌桶后重试，不计入熔断"""
+        throttled = Exception('抱歉，您每分钟最多访问该接口500次')
+        calls = self._set_api([throttled])
+        
+        start = time.monotonic()
+        df = self.client._query('daily', trade_date='20260213')
+        
+        self.assertFalse(df.empty)
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        endpoint = self.client.get_api_status()['endpoints']['daily']
+        self.assertEqual(endpoint['throttled'], 1)
+        self.assertEqual(endpoint['calls'], 2)
+        self.assertEqual(self.client._get_breaker('daily').state, 'closed')
+    
+    def test_throttled_trial_releases_breaker(self):
+        """测试半开状态的试探请求被限流后，下一次调用仍可放行"""
+        config.API_RETRY_TIMES = 1
+        breaker = self.client._get_breaker('daily')
+        breaker.recovery_timeout = 0
+        breaker.trip()
+        calls = self._set_api([Exception('抱歉，您每分钟最多访问该接口500次')])
+        
+        self.assertIsNone(self.client._query('daily', trade_date='20260212'))
+        self.assertEqual(breaker.state, 'half_open')
+        
+        df = self.client._query('daily', trade_date='20260213')
+        self.assertFalse(df.empty)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(breaker.state, 'closed')
+    
+    def test_points_bucket_fits_costliest_api(self):
+        """测试积分桶容量不小于单次最高消耗，不会永久等待"""
+        with mock.patch.object(config, 'API_POINTS_PER_MINUTE', 300), \
+                mock.patch.dict(config.API_POINT_COSTS, {'daily': 10}):
+            client = TushareClient(use_mock=True)
+            self.assertGreaterEqual(client._points_limiter.capacity, 10)
+            
+            client._acquire_quota('daily')
+        
+        self.assertEqual(client.get_api_status()['endpoints']['daily']['calls'], 1)
+    
+    def test_quota_exhausted_trips_breaker(self):
+        """测试配额耗尽直接熔断"""
+        calls = self._set_api([Exception('抱歉，您每天最多访问该接口2000次')])
+        
+        self.assertIsNone(self.client._query('daily', trade_date='20260213'))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.client._get_breaker('daily').state, 'open')
+
+
 class TestBoundaryConditions(unittest.TestCase):
     """边界条件测试"""
     
+    def setUp(self):
+        use_temp_cache_dir(self)
+    
     def test_empty_stock_list(self):
         """测试空股票列表"""
         client = TushareClient(use_mock=True)
@@ -0,0 +1,172 @@
+"""
+日线内存映射数组存储测试
+"""
+import unittest
+import os
+import sys
+import shutil
+import datetime
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from api.tushare_client import TushareClient
+from config import config
+from data.array_store import BarArrayStore
+from indicators.technical import calculate_ma
+from tests.helpers import make_bars
+
+
+class TestBarArrayStore(unittest.TestCase):
+    """内存映射数组单元测试"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp()) / 'bar_arrays'
+        self.store = BarArrayStore(self.root, fields=['close', 'vol', 'amount'])
+        self.store.write(pd.concat([
+            make_bars('600000.SH', ['20261009', '20261010'], step=1.0, vol=100.0),
+            make_bars('000001.SZ', ['20261010', '20261008', '20261009'], step=1.0, vol=100.0),
+        ], ignore_index=True))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.root.parent, ignore_errors=True)
+
+    def test_layout(self):
+        """测试定长列文件、字段类型与行偏移"""
+        directory = self.root / (self.root / 'CURRENT').read_text()
+        self.assertListEqual(sorted(p.name for p in directory.iterdir()),
+                             ['close.f32', 'meta.json', 'trade_date.i32', 'vol.f32'])
+        self.assertEqual((directory / 'close.f32').stat().st_size, 5 * 4)
+        self.assertListEqual(self.store.codes(), ['000001.SZ', '600000.SH'])
+        self.assertEqual(self.store.offsets(), {'000001.SZ': (0, 3), '600000.SH': (3, 5)})
+        self.assertEqual(self.store.stats(), {'stocks': 2, 'rows': 5, 'fields': 3})
+
+    def test_stock_slice_is_view(self):
+        """测试单只股票切片是 memmap 上的视图，按日期升序，可按区间截取"""
+        column = self.store.column('close')
+        self.assertIsInstance(column, np.memmap)
+        self.assertFalse(column.flags.writeable)
+
+        arrays = self.store.stock('000001.SZ')
+        self.assertListEqual(arrays['trade_date'].tolist(), [20261008, 20261009, 20261010])
+        self.assertEqual(arrays['close'].dtype, np.float32)
+        self.assertTrue(np.shares_memory(arrays['close'], column))
+
+        arrays = self.store.stock('000001.SZ', fields=['close'], start_date='20261009', end_date='20261009')
+        self.assertListEqual(list(arrays), ['close'])
+        self.assertEqual(len(arrays['close']), 1)
+        self.assertIsNone(self.store.stock('000002.SZ'))
+
+    def test_frame_zero_copy(self):
+        """测试 DataFrame 直接引用映射数据，可传给指标函数"""
+        df = self.store.frame('600000.SH')
+        self.assertTrue(np.shares_memory(df['close'].to_numpy(), self.store.column('close')))
+
+        result = calculate_ma(df, periods=[2])
+        self.assertAlmostEqual(float(result['ma2'].iloc[-1]), 1.5)
+        self.assertListEqual(self.store.frame('600000.SH')['close'].tolist(), [1.0, 2.0])
+
+    def test_rewrite_switches_version(self):
+        """测试重建后读取新版本，旧版本目录删除"""
+        old = self.store.stock('600000.SH')['close']
+        self.store.write(make_bars('600000.SH', ['20261012'], close=5.0))
+
+        self.assertListEqual(self.store.codes(), ['600000.SH'])
+        self.assertListEqual(self.store.stock('600000.SH')['close'].tolist(), [5.0])
+        self.assertListEqual(old.tolist(), [1.0, 2.0])
+        self.assertListEqual(sorted(p.name for p in self.root.iterdir()), ['CURRENT', 'v000002'])
+
+        # 另一个实例 (如其他进程) 打开同一目录
+        self.assertListEqual(BarArrayStore(self.root).codes(), ['600000.SH'])
+
+
+class TestBarArrayCache(unittest.TestCase):
+    """从日线缓存重建内存映射数组"""
+
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+
+    def tearDown(self):
+        cache_mgr.bar_arrays().close()
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def test_build_from_daily_store(self):
+        """测试从分区存储重建，清空缓存时一并删除"""
+        cache_mgr.save_daily_cache('000001.SZ', make_bars('000001.SZ', ['20260930', '20261009']))
+        cache_mgr.save_daily_cache('600000.SH', make_bars('600000.SH', ['20261009']))
+
+        self.assertEqual(cache_mgr.build_bar_arrays(), 3)
+        arrays = cache_mgr.bar_arrays()
+        self.assertListEqual(arrays.stock('000001.SZ')['trade_date'].tolist(), [20260930, 20261009])
+
+        cache_mgr.clear_all_cache()
+        self.assertFalse(arrays.exists())
+
+
+class TestClientBarArrays(unittest.TestCase):
+    """Step 4 从内存映射数组读取单只股票日线"""
+
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        self.client = TushareClient(use_mock=True)
+        today = datetime.date.today()
+        self.start = (today - datetime.timedelta(days=100)).strftime('%Y%m%d')
+        self.end = today.strftime('%Y%m%d')
+
+    def tearDown(self):
+        cache_mgr.bar_arrays().close()
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def _sync(self):
+        self.client.sync_daily_panel(self.start, self.end)
+        self.client.sync_adj_factor_panel(self.start, self.end)
+
+    def test_same_as_panel(self):
+        """测试从数组读取 (含前/后复权) 与从面板切出的结果一致，且不生成全市场复权面板"""
+        self._sync()
+        self.assertIsNotNone(self.client._bar_arrays)
+        codes = list(self.client._daily_panel_index)
+        start = self.client.get_trade_dates(self.start, self.end)[5]
+
+        results = {(code, adj): self.client.get_daily_data(code, start, self.end, adj=adj)
+                   for code in codes for adj in (None, 'qfq', 'hfq')}
+        self.assertEqual(self.client._adjusted_panels, {})
+
+        self.client._bar_arrays = None
+        for (code, adj), df in results.items():
+            self.assertGreater(len(df), 0)
+            expected = self.client._get_daily_from_panel(code, start, self.end, adj=adj)
+            pd.testing.assert_frame_equal(df, expected)
+
+    def test_rebuilt_when_missing(self):
+        """测试数组缺失 (如其他进程清除) 时按面板重建，关闭时从面板读取"""
+        self._sync()
+        cache_mgr.bar_arrays().close()
+        shutil.rmtree(self.test_cache_dir / 'bar_arrays')
+
+        client = TushareClient(use_mock=True)
+        client.sync_daily_panel(self.start, self.end)
+        self.assertIsNotNone(client._bar_arrays)
+        self.assertEqual(cache_mgr.bar_arrays().stats()['rows'], len(client._daily_panel))
+
+        with mock.patch.object(config, 'BAR_ARRAYS_ENABLED', False):
+            client = TushareClient(use_mock=True)
+            client.sync_daily_panel(self.start, self.end)
+        self.assertIsNone(client._bar_arrays)
+
+
+if __name__ == '__main__':
+    unittest.main()
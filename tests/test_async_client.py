@@ -0,0 +1,167 @@
+"""
+异步API客户端测试
+"""
+import unittest
+from unittest import mock
+import asyncio
+import threading
+import time
+import datetime
+import sys
+import os
+import tempfile
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from api.tushare_client import TushareClient
+from api.async_client import AsyncTushareClient
+from api.concurrency import TokenBucket
+from strategy.filter import StockFilter
+
+
+class FakeApi:
+    """模拟阻塞的Tushare接口，记录最大并发数"""
+    
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+    
+    def adj_factor(self, ts_code):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise ConnectionError("network down")
+            return pd.DataFrame({'ts_code': [ts_code], 'trade_date': ['20260213'], 'adj_factor': [1.5]})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestAsyncTushareClient(unittest.TestCase):
+    """异步客户端测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def _make_client(self, api, max_concurrency):
+        client = TushareClient(use_mock=True)
+        client.use_mock = False
+        client._pro = api
+        client._rate_limiters['adj_factor'] = TokenBucket(60000, capacity=100)
+        return AsyncTushareClient(client, max_concurrency=max_concurrency)
+    
+    def test_mock_surface_matches_sync(self):
+        """测试Mock模式下结果与同步客户端一致"""
+        sync_client = TushareClient(use_mock=True)
+        async_client = AsyncTushareClient(TushareClient(use_mock=True))
+        
+        async def run():
+            return await asyncio.gather(
+                async_client.get_market_cap('300274.SZ'),
+                async_client.get_financial_ttm('300274.SZ'),
+                async_client.get_main_funds('300274.SZ'),
+            )
+        
+        mv, fin, funds = asyncio.run(run())
+        
+        self.assertEqual(mv, sync_client.get_market_cap('300274.SZ'))
+        self.assertEqual(fin, sync_client.get_financial_ttm('300274.SZ'))
+        self.assertEqual(funds, sync_client.get_main_funds('300274.SZ'))
+    
+    def test_bounded_concurrency(self):
+        """测试并发请求数不超过上限"""
+        api = FakeApi(delay=0.05)
+        client = self._make_client(api, max_concurrency=3)
+        codes = [f"{i:06d}.SZ" for i in range(12)]
+        
+        async def run():
+            return await asyncio.gather(*(client.get_adj_factor(c) for c in codes))
+        
+        factors = asyncio.run(run())
+        
+        self.assertEqual(factors, [1.5] * 12)
+        self.assertEqual(api.calls, 12)
+        self.assertLessEqual(api.max_active, 3)
+        self.assertGreater(api.max_active, 1)
+    
+    def test_cancel_stops_retry(self):
+        """测试退避期间取消任务不再重试"""
+        api = FakeApi(delay=0, fail=True)
+        client = self._make_client(api, max_concurrency=2)
+        
+        async def run():
+            task = asyncio.create_task(client.get_adj_factor('300274.SZ'))
+            await asyncio.sleep(0.2)  # 首次失败后进入1秒退避
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        
+        # 固定首次退避为1秒 (默认带随机抖动)
+        with mock.patch('api.tushare_client.backoff_delay', return_value=1.0):
+            asyncio.run(run())
+        self.assertEqual(api.calls, 1)
+
+
+class TestAsyncPipeline(unittest.TestCase):
+    """StockFilter异步流程测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_async_step4_matches_sync(self):
+        """测试异步Step 4与同步版本结果一致"""
+        client = TushareClient(use_mock=True)
+        filter_obj = StockFilter(client)
+        leaders = [
+            {'ts_code': '300274.SZ', 'symbol': '300274', 'name': '阳光电源',
+             'industry': '电气设备', 'market_cap': 3223.6},
+            {'ts_code': '600519.SH', 'symbol': '600519', 'name': '贵州茅台',
+             'industry': '白酒', 'market_cap': 23234.5},
+        ]
+        
+        sync_results = filter_obj.step4_technical_filter(leaders)
+        async_results = asyncio.run(
+            filter_obj.step4_technical_filter_async(leaders, AsyncTushareClient(client))
+        )
+        
+        self.assertEqual(
+            [r['code'] for r in sync_results],
+            [r['code'] for r in async_results],
+        )
+    
+    def test_run_full_filter_async(self):
+        """测试异步完整流程"""
+        filter_obj = StockFilter(TushareClient(use_mock=True))
+        
+        results = asyncio.run(filter_obj.run_full_filter_async())
+        
+        self.assertIsInstance(results, list)
+
+
+if __name__ == '__main__':
+    unittest.main()
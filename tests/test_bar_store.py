@@ -0,0 +1,184 @@
+"""
+日线分区存储测试
+"""
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from api.tushare_client import TushareClient
+from data.bar_store import DailyBarStore
+from data.storage import CsvBackend
+from tests.helpers import make_bars
+
+
+class TestDailyBarStore(unittest.TestCase):
+    """分区存储单元测试"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp()) / 'daily_bars'
+        self.store = DailyBarStore(self.root, CsvBackend(), max_deltas=3, flush_rows=1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.root.parent, ignore_errors=True)
+
+    def test_read_stock_across_partitions(self):
+        """测试单只股票跨月读取 (含缓冲)，按日期升序"""
+        self.store.append(make_bars('000001.SZ', ['20260930', '20261009']))
+        self.store.append(make_bars('600000.SH', ['20261009']))
+        self.store.flush()
+        self.store.append(make_bars('000001.SZ', ['20261010'], close=2.0))
+
+        df = self.store.read_stock('000001.SZ')
+        self.assertListEqual(list(df['trade_date']), ['20260930', '20261009', '20261010'])
+        self.assertListEqual(list(self.store.read_stock('000001.SZ', start_date='20261001')['close']), [1.0, 2.0])
+        self.assertListEqual(list(self.store.read_stock('000001.SZ', columns=['close', 'vol']).columns), ['close'])
+        self.assertIsNone(self.store.read_stock('000002.SZ'))
+        self.assertListEqual(self.store.partitions(), ['202609', '202610'])
+
+    def test_last_write_wins(self):
+        """测试同一 (ts_code, trade_date) 以最后写入为准"""
+        self.store.append(make_bars('000001.SZ', ['20261009'], close=1.0))
+        self.store.flush()
+        self.store.append(make_bars('000001.SZ', ['20261009'], close=3.0))
+        self.assertListEqual(list(self.store.read_stock('000001.SZ')['close']), [3.0])
+        self.store.flush()
+        self.store.compact()
+        self.assertListEqual(list(self.store.read_stock('000001.SZ')['close']), [3.0])
+
+    def test_cross_section(self):
+        """测试单日截面 (文件与缓冲合并，按代码排序)"""
+        self.store.append(make_bars('600000.SH', ['20261009', '20261010']))
+        self.store.flush()
+        self.store.append(make_bars('000001.SZ', ['20261009']))
+
+        df = self.store.read_cross_section('20261009')
+        self.assertListEqual(list(df['ts_code']), ['000001.SZ', '600000.SH'])
+        self.assertIsNone(self.store.read_cross_section('20261101'))
+
+    def test_compaction(self):
+        """测试增量文件达到上限时合并为基础文件，按 (ts_code, trade_date) 排序"""
+        for i, code in enumerate(['600000.SH', '000002.SZ', '000001.SZ']):
+            self.store.append(make_bars(code, ['20261010', f"2026100{i + 1}"]))
+            self.store.flush()
+
+        self.assertListEqual(sorted(p.name for p in (self.root / '202610').iterdir()), ['base.csv'])
+        base = pd.read_csv(self.root / '202610' / 'base.csv', dtype=str)
+        self.assertListEqual(list(base['ts_code']), ['000001.SZ'] * 2 + ['000002.SZ'] * 2 + ['600000.SH'] * 2)
+        self.assertListEqual(list(base['trade_date'][:2]), ['20261003', '20261010'])
+        self.assertEqual(self.store.stats(), {'partitions': 1, 'deltas': 0, 'pending_rows': 0})
+
+    def test_flush_threshold(self):
+        """测试缓冲行数达到阈值时自动写入增量文件"""
+        store = DailyBarStore(self.root, CsvBackend(), flush_rows=3)
+        store.append(make_bars('000001.SZ', ['20261009', '20261010']))
+        self.assertFalse(self.root.exists())
+        store.append(make_bars('000002.SZ', ['20261010']))
+        self.assertEqual(store.stats()['deltas'], 1)
+        self.assertEqual(store.stats()['pending_rows'], 0)
+
+    def test_delete(self):
+        """测试删除股票 (文件与缓冲)"""
+        self.store.append(make_bars('000001.SZ', ['20260930', '20261009']))
+        self.store.append(make_bars('600000.SH', ['20261009']))
+        self.store.flush()
+        self.store.append(make_bars('000001.SZ', ['20261010']))
+
+        self.assertEqual(self.store.delete(['000001.SZ']), 3)
+        self.assertIsNone(self.store.read_stock('000001.SZ'))
+        self.assertListEqual(self.store.partitions(), ['202610'])
+        self.assertEqual(len(self.store.read_cross_section('20261009')), 1)
+
+    def test_readers_parse_in_parallel(self):
+        """测试多个读取同时解析分区文件，不互相等待"""
+        self.store.append(make_bars('000001.SZ', ['20260930']))
+        self.store.append(make_bars('600000.SH', ['20261009']))
+        self.store.flush()
+
+        barrier = threading.Barrier(2, timeout=2)
+        backend = CsvBackend()
+        read = backend.read
+
+        def slow_read(path):
+            # 两个读取都进入解析后才继续，串行执行时会超时
+            barrier.wait()
+            return read(path)
+
+        backend.read = slow_read
+        store = DailyBarStore(self.root, backend)
+        results, errors = {}, []
+
+        def reader(ts_code):
+            try:
+                results[ts_code] = store.read_stock(ts_code)
+            except threading.BrokenBarrierError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader, args=(code,)) for code in ('000001.SZ', '600000.SH')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results['000001.SZ']), 1)
+        self.assertEqual(len(results['600000.SH']), 1)
+
+
+class TestDailyCacheStore(unittest.TestCase):
+    """日线缓存接入分区存储"""
+
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def test_legacy_file_replaced(self):
+        """测试旧的单文件缓存可读，保存后并入分区存储"""
+        legacy = self.test_cache_dir / 'daily_000001_SZ.csv'
+        make_bars('000001.SZ', ['20261009']).to_csv(legacy, index=False)
+        self.assertEqual(len(cache_mgr.load_daily_cache('000001.SZ')), 1)
+
+        cache_mgr.save_daily_cache('000001.SZ', pd.DataFrame({'trade_date': ['20261009', '20261010'], 'close': [1.0, 2.0]}))
+        self.assertFalse(legacy.exists())
+        df = cache_mgr.load_daily_cache('000001.SZ')
+        self.assertListEqual(list(df['trade_date']), ['20261009', '20261010'])
+        self.assertListEqual(list(cache_mgr.read_daily_cross_section('20261010')['ts_code']), ['000001.SZ'])
+
+    def test_flush(self):
+        """测试缓冲在 flush_daily_store 时写入文件，缓存目录已删除时丢弃"""
+        cache_mgr.save_daily_cache('000001.SZ', make_bars('000001.SZ', ['20261009']))
+        cache_mgr.flush_daily_store()
+        self.assertEqual(cache_mgr.daily_store().stats()['deltas'], 1)
+
+        cache_mgr.save_daily_cache('000002.SZ', make_bars('000002.SZ', ['20261009']))
+        shutil.rmtree(self.test_cache_dir)
+        cache_mgr.flush_daily_store()
+        self.assertFalse(self.test_cache_dir.exists())
+
+    def test_client_flushes_buffer(self):
+        """测试同步日线面板与扫描结束时写入缓冲，不依赖进程退出"""
+        client = TushareClient(use_mock=True)
+        cache_mgr.save_daily_cache('000001.SZ', make_bars('000001.SZ', ['20261009']))
+        client.sync_daily_panel('20261001', '20261016')
+        self.assertEqual(cache_mgr.daily_store().stats()['pending_rows'], 0)
+        self.assertEqual(len(cache_mgr.load_daily_cache('000001.SZ')), 1)
+
+        cache_mgr.save_daily_cache('000002.SZ', make_bars('000002.SZ', ['20261009']))
+        client.flush()
+        self.assertEqual(cache_mgr.daily_store().stats()['pending_rows'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # 临时替换缓存目录
 from pathlib import Path
 import data.cache_manager as cache_mgr
+from data.storage import ParquetBackend
 
 
 class TestCacheManager(unittest.TestCase):
@@ -42,7 +43,7 @@ class TestCacheManager(unittest.TestCase):
     def test_get_cache_path(self):
         """测试缓存路径获取"""
         path = cache_mgr.get_cache_path('test_cache')
-        self.assertEqual(path.name, 'test_cache.csv')
+        self.assertEqual(path.name, f"test_cache{cache_mgr.storage_backend().suffix}")
         self.assertEqual(path.parent, self.test_cache_dir)
     
     def test_save_and_load_cache(self):
@@ -166,6 +167,40 @@ class TestCacheManager(unittest.TestCase):
         
         self.assertFalse(loaded.empty)
 
+    
+    def test_cache_index_lookup(self):
+        """测试按ts_code建立的缓存索引"""
+        cache_mgr.save_market_cap_cache(pd.DataFrame({
+            'ts_code': ['300274.SZ', '000001.SZ', '300274.SZ'],
+            'total_mv': [3000000, 2000000, 1000000],
+        }))
+        
+        index = cache_mgr.load_market_cap_index()
+        
+        self.assertEqual(len(index), 2)
+        # 重复代码保留首行
+        self.assertEqual(index['300274.SZ']['total_mv'], 3000000)
+        self.assertEqual(cache_mgr.load_cache_index('nonexistent'), {})
+    
+    def test_cache_index_reused_until_file_changes(self):
+        """测试文件未变化时复用索引，保存后失效"""
+        cache_mgr.save_adj_factor_cache(pd.DataFrame({
+            'ts_code': ['300274.SZ'],
+            'adj_factor': [1.5],
+        }))
+        
+        first = cache_mgr.load_adj_factor_index()
+        self.assertIs(first, cache_mgr.load_adj_factor_index())
+        
+        cache_mgr.save_adj_factor_cache(pd.DataFrame({
+            'ts_code': ['300274.SZ'],
+            'adj_factor': [2.0],
+        }))
+        
+        second = cache_mgr.load_adj_factor_index()
+        self.assertIsNot(first, second)
+        self.assertEqual(second['300274.SZ']['adj_factor'], 2.0)
+
 
 class TestCacheEdgeCases(unittest.TestCase):
     """缓存管理边界测试类"""
@@ -230,5 +265,91 @@ class TestCacheEdgeCases(unittest.TestCase):
         print(f"✅ 并发测试通过: {len(results)} 次操作")
 
 
+class PickleBackend:
+    """测试用的二进制后端 (不依赖 pyarrow)"""
+    
+    name = 'pickle'
+    suffix = '.pkl'
+    
+    def read(self, path, columns=None):
+        df = pd.read_pickle(path)
+        return df if columns is None else df[[c for c in columns if c in df.columns]]
+    
+    def write(self, path, df):
+        df.to_pickle(path)
+
+
+class TestStorageBackend(unittest.TestCase):
+    """存储后端测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        self.original_backend = cache_mgr._backend
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        cache_mgr._backend = self.original_backend
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def _write_legacy_csv(self, name, df, days_old=0):
+        path = self.test_cache_dir / f"{name}.csv"
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+        old = (datetime.datetime.now() - datetime.timedelta(days=days_old)).timestamp()
+        os.utime(path, (old, old))
+        return path
+    
+    def test_csv_column_projection(self):
+        """测试只读取指定列 (不存在的列忽略)"""
+        cache_mgr.set_storage_backend('csv')
+        cache_mgr.save_cache('bars', pd.DataFrame({'trade_date': ['20260105'], 'close': [10.0], 'vol': [100.0]}))
+        df = cache_mgr.load_cache('bars', columns=['trade_date', 'close', 'amount'])
+        self.assertListEqual(list(df.columns), ['trade_date', 'close'])
+    
+    def test_unknown_format(self):
+        """测试未知格式报错"""
+        with self.assertRaises(ValueError):
+            cache_mgr.set_storage_backend('xlsx')
+    
+    def test_legacy_csv_readable_and_replaced(self):
+        """测试切换格式后旧CSV仍可读，写入后被新格式替换"""
+        cache_mgr._backend = PickleBackend()
+        legacy = self._write_legacy_csv('market_cap', pd.DataFrame({'ts_code': ['000001.SZ'], 'total_mv': [1e6]}))
+        
+        self.assertEqual(cache_mgr.get_cache_path('market_cap'), legacy)
+        self.assertTrue(cache_mgr.is_cache_valid('market_cap', 7))
+        self.assertIn('000001.SZ', cache_mgr.load_market_cap_index())
+        
+        cache_mgr.save_market_cap_cache(pd.DataFrame({'ts_code': ['600000.SH'], 'total_mv': [2e6]}))
+        self.assertFalse(legacy.exists())
+        self.assertEqual(cache_mgr.get_cache_path('market_cap').suffix, '.pkl')
+        self.assertListEqual(list(cache_mgr.load_market_cap_index()), ['600000.SH'])
+    
+    def test_migrate_cache(self):
+        """测试一次性迁移保留文件时间，日线导入分区存储"""
+        cache_mgr._backend = PickleBackend()
+        self._write_legacy_csv('financial_ttm', pd.DataFrame({'ts_code': ['000001.SZ'], 'roe': [10.0]}), days_old=100)
+        self._write_legacy_csv('daily_000001_SZ', pd.DataFrame({'trade_date': [20260105], 'close': [10.0]}))
+        
+        self.assertEqual(cache_mgr.migrate_cache(), 3)
+        self.assertListEqual(sorted(p.name for p in self.test_cache_dir.iterdir() if p.name != '.locks'),
+                             ['daily_bars', 'financial_ttm.pkl'])
+        self.assertFalse(cache_mgr.is_cache_valid('financial_ttm', 90))
+        self.assertListEqual(list(cache_mgr.load_daily_cache('000001.SZ', columns=['close'])['close']), [10.0])
+        
+        cache_mgr.clear_cache_by_name('financial_ttm')
+        self.assertFalse(cache_mgr.get_cache_path('financial_ttm').exists())
+    
+    @unittest.skipUnless(ParquetBackend.available(), "未安装 pyarrow")
+    def test_parquet_mixed_object_columns(self):
+        """测试CSV读回的整数日期与字符串日期合并后可写入 parquet"""
+        cache_mgr.set_storage_backend('parquet')
+        df = pd.DataFrame({'trade_date': pd.Series([20260105, '20260106'], dtype=object), 'close': [1.0, 2.0]})
+        cache_mgr.save_cache('bars', df)
+        loaded = cache_mgr.load_cache('bars', columns=['trade_date', 'missing'])
+        self.assertListEqual(list(loaded['trade_date']), ['20260105', '20260106'])
+
+
 if __name__ == '__main__':
     unittest.main()
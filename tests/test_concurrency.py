@@ -0,0 +1,183 @@
+"""
+并发控制工具单元测试
+"""
+import unittest
+import asyncio
+import threading
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.concurrency import TokenBucket, SingleFlight, AsyncSingleFlight
+
+
+class TestTokenBucket(unittest.TestCase):
+    """令牌桶限流测试"""
+    
+    def test_initial_burst(self):
+        """测试初始容量内可立即获取"""
+        bucket = TokenBucket(rate_per_minute=600, capacity=5)
+        
+        for _ in range(5):
+            self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+    
+    def test_acquire_waits_for_refill(self):
+        """测试令牌不足时等待补充"""
+        bucket = TokenBucket(rate_per_minute=1200, capacity=1)  # 每秒20个
+        bucket.acquire()
+        
+        start = time.monotonic()
+        bucket.acquire()
+        elapsed = time.monotonic() - start
+        
+        self.assertGreaterEqual(elapsed, 0.03)
+    
+    def test_acquire_timeout(self):
+        """测试等待超时"""
+        bucket = TokenBucket(rate_per_minute=1, capacity=1)
+        bucket.acquire()
+        
+        self.assertFalse(bucket.acquire(timeout=0.05))
+    
+    def test_rejects_tokens_over_capacity(self):
+        """测试请求超过桶容量时报错而不是一直等待"""
+        bucket = TokenBucket(rate_per_minute=300, capacity=5)
+        
+        with self.assertRaises(ValueError):
+            bucket.acquire(10)
+        with self.assertRaises(ValueError):
+            bucket.try_acquire(10)
+        with self.assertRaises(ValueError):
+            asyncio.run(bucket.acquire_async(10))
+        self.assertTrue(bucket.try_acquire(5))
+    
+    def test_shared_across_threads(self):
+        """测试多线程共享时总速率受限"""
+        bucket = TokenBucket(rate_per_minute=3000, capacity=1)  # 每秒50个
+        acquired = []
+        
+        def worker():
+            for _ in range(5):
+                bucket.acquire()
+                acquired.append(time.monotonic())
+        
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        # 20个令牌，首个立即可用，其余至少需要 19/50 秒
+        self.assertEqual(len(acquired), 20)
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+    
+    def test_pause(self):
+        """测试暂停后需等待预扣的时间"""
+        bucket = TokenBucket(rate_per_minute=6000, capacity=10)  # 每秒100个
+        bucket.pause(0.1)
+        
+        self.assertFalse(bucket.try_acquire())
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+    
+    def test_invalid_rate(self):
+        """测试非法速率"""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate_per_minute=0)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """单飞合并测试"""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """测试并发的相同调用只执行一次"""
+        flight = SingleFlight()
+        calls = []
+        results = []
+        barrier = threading.Barrier(5)
+        
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'payload'
+        
+        def worker():
+            barrier.wait()
+            results.append(flight.do(('stock_basic', ()), slow))
+        
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['payload'] * 5)
+        self.assertEqual(flight.coalesced, 4)
+    
+    def test_error_shared_and_key_released(self):
+        """测试异常共享给等待方，结束后可再次调用"""
+        flight = SingleFlight()
+        
+        def fail():
+            raise RuntimeError('boom')
+        
+        with self.assertRaises(RuntimeError):
+            flight.do('key', fail)
+        
+        # 不缓存结果，key释放后重新执行
+        self.assertEqual(flight.do('key', lambda: 42), 42)
+    
+    def test_different_keys_not_coalesced(self):
+        """测试不同key分别执行"""
+        flight = SingleFlight()
+        
+        self.assertEqual(flight.do('a', lambda: 1), 1)
+        self.assertEqual(flight.do('b', lambda: 2), 2)
+        self.assertEqual(flight.coalesced, 0)
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    """异步单飞合并测试"""
+    
+    def test_concurrent_awaits_share_one_execution(self):
+        """测试并发的相同协程只执行一次"""
+        flight = AsyncSingleFlight()
+        calls = []
+        
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'payload'
+        
+        async def run():
+            return await asyncio.gather(*(flight.do('key', slow) for _ in range(4)))
+        
+        self.assertEqual(asyncio.run(run()), ['payload'] * 4)
+        self.assertEqual(len(calls), 1)
+    
+    def test_one_waiter_cancelled(self):
+        """测试单个等待方取消不影响其他等待方"""
+        flight = AsyncSingleFlight()
+        
+        async def slow():
+            await asyncio.sleep(0.05)
+            return 'payload'
+        
+        async def run():
+            first = asyncio.create_task(flight.do('key', slow))
+            second = asyncio.create_task(flight.do('key', slow))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+        
+        self.assertEqual(asyncio.run(run()), 'payload')
+
+
+if __name__ == '__main__':
+    unittest.main()
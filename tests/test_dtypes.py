@@ -0,0 +1,59 @@
+"""
+数据类型压缩单元测试
+"""
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.dtypes import compact_frame, expand_frame
+
+
+class TestCompactFrame(unittest.TestCase):
+    """数据类型压缩测试"""
+    
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'ts_code': ['000001.SZ', '000001.SZ', '600519.SH'],
+            'trade_date': ['20260102', '20260105', '20260105'],
+            'close': [10.5, 10.8, 1500.25],
+            'vol': [1000, 2000, 300],
+        })
+    
+    def test_compact(self):
+        """测试数值、代码与日期列压缩"""
+        df = compact_frame(self.df, date_cols=('trade_date',))
+        
+        self.assertIsInstance(df['ts_code'].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['trade_date'].dtype, np.int32)
+        self.assertEqual(df['close'].dtype, np.float32)
+        self.assertEqual(df['vol'].dtype, np.int16)
+        self.assertLess(df.memory_usage(deep=True).sum(), self.df.memory_usage(deep=True).sum())
+        # 原数据不变
+        self.assertEqual(self.df['close'].dtype, np.float64)
+    
+    def test_round_trip(self):
+        """测试还原后代码与日期为字符串"""
+        df = expand_frame(compact_frame(self.df, date_cols=('trade_date',)))
+        
+        self.assertEqual(df['trade_date'].tolist(), self.df['trade_date'].tolist())
+        self.assertEqual(df['ts_code'].tolist(), self.df['ts_code'].tolist())
+        np.testing.assert_allclose(df['close'], self.df['close'], rtol=1e-6)
+    
+    def test_integer_dates_from_csv(self):
+        """测试CSV读入的整数日期"""
+        df = compact_frame(self.df.astype({'trade_date': int}), date_cols=('trade_date',))
+        self.assertEqual(df['trade_date'].tolist(), [20260102, 20260105, 20260105])
+    
+    def test_empty(self):
+        """测试空数据"""
+        self.assertTrue(compact_frame(pd.DataFrame()).empty)
+        self.assertIsNone(compact_frame(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+资金流向因子单元测试
+"""
+
+import unittest
+import pandas as pd
+import numpy as np
+
+# 添加项目根目录到路径
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.fund_flow import calculate_flow_factors
+
+
+class TestFlowFactors(unittest.TestCase):
+    """资金流向因子测试类"""
+    
+    def setUp(self):
+        dates = ['20260105', '20260106', '20260107', '20260108', '20260109', '20260112']
+        self.panel = pd.DataFrame({
+            'ts_code': ['A'] * 6 + ['B'] * 6,
+            'trade_date': dates * 2,
+            'net_mf_amount': [100, -50, 10, 20, 30, 40,
+                              5, 5, 5, 5, 5, -1],
+        }).sample(frac=1, random_state=0)  # 打乱顺序
+    
+    def test_net_inflow_window(self):
+        """测试只统计最近 window 个交易日"""
+        factors = calculate_flow_factors(self.panel, 'net_mf_amount', window=5)
+        self.assertEqual(factors.at['A', 'net_inflow'], 50)
+        self.assertEqual(factors.at['B', 'net_inflow'], 19)
+    
+    def test_consecutive_days_from_latest(self):
+        """测试从最新交易日往前数连续净流入天数"""
+        factors = calculate_flow_factors(self.panel, 'net_mf_amount', window=5)
+        self.assertEqual(factors.at['A', 'consecutive_days'], 4)
+        self.assertEqual(factors.at['B', 'consecutive_days'], 0)
+    
+    def test_short_history(self):
+        """测试交易日不足 window 时按已有数据计算"""
+        df = pd.DataFrame({'ts_code': 'C', 'trade_date': ['20260105', '20260106'],
+                           'net_mf_amount': [1.0, 2.0]})
+        factors = calculate_flow_factors(df, 'net_mf_amount', window=5)
+        self.assertEqual(factors.at['C', 'net_inflow'], 3.0)
+        self.assertEqual(factors.at['C', 'consecutive_days'], 2)
+    
+    def test_empty(self):
+        """测试空面板"""
+        factors = calculate_flow_factors(pd.DataFrame(), 'net_mf_amount')
+        self.assertTrue(factors.empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+"""
+对冲请求单元测试
+"""
+import unittest
+import threading
+import time
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+from api.concurrency import TokenBucket
+from api.hedging import LatencyHistogram, HedgingTransport
+from api.replay import StandInServer
+from api.transport import TushareHttpApi, create_pro_api
+from api.tushare_client import TushareClient
+from tests.helpers import use_temp_cache_dir
+
+
+class _SlowTransport:
+    """按调用顺序返回不同延迟的传输层"""
+    
+    def __init__(self, delays, errors=()):
+        self.delays = list(delays)
+        self.errors = set(errors)  # 抛出异常的调用序号
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def post(self, api_name, payload):
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+        time.sleep(self.delays[n] if n < len(self.delays) else 0.0)
+        if n in self.errors:
+            raise ConnectionError(f"call {n} failed")
+        return {'code': 0, 'call': n}
+    
+    def close(self):
+        pass
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """延迟直方图测试"""
+    
+    def test_quantile(self):
+        """测试分位数落在对应的桶"""
+        histogram = LatencyHistogram()
+        for _ in range(95):
+            histogram.record(0.01)
+        for _ in range(5):
+            histogram.record(2.0)
+        
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.01, delta=0.01 * 0.2)
+        self.assertLess(histogram.quantile(0.95), 0.02)
+        self.assertGreaterEqual(histogram.quantile(0.99), 2.0)
+        self.assertIsNone(LatencyHistogram().quantile(0.95))
+    
+    def test_decay(self):
+        """测试样本数超过上限后计数减半"""
+        histogram = LatencyHistogram(decay_after=100)
+        for _ in range(101):
+            histogram.record(0.01)
+        self.assertEqual(histogram.count, 50)
+
+
+class TestHedgingTransport(unittest.TestCase):
+    """对冲请求传输层测试"""
+    
+    def _warm(self, hedging, api_name='daily', seconds=0.01, count=20):
+        for _ in range(count):
+            hedging.histogram(api_name).record(seconds)
+    
+    def test_no_hedge_without_samples(self):
+        """测试样本不足时不对冲"""
+        inner = _SlowTransport([0.05])
+        hedging = HedgingTransport(inner, min_samples=20, min_delay=0.001, max_ratio=1.0)
+        
+        self.assertEqual(hedging.post('daily', {})['call'], 0)
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(hedging.histogram('daily').count, 1)
+    
+    def test_hedge_wins_on_straggler(self):
+        """测试超过p95延迟后发出对冲请求并取先返回的结果"""
+        inner = _SlowTransport([1.0, 0.0])
+        hedging = HedgingTransport(inner, min_delay=0.001, max_ratio=1.0)
+        self._warm(hedging)
+        
+        started = time.monotonic()
+        result = hedging.post('daily', {})
+        
+        self.assertEqual(result['call'], 1)
+        self.assertLess(time.monotonic() - started, 0.5)
+        stats = hedging.stats()
+        self.assertEqual(stats['hedged'], 1)
+        self.assertEqual(stats['hedge_wins'], 1)
+        self.assertLess(stats['thresholds']['daily'], 0.02)
+    
+    def test_fast_request_not_hedged(self):
+        """测试在阈值内返回的请求不对冲"""
+        inner = _SlowTransport([0.0])
+        hedging = HedgingTransport(inner, min_delay=0.2, max_ratio=1.0)
+        self._warm(hedging)
+        
+        hedging.post('daily', {})
+        
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(hedging.stats()['hedged'], 0)
+    
+    def test_budget_caps_extra_requests(self):
+        """测试额外请求不超过预算比例"""
+        inner = _SlowTransport([0.05] * 40)
+        hedging = HedgingTransport(inner, min_delay=0.001, max_ratio=0.1, burst=1)
+        self._warm(hedging)
+        
+        for _ in range(20):
+            hedging.post('daily', {})
+        
+        stats = hedging.stats()
+        self.assertEqual(stats['requests'], 20)
+        self.assertLessEqual(stats['hedged'], 2)
+        self.assertGreater(stats['budget_denied'], 0)
+    
+    def test_failed_primary_uses_hedge(self):
+        """测试原请求失败时使用对冲请求的结果"""
+        inner = _SlowTransport([0.2, 0.3], errors={0})
+        hedging = HedgingTransport(inner, min_delay=0.001, max_ratio=1.0)
+        self._warm(hedging)
+        
+        self.assertEqual(hedging.post('daily', {})['call'], 1)
+    
+    def test_both_fail_raises(self):
+        """测试两个请求都失败时抛出原请求的异常"""
+        inner = _SlowTransport([0.1, 0.0], errors={0, 1})
+        hedging = HedgingTransport(inner, min_delay=0.001, max_ratio=1.0)
+        self._warm(hedging)
+        
+        with self.assertRaisesRegex(ConnectionError, 'call 0'):
+            hedging.post('daily', {})
+    
+    def test_admit_denied_skips_hedge(self):
+        """测试 admit 拒绝时不发出对冲请求且不消耗预算"""
+        inner = _SlowTransport([0.1, 0.0])
+        admitted = []
+        hedging = HedgingTransport(inner, min_delay=0.001, max_ratio=1.0,
+                                   admit=lambda name: admitted.append(name) or False)
+        self._warm(hedging)
+        
+        self.assertEqual(hedging.post('daily', {})['call'], 0)
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(admitted, ['daily'])
+        stats = hedging.stats()
+        self.assertEqual(stats['hedged'], 0)
+        self.assertEqual(stats['admit_denied'], 1)
+
+
+class TestHedgingQuota(unittest.TestCase):
+    """对冲请求的接口令牌和积分配额测试"""
+    
+    def setUp(self):
+        use_temp_cache_dir(self)
+    
+    def _client(self, delays):
+        transport = HedgingTransport(_SlowTransport(delays), min_delay=0.001, max_ratio=1.0)
+        for _ in range(20):
+            transport.histogram('daily').record(0.01)
+        with mock.patch.object(TushareClient, '_create_pro_api',
+                               return_value=TushareHttpApi('token', transport)):
+            client = TushareClient(use_mock=False)
+        return client, transport
+    
+    def test_hedge_charges_endpoint_quota(self):
+        """测试对冲请求扣减接口令牌并记入调用统计"""
+        client, transport = self._client([0.5, 0.0])
+        limiter = client._rate_limiters['daily'] = TokenBucket(60, capacity=2)
+        
+        self.assertEqual(transport.post('daily', {})['call'], 1)
+        self.assertEqual(client.get_api_status()['endpoints']['daily']['calls'], 1)
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+    
+    def test_no_hedge_without_tokens(self):
+        """测试接口令牌不足时不对冲"""
+        client, transport = self._client([0.1, 0.0])
+        limiter = client._rate_limiters['daily'] = TokenBucket(60, capacity=1)
+        limiter.try_acquire()
+        
+        self.assertEqual(transport.post('daily', {})['call'], 0)
+        self.assertEqual(transport.transport.calls, 1)
+        self.assertNotIn('daily', client.get_api_status()['endpoints'])
+
+
+@unittest.skipUnless(HAS_REQUESTS, "requires requests")
+class TestHedgingThroughStandIn(unittest.TestCase):
+    """经过替身服务的对冲请求测试"""
+    
+    def test_tail_latency_cut(self):
+        """测试长尾慢请求被对冲请求替代"""
+        server = StandInServer(latency=0.005, slow_rate=0.05, slow_latency=0.5, seed=3).start()
+        try:
+            api = create_pro_api(token='token', base_url=server.url, pool_size=4, timeout=5, hedging=True)
+            api.transport.max_ratio = 1.0
+            for _ in range(20):
+                api.transport.histogram('trade_cal').record(0.005)
+            
+            slowest = 0.0
+            for _ in range(40):
+                started = time.monotonic()
+                api.trade_cal(exchange='SSE', start_date='20260101', end_date='20260110')
+                slowest = max(slowest, time.monotonic() - started)
+            
+            self.assertGreater(server.stats['slow'], 0)
+            self.assertGreater(api.transport.stats()['hedge_wins'], 0)
+            self.assertLess(slowest, 0.5)
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
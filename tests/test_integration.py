@@ -4,18 +4,26 @@
 
 import unittest
 import datetime
+import threading
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
 
 # 添加项目根目录到路径
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import data.cache_manager as cache_mgr
+from config import config
 from api.tushare_client import TushareClient
 from strategy.filter import StockFilter
 from data.mock_data import (
     generate_mock_stock_list,
     generate_mock_daily_data,
 )
+from tests.helpers import use_temp_cache_dir
 
 
 class TestIntegration(unittest.TestCase):
@@ -23,6 +31,7 @@ class TestIntegration(unittest.TestCase):
     
     def setUp(self):
         """设置测试"""
+        use_temp_cache_dir(self)
         # 使用Mock客户端
         self.client = TushareClient(use_mock=True)
     
@@ -107,6 +116,7 @@ class TestIntegration(unittest.TestCase):
         
         # 验证结果
         self.assertIsInstance(results, list)
+        self.assertEqual(filter_obj.api_status['status'], 'ok')
         
         if results:
             # 检查结果字段
@@ -125,6 +135,133 @@ class TestIntegration(unittest.TestCase):
             print("ℹ️ 没有股票符合所有条件")
 
 
+    def test_degraded_status_reported(self):
+        """测试接口失败时筛选器报告降级状态"""
+        self.client.health.record_failure('daily', 'timeout')
+        filter_obj = StockFilter(self.client)
+        
+        filter_obj.run_full_filter()
+        
+        self.assertEqual(filter_obj.api_status['status'], 'degraded')
+        self.assertEqual(filter_obj.api_status['endpoints']['daily']['failures'], 1)
+
+
+LEADERS = [
+    {'ts_code': '300274.SZ', 'symbol': '300274', 'name': '阳光电源',
+     'industry': '电气设备', 'market_cap': 3223.6},
+    {'ts_code': '600519.SH', 'symbol': '600519', 'name': '贵州茅台',
+     'industry': '白酒', 'market_cap': 21000.0},
+    {'ts_code': '000001.SZ', 'symbol': '000001', 'name': '平安银行',
+     'industry': '银行', 'market_cap': 2100.0},
+]
+
+
+class _ListFilter(StockFilter):
+    """Step 3 直接产出给定龙头的筛选器"""
+    
+    def __init__(self, client, leaders, after_first=None):
+        super().__init__(client)
+        self.leaders = leaders
+        self.after_first = after_first
+        self.fetch_started = threading.Event()
+    
+    def iter_leaders(self, stocks, industries):
+        for i, stock in enumerate(self.leaders):
+            yield dict(stock)
+            if i == 0 and self.after_first is not None:
+                self.after_first(self)
+    
+    def _fetch_stock_data(self, stock, start_date, end_date):
+        self.fetch_started.set()
+        return super()._fetch_stock_data(stock, start_date, end_date)
+
+
+class TestPipeline(unittest.TestCase):
+    """Step 3/4 流水线测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        self.client = TushareClient(use_mock=True)
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_matches_sequential(self):
+        """测试流水线结果与逐步执行一致"""
+        filter_obj = _ListFilter(self.client, LEADERS)
+        
+        sequential = filter_obj.step4_technical_filter([dict(s) for s in LEADERS])
+        pipelined = filter_obj.run_pipeline(None, [], workers=2)
+        
+        self.assertEqual(pipelined, sequential)
+    
+    def test_prefetch_overlaps_step3(self):
+        """测试Step 3 未结束时已开始预取行情"""
+        overlapped = []
+        
+        def wait_for_fetch(filter_obj):
+            # 面板同步已由测试放行，预取只等待第一个龙头入队
+            overlapped.append(filter_obj.fetch_started.wait(timeout=30))
+        
+        filter_obj = _ListFilter(self.client, LEADERS, after_first=wait_for_fetch)
+        filter_obj._prepare_step4 = lambda start_date, end_date: None
+        filter_obj.run_pipeline(None, [], workers=2)
+        
+        self.assertEqual(overlapped, [True])
+    
+    def test_prefetch_waits_for_panel(self):
+        """测试批量模式下预取在面板同步完成后才开始"""
+        panel_ready = threading.Event()
+        fetched_early = []
+        
+        def prepare(start_date, end_date):
+            panel_ready.wait(timeout=30)
+        
+        def check_then_release(filter_obj):
+            fetched_early.append(filter_obj.fetch_started.is_set())
+            panel_ready.set()
+        
+        filter_obj = _ListFilter(self.client, LEADERS, after_first=check_then_release)
+        filter_obj._prepare_step4 = prepare
+        filter_obj.run_pipeline(None, [], workers=2)
+        
+        self.assertEqual(fetched_early, [False])
+        self.assertTrue(filter_obj.fetch_started.is_set())
+    
+    def test_consumer_error_stops_pipeline(self):
+        """测试指标计算异常时生产者与预取线程退出，不再获取剩余龙头"""
+        leaders = [dict(LEADERS[0], ts_code=f"{i:06d}.SZ") for i in range(50)]
+        fetches = []
+        
+        filter_obj = _ListFilter(self.client, leaders)
+        filter_obj._prepare_step4 = lambda start_date, end_date: None
+        filter_obj._fetch_stock_data = lambda stock, start, end: fetches.append(stock) or (None, None, None)
+        
+        def fail(*args):
+            raise RuntimeError('indicator failed')
+        
+        filter_obj._evaluate_stock = fail
+        before = threading.active_count()
+        with mock.patch.object(config, 'PIPELINE_QUEUE_SIZE', 1):
+            with self.assertRaises(RuntimeError):
+                filter_obj.run_pipeline(None, [], workers=2)
+        
+        self.assertEqual(threading.active_count(), before)
+        self.assertLess(len(fetches), len(leaders))
+    
+    def test_producer_error_propagates(self):
+        """测试Step 3 异常向上抛出，流水线不挂起"""
+        def fail(filter_obj):
+            raise RuntimeError('step3 failed')
+        
+        filter_obj = _ListFilter(self.client, LEADERS, after_first=fail)
+        with self.assertRaises(RuntimeError):
+            filter_obj.run_pipeline(None, [], workers=2)
+
+
 class TestMockData(unittest.TestCase):
     """Mock数据测试类"""
     
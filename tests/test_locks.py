@@ -0,0 +1,198 @@
+"""
+缓存锁测试
+"""
+import unittest
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from data.locks import RWLock, atomic_write, cache_lock, file_lock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestRWLock(unittest.TestCase):
+    """读写锁测试"""
+
+    def test_readers_run_in_parallel(self):
+        """测试多个读取同时持有读锁"""
+        lock = RWLock()
+        barrier = threading.Barrier(3, timeout=2)
+        errors = []
+
+        def reader():
+            with lock.read():
+                try:
+                    barrier.wait()
+                except threading.BrokenBarrierError as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_writer_excludes_readers(self):
+        """测试写锁期间读取等待"""
+        lock = RWLock()
+        events = []
+
+        def reader():
+            with lock.read():
+                events.append('read')
+
+        with lock.write():
+            t = threading.Thread(target=reader)
+            t.start()
+            time.sleep(0.1)
+            events.append('write done')
+        t.join(timeout=2)
+        self.assertEqual(events, ['write done', 'read'])
+
+    def test_reentrant(self):
+        """测试同一线程重入，持有读锁时不能升级"""
+        lock = RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                pass
+            with self.assertRaises(RuntimeError):
+                with lock.write():
+                    pass
+        # 释放后其他线程可获得写锁
+        acquired = []
+
+        def writer():
+            with lock.write():
+                acquired.append(True)
+
+        t = threading.Thread(target=writer)
+        t.start()
+        t.join(timeout=2)
+        self.assertEqual(len(acquired), 1)
+
+    def test_same_cache_shares_lock(self):
+        """测试同一缓存共用一把锁，不同缓存互不相关"""
+        directory = Path(tempfile.mkdtemp())
+        try:
+            self.assertIs(cache_lock(directory, 'market_cap'), cache_lock(directory, 'market_cap'))
+            self.assertIsNot(cache_lock(directory, 'market_cap'), cache_lock(directory, 'stock_list'))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestFileLock(unittest.TestCase):
+    """进程间文件锁与原子写入"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    @unittest.skipIf(sys.platform == 'win32', "Windows 没有共享锁")
+    def test_exclusive_across_processes(self):
+        """测试其他进程持有独占锁时本进程等待"""
+        lock_path = self.test_dir / 'market_cap.lock'
+        ready = self.test_dir / 'ready'
+        script = (
+            "import sys, time; from pathlib import Path; sys.path.insert(0, sys.argv[1]);"
+            "from data.locks import file_lock\n"
+            "with file_lock(Path(sys.argv[2])):\n"
+            "    Path(sys.argv[3]).touch(); time.sleep(0.5)\n"
+        )
+        child = subprocess.Popen([sys.executable, '-c', script, ROOT, str(lock_path), str(ready)])
+        try:
+            deadline = time.time() + 10
+            while not ready.exists() and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(ready.exists())
+            start = time.time()
+            with file_lock(lock_path, shared=True):
+                waited = time.time() - start
+            self.assertGreater(waited, 0.2)
+        finally:
+            child.wait(timeout=10)
+
+    def test_atomic_write(self):
+        """测试写入失败时目标文件保持不变且不留临时文件"""
+        path = self.test_dir / 'market_cap.csv'
+        atomic_write(path, lambda tmp: tmp.write_text('old'))
+
+        def failing(tmp):
+            tmp.write_text('partial')
+            raise IOError('disk full')
+
+        with self.assertRaises(IOError):
+            atomic_write(path, failing)
+        self.assertEqual(path.read_text(), 'old')
+        self.assertEqual([p.name for p in self.test_dir.iterdir()], ['market_cap.csv'])
+
+
+class TestConcurrentCache(unittest.TestCase):
+    """缓存并发读写"""
+
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def test_concurrent_upserts_not_lost(self):
+        """测试多线程 upsert 同一缓存不丢失更新"""
+        def upsert(i):
+            cache_mgr.upsert_cache('market_cap', pd.DataFrame({'ts_code': [f"{i:06d}.SZ"], 'total_mv': [float(i)]}))
+
+        threads = [threading.Thread(target=upsert, args=(i,)) for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(cache_mgr.load_market_cap_cache()), 16)
+
+    def test_readers_never_see_torn_file(self):
+        """测试写入期间读取总是得到完整的旧数据或新数据"""
+        frames = [pd.DataFrame({'ts_code': [f"{i:06d}.SZ" for i in range(2000)], 'roe': float(v)}) for v in (1, 2)]
+        cache_mgr.save_cache('financial_ttm', frames[0])
+        stop = threading.Event()
+        seen = []
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                cache_mgr.save_cache('financial_ttm', frames[i % 2])
+                i += 1
+
+        t = threading.Thread(target=writer)
+        t.start()
+        try:
+            for _ in range(30):
+                df = cache_mgr.load_cache('financial_ttm')
+                seen.append((len(df), df['roe'].nunique()))
+        finally:
+            stop.set()
+            t.join()
+        self.assertTrue(all(item == (2000, 1) for item in seen))
+        self.assertEqual([p.name for p in self.test_cache_dir.glob('.*.tmp')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
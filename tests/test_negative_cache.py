@@ -0,0 +1,196 @@
+"""
+空结果缓存测试
+"""
+import unittest
+import datetime
+import tempfile
+import shutil
+import sys
+import os
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from config import config
+from api.tushare_client import TushareClient
+from data.negative_cache import NegativeCache
+from strategy.filter import StockFilter
+
+
+class TestNegativeCache(unittest.TestCase):
+    """空结果缓存单元测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def test_persisted_across_instances(self):
+        """测试记录写入文件，新实例可读取"""
+        writer = NegativeCache()
+        writer.add('daily', '000001.SZ', 'suspended')
+        writer.flush()
+        
+        cache = NegativeCache()
+        self.assertEqual(cache.get('daily', '000001.SZ'), 'suspended')
+        self.assertIsNone(cache.get('fina_indicator', '000001.SZ'))
+        self.assertEqual(cache.hits, 1)
+    
+    def test_expiry_per_endpoint_and_reason(self):
+        """测试按 (接口, 原因) 过期"""
+        expiry = {'fina_indicator': {'delisted': 180, 'new_listing': 7}}
+        cache = NegativeCache(expiry)
+        self.assertEqual(cache.expiry_days('fina_indicator', 'delisted'), 180)
+        self.assertEqual(cache.expiry_days('daily', 'suspended'), 1)
+        
+        cache.add('fina_indicator', 'A', 'delisted')
+        cache.add('fina_indicator', 'B', 'new_listing')
+        
+        later = datetime.datetime.now() + datetime.timedelta(days=8)
+        with mock.patch('data.negative_cache.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value = later
+            mock_datetime.datetime.strptime = datetime.datetime.strptime
+            self.assertEqual(cache.get('fina_indicator', 'A'), 'delisted')
+            self.assertIsNone(cache.get('fina_indicator', 'B'))
+    
+    def test_discard(self):
+        """测试删除记录"""
+        cache = NegativeCache()
+        cache.add('daily', 'A', 'suspended')
+        cache.discard('daily', 'A')
+        cache.flush()
+        
+        self.assertEqual(len(NegativeCache()), 0)
+    
+    def test_batched_writes(self):
+        """测试变化先记在内存，flush 或达到 flush_every 时才写入文件"""
+        cache = NegativeCache(flush_every=3)
+        cache.add('daily', 'A', 'suspended')
+        cache.add('daily', 'B', 'suspended')
+        self.assertIsNone(cache_mgr.load_negative_cache())
+        
+        cache.add('daily', 'C', 'suspended')
+        self.assertEqual(len(cache_mgr.load_negative_cache()), 3)
+        
+        cache.discard('daily', 'A')
+        self.assertEqual(len(cache_mgr.load_negative_cache()), 3)
+        cache.flush()
+        self.assertEqual(sorted(cache_mgr.load_negative_cache()['ts_code']), ['B', 'C'])
+    
+    def test_merge_with_other_writers(self):
+        """测试多个实例 (进程) 写入时合并，不覆盖对方的记录"""
+        first, second = NegativeCache(), NegativeCache()
+        first.add('daily', 'A', 'suspended')
+        first.add('daily', 'B', 'suspended')
+        second.add('fina_indicator', 'C', 'no_data')
+        first.flush()
+        second.flush()
+        
+        self.assertEqual(len(NegativeCache()), 3)
+        # 合并后其他实例写入的记录在内存中可见
+        self.assertEqual(second.get('daily', 'A'), 'suspended')
+        
+        second.discard('daily', 'B')
+        second.flush()
+        cache = NegativeCache()
+        self.assertIsNone(cache.get('daily', 'B'))
+        self.assertEqual(cache.get('daily', 'A'), 'suspended')
+        self.assertEqual(cache.get('fina_indicator', 'C'), 'no_data')
+
+
+class TestClientNegativeCache(unittest.TestCase):
+    """客户端空结果缓存测试"""
+    
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        
+        today = datetime.date.today()
+        cache_mgr.save_stock_list_cache(pd.DataFrame({
+            'ts_code': ['000001.SZ', '688999.SH'],
+            'name': ['平安银行', '新股'],
+            'list_date': ['19910403', (today - datetime.timedelta(days=10)).strftime('%Y%m%d')],
+            'list_status': ['L', 'L'],
+        }))
+        self.calls = []
+        self.responses = {}
+        test = self
+        
+        class FakeApi:
+            def __getattr__(self, api_name):
+                def call(**kwargs):
+                    test.calls.append((api_name, kwargs.get('ts_code')))
+                    return test.responses.get(api_name, pd.DataFrame())
+                return call
+        
+        self.api = FakeApi()
+    
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+    
+    def _new_client(self):
+        client = TushareClient(use_mock=True)
+        client.use_mock = False
+        client._pro = self.api
+        return client
+    
+    def test_empty_financial_skipped_next_run(self):
+        """测试财务数据为空时下次运行不再请求"""
+        client = self._new_client()
+        self.assertEqual(client.get_financial_ttm('688999.SH')['roe_ttm'], 0.0)
+        self.assertEqual(len(self.calls), 1)
+        client.flush()
+        
+        client = self._new_client()
+        self.assertEqual(client.get_financial_ttm('688999.SH')['roe_ttm'], 0.0)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(client.get_api_status()['negative_cache']['entries'], {'fina_indicator/new_listing': 1})
+    
+    def test_reasons(self):
+        """测试按股票列表判断空结果原因"""
+        client = self._new_client()
+        self.assertEqual(client._empty_reason('daily', '688999.SH'), 'new_listing')
+        self.assertEqual(client._empty_reason('daily', '000001.SZ'), 'suspended')
+        self.assertEqual(client._empty_reason('fina_indicator', '000001.SZ'), 'no_data')
+        self.assertEqual(client._empty_reason('daily', '600000.SH'), 'delisted')
+    
+    def test_failure_not_recorded(self):
+        """测试调用失败 (非空结果) 不记录"""
+        client = self._new_client()
+        with mock.patch.object(client, '_query', return_value=None):
+            client.get_financial_ttm('000001.SZ')
+            client.get_adj_factor('000001.SZ')
+        
+        self.assertFalse(client.is_known_empty('fina_indicator', '000001.SZ'))
+        self.assertFalse(client.is_known_empty('adj_factor', '000001.SZ'))
+    
+    def test_empty_daily_skipped(self):
+        """测试无日线的股票下次运行直接跳过"""
+        start_date = (datetime.date.today() - datetime.timedelta(days=30)).strftime('%Y%m%d')
+        end_date = datetime.date.today().strftime('%Y%m%d')
+        self.responses['trade_cal'] = pd.DataFrame({'cal_date': [end_date], 'is_open': [1]})
+        
+        client = self._new_client()
+        self.assertTrue(client.get_daily_data('000001.SZ', start_date, end_date).empty)
+        daily_calls = [c for c in self.calls if c[0] == 'daily']
+        self.assertEqual(len(daily_calls), 1)
+        client.flush()
+        
+        client = self._new_client()
+        self.assertTrue(client.get_daily_data('000001.SZ', start_date, end_date).empty)
+        self.assertIsNone(StockFilter(client)._fetch_stock_data({'ts_code': '000001.SZ'}, start_date, end_date))
+        self.assertEqual(len([c for c in self.calls if c[0] == 'daily']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+录制/回放传输层与替身服务测试
+"""
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+import pandas as pd
+
+from api.replay import ResponseStore, RecordingTransport, ReplayTransport, StandInServer, frame_to_result
+from api.transport import TushareHttpApi, TushareApiError, create_pro_api
+from api.resilience import throttle_wait
+from api.tushare_client import TushareClient
+from tests.helpers import use_temp_cache_dir
+
+
+RESULT = {
+    'code': 0,
+    'msg': '',
+    'data': {'fields': ['ts_code', 'trade_date', 'close'], 'items': [['300274.SZ', '20260213', 149.16]]},
+}
+
+
+class _FakeTransport:
+    """记录调用次数的传输层"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def post(self, api_name, payload):
+        self.calls += 1
+        return RESULT
+    
+    def close(self):
+        pass
+
+
+class TestRecordReplay(unittest.TestCase):
+    """录制与回放测试"""
+    
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = ResponseStore(self.dir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+    
+    def test_record_then_replay(self):
+        """测试录制的响应可离线回放"""
+        inner = _FakeTransport()
+        api = TushareHttpApi('token', RecordingTransport(inner, self.store))
+        recorded = api.daily(ts_code='300274.SZ', start_date='20260101')
+        
+        replay = TushareHttpApi('other-token', ReplayTransport(self.store))
+        replayed = replay.daily(start_date='20260101', ts_code='300274.SZ')
+        
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(len(self.store), 1)
+        pd.testing.assert_frame_equal(recorded, replayed)
+    
+    def test_replay_missing(self):
+        """测试未录制的请求返回错误"""
+        api = TushareHttpApi('token', ReplayTransport(self.store))
+        with self.assertRaises(TushareApiError):
+            api.daily(ts_code='600519.SH')
+    
+    def test_frame_to_result(self):
+        """测试DataFrame转换为Tushare响应格式"""
+        df = pd.DataFrame({'ts_code': ['A'], 'vol': [1], 'close': [1.5]})
+        result = frame_to_result(df)
+        self.assertEqual(result['data']['fields'], ['ts_code', 'vol', 'close'])
+        self.assertEqual(result['data']['items'], [['A', 1, 1.5]])
+
+
+@unittest.skipUnless(HAS_REQUESTS, "需要 requests")
+class TestStandInServer(unittest.TestCase):
+    """替身服务测试"""
+    
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.store = ResponseStore(self.dir)
+        self.servers = []
+        use_temp_cache_dir(self)
+    
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+        shutil.rmtree(self.dir, ignore_errors=True)
+    
+    def _start(self, **kwargs):
+        server = StandInServer(store=self.store, **kwargs).start()
+        self.servers.append(server)
+        return server, create_pro_api(token='token', base_url=server.url, pool_size=2, timeout=5)
+    
+    def test_serves_recording(self):
+        """测试按Tushare协议返回录制的响应"""
+        self.store.save('daily', {'ts_code': '300274.SZ'}, '', RESULT)
+        server, api = self._start(use_mock=False)
+        
+        df = api.daily(ts_code='300274.SZ')
+        
+        self.assertEqual(df.iloc[0]['close'], 149.16)
+        self.assertEqual(server.stats['requests'], 1)
+    
+    def test_mock_fallback(self):
+        """测试未录制的请求使用Mock数据"""
+        server, api = self._start()
+        df = api.stock_basic(exchange='', list_status='L', fields='ts_code,name')
+        
+        self.assertEqual(list(df.columns), ['ts_code', 'name'])
+        self.assertEqual(len(df), 8)
+    
+    def test_rate_limit(self):
+        """测试超出每分钟限流返回Tushare限流提示"""
+        server, api = self._start(rate_limit=2)
+        api.stock_basic()
+        api.stock_basic()
+        
+        with self.assertRaises(TushareApiError) as ctx:
+            api.stock_basic()
+        self.assertIsNotNone(throttle_wait(ctx.exception))
+        self.assertEqual(server.stats['throttled'], 1)
+    
+    def test_error_rate(self):
+        """测试错误注入返回HTTP 500"""
+        server, api = self._start(error_rate=1.0)
+        with self.assertRaises(requests.HTTPError):
+            api.stock_basic()
+    
+    def test_client_through_network_path(self):
+        """测试客户端经过完整的重试/传输链路访问替身服务"""
+        server, api = self._start(latency=0.01)
+        client = TushareClient(use_mock=True)
+        client.use_mock = False
+        client._pro = api
+        
+        df = client._query('stock_basic', exchange='', list_status='L')
+        
+        self.assertEqual(len(df), 8)
+        self.assertEqual(server.stats['requests'], 1)
+        self.assertEqual(client.get_api_status()['endpoints']['stock_basic']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
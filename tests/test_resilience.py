@@ -0,0 +1,147 @@
+"""
+接口容错工具单元测试
+"""
+import unittest
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.resilience import (
+    CircuitBreaker, ApiHealth, throttle_wait, is_quota_exhausted, backoff_delay,
+)
+from api.transport import TushareApiError
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _HttpError(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """熔断器测试"""
+    
+    def test_opens_after_threshold(self):
+        """测试连续失败达到阈值后拒绝请求"""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+    
+    def test_success_resets_count(self):
+        """测试成功后连续失败计数清零"""
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+    
+    def test_half_open_single_trial(self):
+        """测试冷却后只放行一个试探请求"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+    
+    def test_release_trial(self):
+        """测试释放试探名额后可再放行一个试探请求"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        breaker.trip()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        
+        breaker.release_trial()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+    
+    def test_failed_trial_reopens(self):
+        """测试试探失败重新熔断"""
+        breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=0.05)
+        breaker.trip()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+
+class TestApiHealth(unittest.TestCase):
+    """配额与健康统计测试"""
+    
+    def test_usage_per_minute(self):
+        """测试每分钟调用次数与积分"""
+        health = ApiHealth()
+        health.record_call('daily', 1)
+        health.record_call('daily', 2)
+        health.record_call('moneyflow', 1)
+        
+        self.assertEqual(health.usage('daily'), {'calls_per_minute': 2, 'points_per_minute': 3})
+    
+    def test_degraded(self):
+        """测试失败或熔断拒绝后标记为降级"""
+        health = ApiHealth()
+        health.record_call('daily')
+        health.record_throttled('daily')
+        self.assertFalse(health.degraded)
+        
+        health.record_rejected('daily')
+        self.assertTrue(health.degraded)
+        self.assertEqual(health.report()['daily']['rejected'], 1)
+
+
+class TestThrottleDetection(unittest.TestCase):
+    """服务端限流识别测试"""
+    
+    def test_tushare_message(self):
+        """测试Tushare限流提示"""
+        error = TushareApiError('daily', 40203, '抱歉，您每分钟最多访问该接口500次')
+        self.assertEqual(throttle_wait(error), 0.0)
+    
+    def test_http_429_retry_after(self):
+        """测试HTTP 429 的 Retry-After"""
+        error = _HttpError(_Response(429, {'Retry-After': '7'}))
+        self.assertEqual(throttle_wait(error), 7.0)
+    
+    def test_other_errors(self):
+        """测试普通错误不视为限流"""
+        self.assertIsNone(throttle_wait(TimeoutError('read timeout')))
+        self.assertIsNone(throttle_wait(_HttpError(_Response(500))))
+    
+    def test_quota_exhausted(self):
+        """测试配额耗尽识别"""
+        self.assertTrue(is_quota_exhausted(Exception('抱歉，您每天最多访问该接口2000次')))
+        self.assertFalse(is_quota_exhausted(Exception('抱歉，您每分钟最多访问该接口500次')))
+
+
+class TestBackoff(unittest.TestCase):
+    """退避测试"""
+    
+    def test_jitter_range(self):
+        """测试退避在 [0, min(cap, base*2^n)] 内"""
+        for attempt in range(6):
+            delay = backoff_delay(attempt, base=1.0, cap=10.0)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(10.0, 2 ** attempt))
+
+
+if __name__ == '__main__':
+    unittest.main()
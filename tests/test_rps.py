@@ -0,0 +1,63 @@
+"""
+行业RPS单元测试
+"""
+
+import unittest
+import pandas as pd
+import numpy as np
+
+# 添加项目根目录到路径
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.rps import calculate_period_returns, calculate_rps
+
+
+class TestIndustryRps(unittest.TestCase):
+    """行业RPS测试类"""
+    
+    def setUp(self):
+        dates = [f'202601{d:02d}' for d in range(1, 11)]
+        # A 每天涨1，B 横盘，C 每天跌1，D 只有最近3天数据
+        self.panel = pd.concat([
+            pd.DataFrame({'ts_code': 'A', 'trade_date': dates, 'close': np.arange(100, 110, dtype=float)}),
+            pd.DataFrame({'ts_code': 'B', 'trade_date': dates, 'close': 100.0}),
+            pd.DataFrame({'ts_code': 'C', 'trade_date': dates, 'close': np.arange(100, 90, -1, dtype=float)}),
+            pd.DataFrame({'ts_code': 'D', 'trade_date': dates[-3:], 'close': [10.0, 11.0, 12.0]}),
+        ], ignore_index=True)
+    
+    def test_period_returns(self):
+        """测试多周期涨幅"""
+        returns = calculate_period_returns(self.panel, windows=[1, 5])
+        
+        self.assertAlmostEqual(returns.at['A', 'ret_5'], (109 / 104 - 1) * 100)
+        self.assertAlmostEqual(returns.at['B', 'ret_5'], 0.0)
+        self.assertAlmostEqual(returns.at['C', 'ret_1'], (91 / 92 - 1) * 100)
+        # 历史不足的周期为NaN
+        self.assertTrue(np.isnan(returns.at['D', 'ret_5']))
+        self.assertAlmostEqual(returns.at['D', 'ret_1'], (12 / 11 - 1) * 100)
+    
+    def test_window_longer_than_history(self):
+        """测试周期超过面板长度"""
+        returns = calculate_period_returns(self.panel, windows=[20])
+        self.assertTrue(returns['ret_20'].isna().all())
+    
+    def test_percentile_rps(self):
+        """测试RPS为涨幅的百分位"""
+        returns = calculate_period_returns(self.panel, windows=[1, 5])
+        df = calculate_rps(returns, windows=[1, 5], main_window=5)
+        
+        self.assertEqual(df.at['A', 'rps'], 100.0)
+        self.assertAlmostEqual(df.at['C', 'rps'], 100 / 3)
+        self.assertTrue(np.isnan(df.at['D', 'rps']))
+        self.assertTrue(((df['rps_1'] > 0) & (df['rps_1'] <= 100)).all())
+    
+    def test_empty_panel(self):
+        """测试空面板"""
+        returns = calculate_period_returns(pd.DataFrame(), windows=[5])
+        self.assertTrue(returns.empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+运行时缓存单元测试
+"""
+import unittest
+import threading
+import sys
+import os
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.runtime_cache import RuntimeCache, estimate_size
+from api.tushare_client import TushareClient
+from config import config
+from tests.helpers import use_temp_cache_dir
+
+
+class _Clock:
+    """可手动推进的时钟"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestRuntimeCache(unittest.TestCase):
+    """有界 LRU + TTL 缓存测试"""
+    
+    def test_dict_compatible(self):
+        """测试兼容 dict 用法"""
+        cache = RuntimeCache(max_bytes=10_000)
+        cache['mv_000001.SZ'] = 123.0
+        
+        self.assertIn('mv_000001.SZ', cache)
+        self.assertEqual(cache['mv_000001.SZ'], 123.0)
+        self.assertNotIn('mv_000002.SZ', cache)
+        with self.assertRaises(KeyError):
+            cache['mv_000002.SZ']
+        
+        del cache['mv_000001.SZ']
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size_bytes, 0)
+    
+    def test_lru_eviction_by_bytes(self):
+        """测试超出字节上限时淘汰最久未使用的条目"""
+        df = pd.DataFrame({'close': range(100)})
+        size = estimate_size(df)
+        cache = RuntimeCache(max_bytes=size * 2)
+        
+        cache['daily_a'] = df
+        cache['daily_b'] = df.copy()
+        cache.get('daily_a')  # a 变为最近使用
+        cache['daily_c'] = df.copy()
+        
+        self.assertIn('daily_a', cache)
+        self.assertNotIn('daily_b', cache)
+        self.assertIn('daily_c', cache)
+        self.assertLessEqual(cache.size_bytes, size * 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_oversized_item_not_cached(self):
+        """测试超过容量的单个条目不缓存"""
+        cache = RuntimeCache(max_bytes=100)
+        cache['daily_big'] = pd.DataFrame({'close': range(1000)})
+        
+        self.assertNotIn('daily_big', cache)
+        self.assertEqual(cache.size_bytes, 0)
+    
+    def test_namespace_ttl(self):
+        """测试按命名空间过期"""
+        clock = _Clock()
+        cache = RuntimeCache(max_bytes=10_000, ttl={'daily': 10, 'fin': 100}, default_ttl=None, clock=clock)
+        cache['daily_x'] = 1
+        cache['fin_x'] = 2
+        cache['other_x'] = 3
+        
+        clock.now = 50
+        self.assertIsNone(cache.get('daily_x'))
+        self.assertEqual(cache.get('fin_x'), 2)
+        self.assertEqual(cache.get('other_x'), 3)
+        
+        clock.now = 1000
+        self.assertNotIn('fin_x', cache)
+        self.assertIn('other_x', cache)
+        self.assertEqual(cache.stats()['expirations'], 2)
+        self.assertEqual(cache.size_bytes, estimate_size(3))
+    
+    def test_hit_miss_counters(self):
+        """测试命中统计"""
+        cache = RuntimeCache(max_bytes=10_000)
+        cache['mv_a'] = 1.0
+        cache.get('mv_a')
+        cache.get('mv_a')
+        cache.get('mv_b')
+        
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
+    
+    def test_overwrite_updates_bytes(self):
+        """测试覆盖写入时字节数不重复计算"""
+        cache = RuntimeCache(max_bytes=1_000_000)
+        cache['daily_a'] = pd.DataFrame({'close': range(10)})
+        cache['daily_a'] = pd.DataFrame({'close': range(10)})
+        
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size_bytes, estimate_size(pd.DataFrame({'close': range(10)})))
+    
+    def test_concurrent_access(self):
+        """测试多线程读写后字节统计一致"""
+        cache = RuntimeCache(max_bytes=5_000)
+        
+        def worker(n):
+            for i in range(200):
+                cache[f"mv_{n}_{i}"] = float(i)
+                cache.get(f"mv_{n}_{i // 2}")
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertLessEqual(cache.size_bytes, 5_000)
+        self.assertEqual(cache.size_bytes, sum(estimate_size(cache[k]) for k in list(cache._data)))
+
+
+class TestClientRuntimeCache(unittest.TestCase):
+    """客户端运行时缓存配置测试"""
+    
+    def setUp(self):
+        use_temp_cache_dir(self)
+    
+    def test_ttl_from_cache_expiry(self):
+        """测试命名空间过期时间取自 CACHE_EXPIRY"""
+        client = TushareClient(use_mock=True)
+        cache = client._runtime_cache
+        
+        self.assertEqual(cache.ttl['daily'], config.CACHE_EXPIRY['daily_data'] * 86400)
+        self.assertEqual(cache.ttl['fin'], config.CACHE_EXPIRY['financial_ttm'] * 86400)
+        self.assertEqual(cache.max_bytes, config.RUNTIME_CACHE_MAX_MB * 1024 * 1024)
+    
+    def test_status_reports_hits(self):
+        """测试重复读取命中运行时缓存并体现在接口状态中"""
+        client = TushareClient(use_mock=True)
+        client.get_daily_data('300274.SZ', '20250101', '20250301')
+        client.get_daily_data('300274.SZ', '20250101', '20250301')
+        
+        stats = client.get_api_status()['runtime_cache']
+        self.assertGreaterEqual(stats['hits'], 1)
+        self.assertGreater(stats['bytes'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+SQLite 缓存存储测试
+"""
+import unittest
+import datetime
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from config import config
+from data.sql_store import SqliteStore
+from tests.helpers import make_bars
+
+
+class TestSqliteStore(unittest.TestCase):
+    """SQLite 存储单元测试"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.store = SqliteStore(self.test_dir / 'cache.db')
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_table_roundtrip(self):
+        """测试整表写入后按写入顺序读取，可只读部分列"""
+        df = pd.DataFrame({'ts_code': ['600000.SH', '000001.SZ'], 'roe': [8.0, None], 'name': ['浦发银行', None]})
+        self.store.write_table('financial_ttm', df)
+
+        loaded = self.store.read_table('financial_ttm')
+        self.assertListEqual(list(loaded['ts_code']), ['600000.SH', '000001.SZ'])
+        self.assertTrue(pd.isna(loaded['roe'].iloc[1]))
+        self.assertTrue(pd.isna(loaded['name'].iloc[1]))
+        self.assertListEqual(list(self.store.read_table('financial_ttm', columns=['roe', 'missing']).columns), ['roe'])
+        self.assertIsNone(self.store.read_table('market_cap'))
+
+    def test_indexes(self):
+        """测试日线与市值表的索引，区间查询使用索引"""
+        self.store.write_table('market_cap', pd.DataFrame({'ts_code': ['000001.SZ'], 'total_mv': [1e6]}))
+        conn = self.store._conn()
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn('idx_market_cap_ts_code', indexes)
+        self.assertIn('idx_daily_bars_trade_date', indexes)
+
+        plan = ' '.join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM daily_bars WHERE ts_code = ? AND trade_date >= ?", ('000001.SZ', '2026')))
+        self.assertIn('PRIMARY KEY', plan)
+        plan = ' '.join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM daily_bars WHERE trade_date = ?", ('20261009',)))
+        self.assertIn('idx_daily_bars_trade_date', plan)
+
+    def test_upsert_table(self):
+        """测试按 ts_code 更新或插入"""
+        self.store.write_table('market_cap', pd.DataFrame({'ts_code': ['000001.SZ', '600000.SH'], 'total_mv': [1.0, 2.0]}))
+        version = self.store.version('market_cap')
+        self.store.upsert_table('market_cap', pd.DataFrame({'ts_code': ['600000.SH', '000002.SZ'], 'total_mv': [3.0, 4.0]}))
+
+        df = self.store.read_table('market_cap').sort_values('ts_code')
+        self.assertListEqual(list(df['total_mv']), [1.0, 4.0, 3.0])
+        self.assertGreater(self.store.version('market_cap'), version)
+
+    def test_delete_rows_keeps_updated_at(self):
+        """测试删除行不刷新更新时间"""
+        self.store.write_table('adj_factor', pd.DataFrame({'ts_code': ['A', 'B'], 'adj_factor': [1.0, 2.0]}),
+                               updated_at=1000.0)
+        self.assertEqual(self.store.delete_rows('adj_factor', 'ts_code', ['A', 'C']), 1)
+        self.assertEqual(self.store.updated_at('adj_factor'), 1000.0)
+        self.assertListEqual(list(self.store.read_table('adj_factor')['ts_code']), ['B'])
+
+    def test_failed_write_rolls_back(self):
+        """测试写入失败时回滚，原表保持不变"""
+        self.store.write_table('stock_list', pd.DataFrame({'ts_code': ['A'], 'name': ['x']}))
+        bad = pd.DataFrame({'ts_code': ['B'], 'name': [object()]})
+        with self.assertRaises(Exception):
+            self.store.write_table('stock_list', bad)
+        self.assertListEqual(list(self.store.read_table('stock_list')['ts_code']), ['A'])
+
+    def test_bars_upsert_range_and_cross_section(self):
+        """测试日线 upsert、区间查询与单日截面"""
+        self.store.upsert_bars(make_bars('600000.SH', ['20261009', '20261010']))
+        self.store.upsert_bars(make_bars('000001.SZ', ['20261008', '20261009', '20261010']))
+        self.store.upsert_bars(make_bars('000001.SZ', ['20261010'], close=2.0, vol=100.0))
+
+        df = self.store.read_bars('000001.SZ', start_date='20261009')
+        self.assertListEqual(list(df['trade_date']), ['20261009', '20261010'])
+        self.assertListEqual(list(df['close']), [1.0, 2.0])
+        self.assertListEqual(list(self.store.read_bars(trade_date='20261009')['ts_code']), ['000001.SZ', '600000.SH'])
+        self.assertListEqual(list(self.store.read_bars('000001.SZ', columns=['trade_date']).columns), ['trade_date'])
+        self.assertIsNone(self.store.read_bars('000002.SZ'))
+
+        self.assertEqual(self.store.delete_bars(['000001.SZ']), 3)
+        self.assertEqual(self.store.stats()['bars'], 2)
+
+
+class TestSqliteCacheManager(unittest.TestCase):
+    """CACHE_FORMAT = 'sqlite' 时的缓存接口"""
+
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+        patcher = mock.patch.object(config, 'CACHE_FORMAT', 'sqlite')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        cache_mgr.sql_store().close()
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def test_cache_functions(self):
+        """测试保存/加载/有效期/索引/删除行"""
+        cache_mgr.save_market_cap_cache(pd.DataFrame({'ts_code': ['000001.SZ', '600000.SH'], 'total_mv': [1.0, 2.0]}))
+        self.assertTrue(cache_mgr.is_cache_valid('market_cap', 7))
+        self.assertEqual(cache_mgr.get_cache_age('market_cap'), 0)
+        self.assertEqual(cache_mgr.load_market_cap_index()['600000.SH']['total_mv'], 2.0)
+
+        cache_mgr.drop_cache_rows('market_cap', ['600000.SH'])
+        self.assertNotIn('600000.SH', cache_mgr.load_market_cap_index())
+
+        cache_mgr.upsert_cache('market_cap', pd.DataFrame({'ts_code': ['000002.SZ'], 'total_mv': [3.0]}))
+        self.assertListEqual(sorted(cache_mgr.load_market_cap_index()), ['000001.SZ', '000002.SZ'])
+
+        cache_mgr.clear_cache_by_name('market_cap')
+        self.assertIsNone(cache_mgr.load_market_cap_cache())
+        self.assertFalse(cache_mgr.is_cache_valid('market_cap', 7))
+
+    def test_daily_range_and_cross_section(self):
+        """测试日线区间读取与单日截面"""
+        cache_mgr.save_daily_cache('000001.SZ', make_bars('000001.SZ', ['20261008', '20261009', '20261010']))
+        cache_mgr.save_daily_cache('600000.SH', make_bars('600000.SH', ['20261009']))
+
+        df = cache_mgr.load_daily_cache('000001.SZ', start_date='20261009', end_date='20261009')
+        self.assertListEqual(list(df['trade_date']), ['20261009'])
+        self.assertEqual(len(cache_mgr.read_daily_cross_section('20261009')), 2)
+
+        cache_mgr.delete_daily_cache(['000001.SZ'])
+        self.assertIsNone(cache_mgr.load_daily_cache('000001.SZ'))
+
+    def test_migrate_to_sql(self):
+        """测试文件缓存导入数据库，有效期按文件时间计算"""
+        old = (datetime.datetime.now() - datetime.timedelta(days=100)).timestamp()
+        path = self.test_cache_dir / 'financial_ttm.csv'
+        pd.DataFrame({'ts_code': ['000001.SZ'], 'roe': [10.0]}).to_csv(path, index=False, encoding='utf-8-sig')
+        os.utime(path, (old, old))
+        make_bars('000001.SZ', [20261009]).drop(columns=['ts_code']).to_csv(self.test_cache_dir / 'daily_000001_SZ.csv', index=False)
+
+        self.assertEqual(cache_mgr.migrate_cache(), 2)
+        self.assertEqual([p.name for p in self.test_cache_dir.glob('*.csv')], [])
+        self.assertFalse(cache_mgr.is_cache_valid('financial_ttm', 90))
+        self.assertIn('000001.SZ', cache_mgr.load_financial_ttm_index())
+        self.assertListEqual(list(cache_mgr.load_daily_cache('000001.SZ')['trade_date']), ['20261009'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+股票列表差异测试
+"""
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.cache_manager as cache_mgr
+from api.tushare_client import TushareClient
+from data.stock_list_diff import diff_stock_lists, is_empty_diff, format_diff, diff_to_changes
+
+
+def _stock_list(rows):
+    return pd.DataFrame(rows, columns=['ts_code', 'symbol', 'name', 'industry', 'list_date', 'list_status'])
+
+
+OLD_LIST = _stock_list([
+    ('000001.SZ', '000001', '平安银行', '银行', '19910403', 'L'),
+    ('000002.SZ', '000002', '万科A', '房地产', '19910129', 'L'),
+    ('600000.SH', '600000', '浦发银行', '银行', '19991110', 'L'),
+    ('600001.SH', '600001', '邯郸钢铁', '钢铁', '19980122', 'L'),
+])
+
+NEW_LIST = _stock_list([
+    ('000001.SZ', '000001', '平安银行', '银行', '19910403', 'L'),
+    ('000002.SZ', '000002', 'ST万科', '房地产', '19910129', 'L'),
+    ('600000.SH', '600000', '浦发银行', '非银金融', '19991110', 'L'),
+    ('688999.SH', '688999', '新股', '电子', '20261010', 'L'),
+])
+
+
+class TestDiffStockLists(unittest.TestCase):
+    """差异计算单元测试"""
+
+    def test_changes(self):
+        """测试四类变化"""
+        diff = diff_stock_lists(OLD_LIST, NEW_LIST)
+        self.assertEqual(diff['listed']['ts_code'].tolist(), ['688999.SH'])
+        self.assertEqual(diff['delisted']['ts_code'].tolist(), ['600001.SH'])
+        self.assertEqual(diff['renamed'].values.tolist(), [['000002.SZ', '万科A', 'ST万科']])
+        self.assertEqual(diff['reclassified'].values.tolist(), [['600000.SH', '银行', '非银金融']])
+        self.assertFalse(is_empty_diff(diff))
+        self.assertEqual(format_diff(diff), '新上市 1, 退市 1, 更名 1, 行业调整 1')
+
+    def test_unchanged(self):
+        """测试列表相同 (顺序不同、缺失行业) 时无变化"""
+        old = OLD_LIST.assign(industry=[None, '房地产', '银行', '钢铁'])
+        new = old.iloc[::-1].reset_index(drop=True)
+        self.assertTrue(is_empty_diff(diff_stock_lists(old, new)))
+
+    def test_changes_log(self):
+        """测试变化流水"""
+        changes = diff_to_changes(diff_stock_lists(OLD_LIST, NEW_LIST), '20261018')
+        self.assertEqual(len(changes), 4)
+        self.assertEqual(set(changes['change_date']), {'20261018'})
+        delisted = changes[changes['change'] == 'delisted'].iloc[0]
+        self.assertEqual((delisted['ts_code'], delisted['old_value']), ('600001.SH', '邯郸钢铁'))
+
+
+class TestStockListRefresh(unittest.TestCase):
+    """刷新股票列表时按变化失效缓存"""
+
+    def setUp(self):
+        self.test_cache_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = cache_mgr.CACHE_DIR
+        cache_mgr.CACHE_DIR = self.test_cache_dir
+
+        self.response = NEW_LIST
+        test = self
+
+        class FakeApi:
+            def stock_basic(self, **kwargs):
+                return test.response
+
+        self.client = TushareClient(use_mock=True)
+        self.client.use_mock = False
+        self.client._pro = FakeApi()
+
+    def tearDown(self):
+        cache_mgr.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_cache_dir, ignore_errors=True)
+
+    def _expire_stock_list(self):
+        """把股票列表缓存改为两天前写入"""
+        path = cache_mgr.get_cache_path('stock_list')
+        old = time.time() - 2 * 86400
+        os.utime(path, (old, old))
+
+    def test_first_refresh_saves_list(self):
+        """测试没有旧列表时直接保存"""
+        df = self.client.get_stock_list()
+        self.assertEqual(len(df), 4)
+        self.assertIsNone(self.client.stock_list_diff)
+        self.assertEqual(len(cache_mgr.load_stock_list_cache()), 4)
+
+    def test_unchanged_list_not_rewritten(self):
+        """测试列表无变化时只刷新修改时间"""
+        cache_mgr.save_stock_list_cache(NEW_LIST)
+        self._expire_stock_list()
+        path = cache_mgr.get_cache_path('stock_list')
+        content = path.read_bytes()
+
+        self.client.get_stock_list()
+        self.assertTrue(is_empty_diff(self.client.stock_list_diff))
+        self.assertTrue(cache_mgr.is_cache_valid('stock_list', 1))
+        self.assertEqual(path.read_bytes(), content)
+        self.assertIsNone(cache_mgr.load_stock_list_changes_cache())
+
+    def test_targeted_invalidation(self):
+        """测试只失效变化股票的缓存"""
+        cache_mgr.save_stock_list_cache(OLD_LIST)
+        self._expire_stock_list()
+        codes = OLD_LIST['ts_code'].tolist()
+        cache_mgr.save_market_cap_cache(pd.DataFrame({'ts_code': codes, 'total_mv': [1e6, 2e6, 3e6, 4e6]}))
+        cache_mgr.save_financial_ttm_cache(pd.DataFrame({'ts_code': codes, 'roe': [10.0, 8.0, 6.0, 4.0]}))
+        market_cap_mtime = cache_mgr.get_cache_path('market_cap').stat().st_mtime_ns
+        for code in ('600001.SH', '000001.SZ'):
+            cache_mgr.save_daily_cache(code, pd.DataFrame({'trade_date': ['20261016'], 'close': [1.0]}))
+        self.client._runtime_cache['mv_600001.SH'] = 400.0
+        self.client._runtime_cache['daily_600001.SH_20260101_20261016'] = pd.DataFrame({'close': [1.0]})
+        self.client._runtime_cache['mv_000001.SZ'] = 100.0
+        self.client._negative_cache.add('fina_indicator', '688999.SH', 'delisted')
+        self.client._negative_cache.add('daily', '000001.SZ', 'suspended')
+
+        self.client.get_stock_list()
+
+        # 退市股票的缓存被删除，其余股票保留
+        self.assertEqual(sorted(cache_mgr.load_market_cap_index()), ['000001.SZ', '000002.SZ', '600000.SH'])
+        self.assertNotIn('600001.SH', cache_mgr.load_financial_ttm_index())
+        self.assertEqual(cache_mgr.get_cache_path('market_cap').stat().st_mtime_ns, market_cap_mtime)
+        self.assertIsNone(cache_mgr.load_daily_cache('600001.SH'))
+        self.assertIsNotNone(cache_mgr.load_daily_cache('000001.SZ'))
+        self.assertNotIn('mv_600001.SH', self.client._runtime_cache)
+        self.assertNotIn('daily_600001.SH_20260101_20261016', self.client._runtime_cache)
+        self.assertIn('mv_000001.SZ', self.client._runtime_cache)
+
+        # 新上市股票的空结果记录被清除
+        self.assertFalse(self.client.is_known_empty('fina_indicator', '688999.SH'))
+        self.assertTrue(self.client.is_known_empty('daily', '000001.SZ'))
+
+        # 新列表和变化流水已写入
+        self.assertIn('688999.SH', cache_mgr.load_stock_list_index())
+        changes = cache_mgr.load_stock_list_changes_cache()
+        self.assertEqual(sorted(changes['change']), ['delisted', 'listed', 'reclassified', 'renamed'])
+
+        # 再次刷新时流水追加
+        self._expire_stock_list()
+        self.response = OLD_LIST
+        self.client.get_stock_list()
+        self.assertEqual(len(cache_mgr.load_stock_list_changes_cache()), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
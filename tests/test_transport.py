@@ -0,0 +1,147 @@
+"""
+HTTP传输层测试 - 使用本地HTTP服务模拟Tushare接口
+"""
+import unittest
+import json
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+from api.transport import HttpTransport, TushareHttpApi, TushareApiError, create_pro_api
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """按Tushare格式返回固定数据，记录连接端口"""
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        self.server.client_ports.add(self.client_address[1])
+        
+        if body['params'].get('slow'):
+            time.sleep(0.5)
+        
+        if body['api_name'] == 'bad_api':
+            result = {'code': 40101, 'msg': '权限不足', 'data': None}
+        else:
+            result = {
+                'code': 0,
+                'msg': '',
+                'data': {
+                    'fields': ['ts_code', 'trade_date', 'close'],
+                    'items': [['300274.SZ', '20260213', 149.16]],
+                },
+            }
+        
+        payload = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False
+    
+    def handle_error(self, request, client_address):
+        # 超时测试中客户端提前断开，忽略写入失败
+        pass
+
+
+@unittest.skipUnless(HAS_REQUESTS, "需要 requests")
+class TestHttpTransport(unittest.TestCase):
+    """连接池传输层测试"""
+    
+    def setUp(self):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.requests = []
+        self.server.client_ports = set()
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def test_query_wire_format(self):
+        """测试请求格式与返回解析"""
+        api = TushareHttpApi('token123', HttpTransport(self.url))
+        
+        df = api.daily(ts_code='300274.SZ', fields='ts_code,close')
+        
+        self.assertEqual(list(df.columns), ['ts_code', 'trade_date', 'close'])
+        self.assertEqual(df.iloc[0]['close'], 149.16)
+        request = self.server.requests[0]
+        self.assertEqual(request['api_name'], 'daily')
+        self.assertEqual(request['token'], 'token123')
+        self.assertEqual(request['params'], {'ts_code': '300274.SZ'})
+        self.assertEqual(request['fields'], 'ts_code,close')
+    
+    def test_error_code_raises(self):
+        """测试接口错误码抛出异常"""
+        api = TushareHttpApi('token123', HttpTransport(self.url))
+        
+        with self.assertRaises(TushareApiError) as ctx:
+            api.bad_api()
+        self.assertEqual(ctx.exception.code, 40101)
+    
+    def test_keep_alive_reuses_connection(self):
+        """测试串行请求复用同一连接"""
+        api = TushareHttpApi('token123', HttpTransport(self.url))
+        
+        for _ in range(5):
+            api.daily(ts_code='300274.SZ')
+        
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(self.server.client_ports), 1)
+    
+    def test_pool_size_bounds_connections(self):
+        """测试多线程并发时连接数不超过连接池大小"""
+        api = TushareHttpApi('token123', HttpTransport(self.url, pool_size=2))
+        threads = [
+            threading.Thread(target=lambda: [api.daily(ts_code='300274.SZ') for _ in range(3)])
+            for _ in range(6)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(len(self.server.requests), 18)
+        self.assertLessEqual(len(self.server.client_ports), 2)
+    
+    def test_timeout_enforced(self):
+        """测试API_TIMEOUT生效"""
+        api = TushareHttpApi('token123', HttpTransport(self.url, timeout=0.1))
+        
+        with self.assertRaises(requests.exceptions.Timeout):
+            api.daily(slow=True)
+    
+    def test_create_pro_api(self):
+        """测试工厂函数"""
+        api = create_pro_api(token='abc', base_url=self.url, pool_size=4, timeout=3)
+        
+        self.assertEqual(api.token, 'abc')
+        self.assertEqual(api.transport.pool_size, 4)
+        self.assertEqual(api.transport.timeout, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()